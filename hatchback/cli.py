@@ -1,17 +1,32 @@
 import argparse
-import sys
-from .commands.init import handle_init
-from .commands.run import handle_run
-from .commands.migrate import handle_migrate
-from .commands.make import handle_make
-from .commands.remove import handle_remove
-from .commands.upgrade import handle_upgrade
-from .commands.seed import handle_seed
-from .commands.test import handle_test
-from .commands.inspect import handle_inspect
-from .utils import console, play_intro
+import importlib
 from . import __version__
 
+# Command -> (module in hatchback.commands, handler). Handler modules are only
+# imported when their command runs, so `hbk --help` and `hbk run` do not pay
+# for rich prompts, SQLAlchemy and the other commands' dependencies.
+COMMANDS = {
+    "init": ("init", "handle_init"),
+    "run": ("run", "handle_run"),
+    "migrate": ("migrate", "handle_migrate"),
+    "db": ("db", "handle_db"),
+    "make": ("make", "handle_make"),
+    "remove": ("remove", "handle_remove"),
+    "seed": ("seed", "handle_seed"),
+    "inspect": ("inspect", "handle_inspect"),
+    "upgrade": ("upgrade", "handle_upgrade"),
+    "test": ("test", "handle_test"),
+    "doctor": ("doctor", "handle_doctor"),
+    "profile": ("profile", "handle_profile"),
+    "bench": ("bench", "handle_bench"),
+    "cache": ("cache", "handle_cache"),
+}
+
+def run_command(args):
+    module_name, handler_name = COMMANDS[args.command]
+    module = importlib.import_module(f".commands.{module_name}", __package__)
+    getattr(module, handler_name)(args)
+
 def main():
     parser = argparse.ArgumentParser(
         description="Hatchback CLI - A production-ready FastAPI boilerplate generator and manager.",
@@ -21,24 +36,60 @@ Examples (tip: 'hbk' is a shortcut for 'hatchback'):
   # Initialize a new project
   hbk init my_awesome_project
 
+  # Generate several projects from a manifest (no prompts, built in parallel)
+  hbk init --from services.yml --jobs 4
+
   # Run the development server
   hbk run --host 0.0.0.0 --port 8000
 
+  # Run the production server (gunicorn, one worker per CPU)
+  hbk run --prod --host 0.0.0.0 --workers 4
+
   # Create a new migration
   hbk migrate create -m "create users table"
 
+  # Create a migration that is safe to run on large, busy tables
+  hbk migrate create -m "index users by email" --safe
+
   # Apply migrations
   hbk migrate apply
 
+  # Apply with a stricter lock timeout and more retries
+  hbk migrate apply --lock-timeout 2s --retries 5
+
   # Rollback the last migration
   hbk migrate downgrade
 
   # Rollback multiple steps
   hbk migrate downgrade -r -2
 
+  # Migrate every regional and tenant database, four at a time
+  hbk migrate apply --targets targets.yml --concurrency 4
+
+  # Estimate what pending migrations lock, and for how long, before applying
+  hbk migrate plan --max-lock 2
+
+  # Fold migrations 1-40 into one baseline so fresh databases set up fast
+  hbk migrate squash --up-to 40
+
+  # Propose missing, redundant and unused indexes from live query plans, as a migration
+  hbk db advise
+
+  # Move a hot tenant's rows into partitions of its own, as a migration
+  hbk db split-tenant acme
+
   # Scaffold a new resource (Model, Service, Repository, etc.)
   hbk make product
 
+  # Scaffold a resource whose rows belong to the logged-in user's tenant
+  hbk make invoice --tenant-scoped
+
+  # ...stored in 32 partitions by tenant, for tables heading to hundreds of millions of rows
+  hbk make invoice --partition-by tenant_id --partitions 32
+
+  # Scaffold many typed resources at once from a spec
+  hbk make --spec resources.yml
+
   # Remove a scaffolded resource and clean up imports
   hbk remove product
 
@@ -53,6 +104,28 @@ Examples (tip: 'hbk' is a shortcut for 'hatchback'):
 
   # Run tests
   hbk test
+
+  # Run tests in parallel on PostgreSQL, one cloned database per worker
+  hbk test -n auto --postgres
+
+  # Run only the tests affected by your uncommitted changes (or by a branch: --changed main)
+  hbk test --changed
+
+  # Find blocking calls in async routes, unbounded queries, N+1 loops and unindexed filters
+  hbk doctor
+
+  # Profile a single request in-process and open the flame graph
+  hbk profile GET /users --as-user admin
+
+  # Pre-build the wheel cache so later 'hbk init' installs are instant and offline
+  hbk cache warm
+
+  # Benchmark the hot endpoints and fail on regressions against the stored baseline
+  hbk bench --dataset medium --concurrency 20
+  hbk bench --save-baseline
+
+  # Look for memory leaks: retained allocations per request, per endpoint
+  hbk profile --memory -e "GET /users" -e "GET /users/me" --as-user admin
 """
     )
     
@@ -71,35 +144,79 @@ Examples (tip: 'hbk' is a shortcut for 'hatchback'):
     init_parser.add_argument("--use-uv", action="store_true", help="Use uv for faster installation")
     init_parser.add_argument("--docker", action="store_true", help="Include Docker")
     init_parser.add_argument("--no-docker", action="store_true", help="Skip Docker")
+    init_parser.add_argument("--no-cache", action="store_true", help="Install from the network instead of the local wheel cache")
+    init_parser.add_argument("--from", dest="from_manifest", metavar="MANIFEST", help="Generate the projects described in a YAML/JSON manifest, without prompts")
+    init_parser.add_argument("--jobs", "-j", type=int, help="Projects generated in parallel with --from (default: CPU count)")
 
     run_parser = subparsers.add_parser(
         "run", 
         help="Run the development server with hot-reload",
-        description="Start the Uvicorn server with hot-reload enabled. Useful for development."
+        description="Start the Uvicorn server with hot-reload enabled. Useful for development.\nUse --prod to run multiple preloaded workers under gunicorn (configured by gunicorn.conf.py)."
     )
     run_parser.add_argument("--port", type=int, default=8000, help="Port to run on")
     run_parser.add_argument("--host", default="127.0.0.1", help="Host to run on")
+    run_parser.add_argument("--prod", action="store_true", help="Production mode: multiple workers, preload, no reload")
+    run_parser.add_argument("--workers", type=int, help="Number of worker processes (--prod only, default: CPU count)")
+    run_parser.add_argument("--keep-alive", type=int, help="Seconds to keep idle connections open (--prod only, default: 5)")
+    run_parser.add_argument("--backlog", type=int, help="Maximum number of pending connections (--prod only, default: 2048)")
+    run_parser.add_argument("--max-requests", type=int, help="Recycle a worker after this many requests (--prod only, default: 10000)")
+    run_parser.add_argument("--max-requests-jitter", type=int, help="Random jitter added to --max-requests (--prod only, default: 1000)")
+    run_parser.add_argument("--graceful-timeout", type=int, help="Seconds workers get to finish requests on restart (--prod only, default: 30)")
 
     migrate_parser = subparsers.add_parser(
         "migrate", 
-        help="Manage database migrations (create/apply/downgrade)",
+        help="Manage database migrations (create/apply/downgrade/squash)",
         description="Wrapper around Alembic to easily create, apply, and rollback database migrations."
     )
-    migrate_parser.add_argument("action", choices=["create", "apply", "downgrade"], help="Action: create, apply, or downgrade")
+    migrate_parser.add_argument("action", choices=["create", "apply", "downgrade", "squash", "plan"], help="Action: create, apply, downgrade, squash, or plan")
     migrate_parser.add_argument("-r", "--revision", default="-1", help="Revision target for downgrade (default: -1, i.e. one step back)")
     migrate_parser.add_argument("-m", "--message", help="Migration message (required for create)")
+    migrate_parser.add_argument("--up-to", type=int, metavar="N", help="squash: last revision to fold into the baseline")
+    migrate_parser.add_argument("--force", action="store_true", help="squash: proceed even if the database is inside the squashed range")
+    migrate_parser.add_argument("--safe", action="store_true", help="create: rewrite the migration into online operations (concurrent indexes, NOT VALID constraints, batched backfills)")
+    migrate_parser.add_argument("--lock-timeout", default="5s", metavar="DURATION", help="apply: PostgreSQL lock_timeout for migration statements (default: 5s)")
+    migrate_parser.add_argument("--statement-timeout", metavar="DURATION", help="apply: PostgreSQL statement_timeout for migration statements (default: unset)")
+    migrate_parser.add_argument("--retries", type=int, default=3, help="apply: retries when a migration times out waiting for a lock (default: 3)")
+    migrate_parser.add_argument("--targets", metavar="FILE", help="apply: migrate every database listed in a YAML/JSON targets file")
+    migrate_parser.add_argument("--concurrency", type=int, metavar="N", help="apply --targets: databases migrated at once (default: file's 'concurrency', else 4)")
+    migrate_parser.add_argument("--timeout", type=float, metavar="SECONDS", help="apply --targets: time limit per attempt on each target (default: file's 'timeout', else 1800)")
+    migrate_parser.add_argument("--continue-on-error", action="store_true", help="apply --targets: keep going after a target fails instead of skipping the rest")
+    migrate_parser.add_argument("--max-lock", type=float, default=5.0, metavar="SECONDS", help="plan: fail if a lock that blocks reads or writes is held longer (default: 5)")
+    migrate_parser.add_argument("--max-duration", type=float, metavar="SECONDS", help="plan: fail if all pending migrations are estimated to take longer")
+
+    db_parser = subparsers.add_parser(
+        "db",
+        help="Database maintenance (index advice, tenant partitions)",
+        description="Maintenance against the live database configured in .env.\n"
+                    "advise: plan the most expensive query shapes (pg_stat_statements, or --log with a PostgreSQL or\n"
+                    "SQLAlchemy query log) with EXPLAIN and compare them with the catalog's indexes and usage statistics.\n"
+                    "Missing, redundant and unused indexes are written as a migration using concurrent index builds and drops.\n"
+                    "split-tenant: write a migration moving one tenant's rows out of the shared hash partition of each table\n"
+                    "partitioned by tenant_id into a partition of its own."
+    )
+    db_parser.add_argument("action", choices=["advise", "split-tenant"], help="Action: advise, split-tenant")
+    db_parser.add_argument("tenant", nargs="?", help="split-tenant: the tenant's id or subdomain")
+    db_parser.add_argument("--top", type=int, default=50, help="advise: query shapes to plan, most expensive first (default: 50)")
+    db_parser.add_argument("--log", metavar="FILE", help="advise: read query shapes from a PostgreSQL or SQLAlchemy log instead of pg_stat_statements")
+    db_parser.add_argument("--drop-unused", action="store_true", help="advise: drop never-scanned indexes in the migration (default: commented out)")
+    db_parser.add_argument("--table", action="append", help="split-tenant: only this partitioned table (repeatable; default: all)")
+    db_parser.add_argument("--dry-run", action="store_true", help="Report only, write no migration")
 
     make_parser = subparsers.add_parser(
         "make", 
         help="Scaffold a new resource (Model, Service, Repository, etc.)",
-        description="Generate a new resource. Creates Model, Schema, Repository, Service, and Controller files automatically."
+        description="Generate a new resource. Creates Model, Schema, Repository, Service, Controller, test and benchmark files automatically."
     )
-    make_parser.add_argument("resource", help="Name of the resource (snake_case)")
+    make_parser.add_argument("resource", nargs="?", help="Name of the resource (snake_case)")
+    make_parser.add_argument("--spec", help="YAML/JSON spec describing many resources with typed fields, relations and indexes")
+    make_parser.add_argument("--tenant-scoped", action="store_true", help="Add tenant_id with (tenant_id, id)/(tenant_id, created_at) indexes; repositories filter by tenant and routes take it from the logged-in user")
+    make_parser.add_argument("--partition-by", choices=["tenant_id"], help="Hash-partition the table on this column (implies --tenant-scoped); the primary key becomes (tenant_id, id)")
+    make_parser.add_argument("--partitions", type=int, help="Number of hash partitions with --partition-by (default: 16)")
 
     remove_parser = subparsers.add_parser(
         "remove",
         help="Remove a scaffolded resource and clean up all imports",
-        description="Remove a previously scaffolded resource. Deletes model, schema, repository, service, route and test files, and cleans up __init__.py imports."
+        description="Remove a previously scaffolded resource. Deletes model, schema, repository, service, route, test and benchmark files, and cleans up __init__.py imports."
     )
     remove_parser.add_argument("resource", help="Name of the resource to remove (snake_case)")
     remove_parser.add_argument("--force", "-f", action="store_true", help="Skip confirmation prompt")
@@ -114,11 +231,13 @@ Examples (tip: 'hbk' is a shortcut for 'hatchback'):
     inspect_parser = subparsers.add_parser(
         "inspect",
         help="Inspect an existing database and generate SQLAlchemy models",
-        description="Reflects tables from a database URL and generates SQLAlchemy model code using sqlacodegen."
+        description="Reflects every table from a database URL in one pass and generates SQLAlchemy model code in-process."
     )
     inspect_parser.add_argument("--url", help="Database connection URL")
     inspect_parser.add_argument("--output", help="Output file path (default: app/models/imported.py)")
     inspect_parser.add_argument("--scaffold", action="store_true", help="Automatically scaffold full architecture (Service, Repo, etc.) for each table")
+    inspect_parser.add_argument("--dry-run", action="store_true", help="With --scaffold: list the tables that changed since the last run without writing anything")
+    inspect_parser.add_argument("--full", action="store_true", help="With --scaffold: ignore the schema snapshot and regenerate every table")
 
     upgrade_parser = subparsers.add_parser(
         "upgrade",
@@ -129,20 +248,78 @@ Examples (tip: 'hbk' is a shortcut for 'hatchback'):
     test_parser = subparsers.add_parser(
         "test", 
         help="Run tests using pytest",
-        description="Run the test suite."
+        description="Run the test suite.\nWith --changed, only tests whose imports or recorded coverage touch a changed file run; the map is cached in .hatchback/cache.\nWith --postgres, tests run on PostgreSQL: a template database is migrated once and each worker gets a clone of it (CREATE DATABASE ... TEMPLATE).\nWithout a URL (or TEST_DATABASE_URL), a temporary local server is started and removed afterwards."
+    )
+    test_parser.add_argument("-n", dest="workers", metavar="WORKERS", help="Run in parallel with pytest-xdist: a number of workers, or 'auto' for one per CPU")
+    test_parser.add_argument("--changed", nargs="?", const="HEAD", metavar="REF", help="Run only the tests affected by files changed since REF (default: HEAD, i.e. uncommitted changes), plus those whose dependency map is stale")
+    test_parser.add_argument("--postgres", nargs="?", const="", metavar="URL", help="Run on PostgreSQL. Test databases are named <database in URL>_hbk_*; default: TEST_DATABASE_URL or a temporary server")
+
+    doctor_parser = subparsers.add_parser(
+        "doctor",
+        help="Find performance foot-guns in the project's code",
+        description="Statically analyse app/ and report performance foot-guns as file:line findings.\n"
+                    "  HBK001 blocking call in an async route    HBK004 query in a loop\n"
+                    "  HBK002 unbounded query                    HBK005 filter on an unindexed column\n"
+                    "  HBK003 pagination or counting in Python   HBK006 heavy object built per request\n"
+                    "Exits with status 1 when there are findings. Silence a checked line with '# noqa: HBK00N'."
+    )
+    doctor_parser.add_argument("paths", nargs="*", help="Files or directories to report on (default: app)")
+    doctor_parser.add_argument("--select", help="Comma-separated rules to run, e.g. HBK001,HBK004 (default: all)")
+    doctor_parser.add_argument("--ignore", help="Comma-separated rules to skip")
+
+    profile_parser = subparsers.add_parser(
+        "profile",
+        help="Profile a single request and produce a flame graph",
+        description="Run one request against the app in-process under the sampling profiler and write a speedscope profile.\nOpens it with the speedscope CLI if installed, otherwise prints how to view it in the browser.\nWith --memory, drive endpoints in a loop and report the memory they retain (exit status 1 above --threshold)."
+    )
+    profile_parser.add_argument("method", nargs="?", help="HTTP method, e.g. GET")
+    profile_parser.add_argument("path", nargs="?", help="Request path, e.g. /users?limit=50")
+    profile_parser.add_argument("--header", "-H", action="append", help="Request header, e.g. 'Authorization: Bearer ...' (repeatable)")
+    profile_parser.add_argument("--data", "-d", help="JSON request body")
+    profile_parser.add_argument("--as-user", help="Authenticate as this username without a token")
+    profile_parser.add_argument("--repeat", type=int, default=1, help="Profile this many consecutive requests (default: 1)")
+    profile_parser.add_argument("--interval", type=float, default=1.0, help="Sampling interval in milliseconds (default: 1)")
+    profile_parser.add_argument("--output-dir", help="Directory for profiles (default: profiles/)")
+    profile_parser.add_argument("--no-open", action="store_true", help="Do not open the profile in speedscope")
+    profile_parser.add_argument("--memory", action="store_true", help="Report memory retained per endpoint instead of CPU time")
+    profile_parser.add_argument("--endpoint", "-e", action="append", help="'METHOD /path' to drive with --memory (repeatable, default: every GET route without parameters)")
+    profile_parser.add_argument("--iterations", type=int, default=200, help="Requests per endpoint with --memory (default: 200)")
+    profile_parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests per endpoint with --memory (default: 20)")
+    profile_parser.add_argument("--threshold", type=int, default=512, help="Bytes retained per request that count as a leak with --memory (default: 512)")
+
+    bench_parser = subparsers.add_parser(
+        "bench",
+        help="Benchmark the app and compare against a baseline",
+        description="Run the scenarios in benchmarks/bench_*.py in-process against a seeded database and report throughput and p50/p95/p99 latency.\nResults are compared with the stored baseline; exits with status 1 on regressions or failed requests."
+    )
+    bench_parser.add_argument("--dataset", choices=["small", "medium", "large"], default="small", help="Seed data size (default: small)")
+    bench_parser.add_argument("--db-url", help="Dedicated benchmark database, e.g. Postgres (default: throwaway SQLite). Its tables are dropped!")
+    bench_parser.add_argument("--requests", type=int, default=500, help="Measured requests per scenario (default: 500)")
+    bench_parser.add_argument("--concurrency", "-c", type=int, default=10, help="Concurrent clients (default: 10)")
+    bench_parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests per scenario (default: 20)")
+    bench_parser.add_argument("--scenario", "-s", action="append", help="Only run scenarios whose name contains this (repeatable)")
+    bench_parser.add_argument("--output", default="benchmarks/results/latest.json", help="Results file (default: benchmarks/results/latest.json)")
+    bench_parser.add_argument("--baseline", default="benchmarks/baseline.json", help="Baseline file (default: benchmarks/baseline.json)")
+    bench_parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    bench_parser.add_argument("--latency-threshold", type=float, default=15.0, help="Max allowed p95 latency increase in %% (default: 15)")
+    bench_parser.add_argument("--throughput-threshold", type=float, default=10.0, help="Max allowed throughput drop in %% (default: 10)")
+
+    cache_parser = subparsers.add_parser(
+        "cache",
+        help="Inspect and manage the local wheel cache used by init",
+        description="New projects get their venv by cloning a prebuilt environment from a local wheelhouse keyed by the\ntemplate's requirements and the Python interpreter. Once warm, 'hbk init' works fully offline.\nLocation: $HATCHBACK_CACHE_DIR, or ~/.cache/hatchback."
     )
+    cache_parser.add_argument("action", choices=["list", "warm", "prune", "path"], help="list entries, warm (build) the entry for the template, prune stale entries, or print the cache path")
+    cache_parser.add_argument("--requirements", "-r", help="Requirements file to warm the cache for (default: the project template's)")
+    cache_parser.add_argument("--all", action="store_true", help="prune: remove every entry, including the current one")
+    cache_parser.add_argument("--older-than", type=int, metavar="DAYS", help="prune: also remove entries not used for this many days")
 
     args = parser.parse_args()
-    if args.command == "init": handle_init(args)
-    elif args.command == "run": handle_run(args)
-    elif args.command == "migrate": handle_migrate(args)
-    elif args.command == "make": handle_make(args)
-    elif args.command == "remove": handle_remove(args)
-    elif args.command == "seed": handle_seed(args)
-    elif args.command == "inspect": handle_inspect(args)
-    elif args.command == "upgrade": handle_upgrade(args)
-    elif args.command == "test": handle_test(args)
+    if args.command in COMMANDS:
+        run_command(args)
     else:
+        from .utils import console, play_intro
+
         play_intro()
         console.print("[bold blue]Hatchback CLI[/bold blue]")
         console.print("Usage: hatchback [command] [options]")
@@ -150,12 +327,17 @@ Examples (tip: 'hbk' is a shortcut for 'hatchback'):
         console.print("  [green]init[/green]      Initialize a new project")
         console.print("  [green]run[/green]       Run the development server")
         console.print("  [green]migrate[/green]   Manage database migrations")
+        console.print("  [green]db[/green]        Index advice and tenant partitions on the live database")
         console.print("  [green]make[/green]      Scaffold a new resource")
         console.print("  [green]remove[/green]    Remove a scaffolded resource")
         console.print("  [green]seed[/green]      Seed database with default data")
         console.print("  [green]inspect[/green]   Inspect existing DB and scaffold")
         console.print("  [green]upgrade[/green]   Sync latest skills and infra files")
         console.print("  [green]test[/green]      Run tests")
+        console.print("  [green]doctor[/green]    Find performance foot-guns in the code")
+        console.print("  [green]profile[/green]   Profile a request (flame graph)")
+        console.print("  [green]bench[/green]     Benchmark endpoints against a baseline")
+        console.print("  [green]cache[/green]     Manage the local wheel cache")
         console.print("\nRun 'hatchback [command] --help' for more information.")
 
 if __name__ == "__main__":
@@ -0,0 +1,529 @@
+"""
+In-process SQLAlchemy model generation for `hatchback inspect`.
+
+The whole schema is reflected once with MetaData.reflect, which fetches the
+columns, foreign keys and indexes of every table in bulk. Class names and
+relationships are resolved on that metadata, then each table is rendered to
+source.
+"""
+import hashlib
+import importlib
+import json
+import keyword
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import sqlalchemy
+from sqlalchemy import CheckConstraint, ForeignKeyConstraint, MetaData, UniqueConstraint
+
+from .utils import to_pascal_case
+
+SKIP_TABLES = {"alembic_version"}
+
+# Attribute names the declarative base reserves for itself
+RESERVED_ATTRIBUTES = {"metadata", "registry"}
+
+
+@dataclass
+class Model:
+    table: sqlalchemy.Table
+    resource: str
+    class_name: str
+    # column name -> Python attribute name
+    attributes: Dict[str, str] = field(default_factory=dict)
+    relationships: List[str] = field(default_factory=list)
+
+
+def singularize(table_name):
+    return table_name[:-1] if table_name.endswith("s") else table_name
+
+
+def reflect(engine, schema=None, only=None):
+    """Reflect every table (or just `only`) in a single pass."""
+    metadata = MetaData()
+    metadata.reflect(bind=engine, schema=schema, only=only)
+    return metadata
+
+
+def _attribute_name(name, taken):
+    attribute = re.sub(r"\W", "_", name)
+    if not attribute or attribute[0].isdigit():
+        attribute = f"_{attribute}"
+    if keyword.iskeyword(attribute) or attribute in RESERVED_ATTRIBUTES:
+        attribute += "_"
+    while attribute in taken:
+        attribute += "_"
+    return attribute
+
+
+def build_models(metadata):
+    """
+    Map reflected tables to models. Returns (models by table key, skipped) where
+    skipped lists (table, reason) for tables the ORM cannot map.
+    """
+    models = {}
+    skipped = []
+    for key, table in metadata.tables.items():
+        if table.name in SKIP_TABLES:
+            continue
+        if not table.primary_key.columns:
+            skipped.append((table.name, "no primary key"))
+            continue
+        resource = singularize(table.name).lower()
+        model = Model(table=table, resource=resource, class_name=to_pascal_case(resource))
+        taken = set()
+        for column in table.columns:
+            model.attributes[column.name] = _attribute_name(column.name, taken)
+            taken.add(model.attributes[column.name])
+        models[key] = model
+
+    _add_relationships(models)
+    return models, skipped
+
+
+def _add_relationships(models):
+    """
+    Turn every foreign key between mapped tables into a many-to-one relationship
+    on the child and the matching one-to-many on the parent. When a child has
+    several foreign keys to the same parent, both sides name the columns with
+    foreign_keys and the collections are prefixed to stay distinct.
+    """
+    taken = {key: set(model.attributes.values()) for key, model in models.items()}
+
+    # Sorted, so a partial reflection names relationships like a full one
+    for key, child in sorted(models.items()):
+        constraints = sorted(
+            (c for c in child.table.foreign_key_constraints if c.referred_table.key in models),
+            key=lambda c: [col.name for col in c.columns],
+        )
+        per_parent = {}
+        for constraint in constraints:
+            per_parent[constraint.referred_table.key] = per_parent.get(constraint.referred_table.key, 0) + 1
+
+        for constraint in constraints:
+            parent_key = constraint.referred_table.key
+            parent = models[parent_key]
+            columns = [col.name for col in constraint.columns]
+            ambiguous = per_parent[parent_key] > 1
+
+            if len(columns) == 1 and columns[0].endswith("_id") and len(columns[0]) > 3:
+                base = columns[0][:-3]
+            else:
+                base = parent.resource
+            many_to_one = _attribute_name(base, taken[key])
+            taken[key].add(many_to_one)
+
+            collection = child.table.name if not ambiguous else f"{many_to_one}_{child.table.name}"
+            one_to_many = _attribute_name(collection, taken[parent_key])
+            taken[parent_key].add(one_to_many)
+
+            options = []
+            if ambiguous:
+                attrs = ", ".join(f"{child.class_name}.{child.attributes[c]}" for c in columns)
+                options.append(f'foreign_keys="[{attrs}]"')
+            child_options = list(options)
+            if parent_key == key:
+                # Self-referential: the many-to-one side points at the parent's key
+                remote = ", ".join(f"{child.class_name}.{child.attributes[e.column.name]}" for e in constraint.elements)
+                child_options.append(f'remote_side="[{remote}]"')
+
+            child.relationships.append(_relationship(many_to_one, parent.class_name, child_options, one_to_many))
+            parent.relationships.append(_relationship(one_to_many, child.class_name, options, many_to_one))
+
+
+def _relationship(attribute, class_name, options, back_populates):
+    args = [json.dumps(class_name)] + options + [f"back_populates={json.dumps(back_populates)}"]
+    return f"{attribute} = relationship({', '.join(args)})"
+
+
+class _Imports:
+    def __init__(self):
+        self.modules = {}
+
+    def add(self, module, name):
+        self.modules.setdefault(module, set()).add(name)
+
+    def lines(self):
+        return [f"from {module} import {', '.join(sorted(names))}" for module, names in sorted(self.modules.items())]
+
+
+def _render_type(coltype, imports):
+    """
+    Render a column type with the repr SQLAlchemy gives it, importing the type
+    (and any nested type, e.g. ARRAY(INTEGER())) from its dialect package when
+    it is dialect-specific.
+    """
+    module = type(coltype).__module__
+    dialect_package = ".".join(module.split(".")[:3]) if module.startswith("sqlalchemy.dialects.") else None
+    rendered = repr(coltype)
+    for name in set(re.findall(r"\b([A-Z][A-Za-z0-9_]*)\(", rendered)):
+        if dialect_package and hasattr(importlib.import_module(dialect_package), name):
+            imports.add(dialect_package, name)
+        elif hasattr(sqlalchemy, name):
+            imports.add("sqlalchemy", name)
+        else:
+            imports.add("sqlalchemy.types", name)
+    return rendered
+
+
+def _render_column(model, column, single_fks, imports):
+    args = [_render_type(column.type, imports)]
+
+    constraint = single_fks.get(column.name)
+    if constraint is not None:
+        imports.add("sqlalchemy", "ForeignKey")
+        element = constraint.elements[0]
+        fk_args = [json.dumps(element.target_fullname)]
+        for option in ("name", "ondelete", "onupdate"):
+            value = getattr(constraint, option)
+            if value:
+                fk_args.append(f"{option}={json.dumps(value)}")
+        args.append(f"ForeignKey({', '.join(fk_args)})")
+
+    if column.primary_key:
+        args.append("primary_key=True")
+        if column.autoincrement is False:
+            args.append("autoincrement=False")
+    elif not column.nullable:
+        args.append("nullable=False")
+    if column.server_default is not None:
+        imports.add("sqlalchemy", "text")
+        default = getattr(column.server_default, "arg", None)
+        default = getattr(default, "text", default)
+        args.append(f"server_default=text({json.dumps(str(default))})")
+    if column.comment:
+        args.append(f"comment={json.dumps(column.comment)}")
+
+    attribute = model.attributes[column.name]
+    if attribute != column.name:
+        args.insert(0, json.dumps(column.name))
+    imports.add("sqlalchemy", "Column")
+    return f"{attribute} = Column({', '.join(args)})"
+
+
+def _render_table_args(table, single_fks, imports):
+    """Constraints and indexes that do not fit on a single column, with their database names."""
+    table_args = []
+
+    def names(columns):
+        return ", ".join(json.dumps(column.name) for column in columns)
+
+    for constraint in sorted(table.constraints, key=lambda c: c.name or ""):
+        name = f", name={json.dumps(constraint.name)}" if constraint.name else ""
+        if isinstance(constraint, ForeignKeyConstraint) and constraint not in single_fks.values():
+            imports.add("sqlalchemy", "ForeignKeyConstraint")
+            targets = ", ".join(json.dumps(e.target_fullname) for e in constraint.elements)
+            options = "".join(
+                f", {option}={json.dumps(getattr(constraint, option))}"
+                for option in ("ondelete", "onupdate") if getattr(constraint, option)
+            )
+            table_args.append(f"ForeignKeyConstraint([{names(constraint.columns)}], [{targets}]{name}{options})")
+        elif isinstance(constraint, UniqueConstraint):
+            imports.add("sqlalchemy", "UniqueConstraint")
+            table_args.append(f"UniqueConstraint({names(constraint.columns)}{name})")
+        elif isinstance(constraint, CheckConstraint):
+            imports.add("sqlalchemy", "CheckConstraint")
+            imports.add("sqlalchemy", "text")
+            table_args.append(f"CheckConstraint(text({json.dumps(str(constraint.sqltext))}){name})")
+
+    for index in sorted(table.indexes, key=lambda i: i.name or ""):
+        imports.add("sqlalchemy", "Index")
+        unique = ", unique=True" if index.unique else ""
+        table_args.append(f"Index({json.dumps(index.name)}, {names(index.columns)}{unique})")
+
+    if table.schema:
+        table_args.append(f'{{"schema": {json.dumps(table.schema)}}}')
+    return table_args
+
+
+def render_class(model, imports):
+    table = model.table
+    single_fks = {
+        constraint.columns[0].name: constraint
+        for constraint in table.foreign_key_constraints
+        if len(constraint.columns) == 1
+    }
+
+    lines = [f"class {model.class_name}(Base):", f"    __tablename__ = {json.dumps(table.name)}"]
+    table_args = _render_table_args(table, single_fks, imports)
+    if table_args:
+        lines.append("    __table_args__ = (")
+        lines += [f"        {arg}," for arg in table_args]
+        lines.append("    )")
+    lines.append("")
+    lines += [f"    {_render_column(model, column, single_fks, imports)}" for column in table.columns]
+    if model.relationships:
+        imports.add("sqlalchemy.orm", "relationship")
+        lines.append("")
+        lines += [f"    {line}" for line in model.relationships]
+    return "\n".join(lines)
+
+
+def render_model_file(model):
+    """Source for app/models/<resource>.py."""
+    imports = _Imports()
+    body = render_class(model, imports)
+    return "\n".join(imports.lines() + ["", "from app.config.database import Base", "", "", body, ""])
+
+
+def render_models_module(models):
+    """Source for a single module holding every model."""
+    imports = _Imports()
+    bodies = [render_class(model, imports) for model in models]
+    return "\n".join(imports.lines() + ["", "from app.config.database import Base", "", "", "\n\n\n".join(bodies), ""])
+
+
+# Python types that need an import in generated schemas
+SCHEMA_TYPE_IMPORTS = {
+    "date": "datetime",
+    "datetime": "datetime",
+    "time": "datetime",
+    "timedelta": "datetime",
+    "Decimal": "decimal",
+    "UUID": "uuid",
+}
+
+
+def _python_type(column):
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return "Any"
+    return python_type.__name__
+
+
+def render_schema_file(model):
+    """Source for app/schemas/<resource>.py, typed from the reflected columns."""
+    imports = _Imports()
+    imports.add("pydantic", "BaseModel")
+    imports.add("pydantic", "ConfigDict")
+    imports.add("typing", "Optional")
+
+    base, update, keys = [], [], []
+    for column in model.table.columns:
+        python_type = _python_type(column)
+        if python_type in SCHEMA_TYPE_IMPORTS:
+            imports.add(SCHEMA_TYPE_IMPORTS[python_type], python_type)
+        elif python_type == "Any":
+            imports.add("typing", "Any")
+        attribute = model.attributes[column.name]
+        if column.primary_key:
+            keys.append(f"    {attribute}: {python_type}")
+            continue
+        required = not column.nullable and column.server_default is None
+        base.append(f"    {attribute}: {python_type}" if required else f"    {attribute}: Optional[{python_type}] = None")
+        update.append(f"    {attribute}: Optional[{python_type}] = None")
+
+    name = model.class_name
+    import_lines = imports.lines()
+    # Third-party after the standard library, like the hand-written schemas
+    import_lines.sort(key=lambda line: line.startswith("from pydantic"))
+    lines = import_lines + [
+        "",
+        f"class {name}Base(BaseModel):",
+        *(base or ["    pass"]),
+        "",
+        f"class {name}Create({name}Base):",
+        "    pass",
+        "",
+        f"class {name}Update(BaseModel):",
+        *(update or ["    pass"]),
+        "",
+        f"class {name}Response({name}Base):",
+        *keys,
+        "",
+        "    model_config = ConfigDict(from_attributes=True)",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+def describe_table(table):
+    """A JSON-able description of everything the generated files depend on."""
+    def columns(items):
+        return [column.name for column in items]
+
+    return {
+        "columns": [
+            {
+                "name": column.name,
+                "type": repr(column.type),
+                "nullable": column.nullable,
+                "primary_key": column.primary_key,
+                "default": str(getattr(column.server_default, "arg", "")) if column.server_default is not None else None,
+                "comment": column.comment,
+            }
+            for column in table.columns
+        ],
+        "indexes": sorted(
+            ({"name": index.name, "columns": columns(index.columns), "unique": bool(index.unique)} for index in table.indexes),
+            key=lambda index: index["name"] or "",
+        ),
+        "foreign_keys": sorted(
+            (
+                {
+                    "name": constraint.name,
+                    "columns": columns(constraint.columns),
+                    "references": [element.target_fullname for element in constraint.elements],
+                    "ondelete": constraint.ondelete,
+                    "onupdate": constraint.onupdate,
+                }
+                for constraint in table.foreign_key_constraints
+            ),
+            key=lambda fk: fk["columns"],
+        ),
+        "unique": sorted(
+            (
+                {"name": constraint.name, "columns": columns(constraint.columns)}
+                for constraint in table.constraints if isinstance(constraint, UniqueConstraint)
+            ),
+            key=lambda constraint: constraint["columns"],
+        ),
+        "checks": sorted(
+            str(constraint.sqltext) for constraint in table.constraints if isinstance(constraint, CheckConstraint)
+        ),
+    }
+
+
+def table_hash(description):
+    return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+
+def referenced_tables(description):
+    """Tables a described table points at through its foreign keys."""
+    return {reference.rsplit(".", 1)[0] for fk in description["foreign_keys"] for reference in fk["references"]}
+
+
+# One row per table: a hash of its columns, defaults, indexes, constraints and
+# comments, straight from the catalog. Lets a rerun skip reflecting tables that
+# did not change.
+POSTGRES_FINGERPRINTS = """
+SELECT c.relname, md5(concat_ws('|',
+    (SELECT string_agg(concat_ws(':', a.attname, format_type(a.atttypid, a.atttypmod), a.attnotnull,
+                                 pg_get_expr(d.adbin, d.adrelid), col_description(c.oid, a.attnum)), ',' ORDER BY a.attnum)
+       FROM pg_attribute a
+       LEFT JOIN pg_attrdef d ON d.adrelid = a.attrelid AND d.adnum = a.attnum
+      WHERE a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped),
+    (SELECT string_agg(pg_get_indexdef(i.indexrelid), ',' ORDER BY pg_get_indexdef(i.indexrelid))
+       FROM pg_index i WHERE i.indrelid = c.oid),
+    (SELECT string_agg(con.conname || ' ' || pg_get_constraintdef(con.oid), ',' ORDER BY con.conname)
+       FROM pg_constraint con WHERE con.conrelid = c.oid)
+))
+FROM pg_class c
+JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE c.relkind IN ('r', 'p') AND NOT c.relispartition AND n.nspname = current_schema()
+"""
+
+
+def fingerprints(engine):
+    """Catalog fingerprints per table, or None when the dialect has no cheap way to compute them."""
+    if engine.dialect.name != "postgresql":
+        return None
+    with engine.connect() as connection:
+        return dict(connection.execute(sqlalchemy.text(POSTGRES_FINGERPRINTS)).all())
+
+
+def plan_changes(engine, snapshot):
+    """
+    Compare the live database with a snapshot (see snapshot_tables) and reflect
+    only what a rerun needs. Returns a dict with:
+
+    - added, changed, dropped: table names
+    - affected: tables whose generated files must be rewritten; also includes
+      the other end of any foreign key into or out of a changed table, since
+      its relationship() lines change too
+    - metadata: reflection of the affected tables and their neighbours
+    - fingerprints: the live catalog fingerprints (None if unsupported)
+    """
+    previous = snapshot.get("tables", {})
+    live_names = set(sqlalchemy.inspect(engine).get_table_names()) - SKIP_TABLES
+    live_fingerprints = fingerprints(engine)
+
+    if live_fingerprints is None:
+        candidates = live_names
+    else:
+        candidates = {
+            name for name in live_names
+            if name not in previous or previous[name].get("fingerprint") != live_fingerprints.get(name)
+        }
+
+    metadata = reflect(engine, only=sorted(candidates)) if candidates else MetaData()
+    described = {name: describe_table(metadata.tables[name]) for name in candidates}
+
+    added = sorted(name for name in candidates if name not in previous)
+    changed = sorted(
+        name for name in candidates
+        if name in previous and previous[name]["hash"] != table_hash(described[name])
+    )
+    dropped = sorted(set(previous) - live_names)
+
+    # Foreign keys as they are now: the snapshot for untouched tables, live for reflected ones
+    current = {name: previous[name]["description"] for name in live_names & set(previous)}
+    current.update(described)
+
+    def children(names):
+        return {name for name, description in current.items() if referenced_tables(description) & set(names)}
+
+    touched = set(added) | set(changed)
+    affected = set(touched)
+    for name in touched:
+        affected |= referenced_tables(current[name]) & live_names
+    for name in set(changed) | set(dropped):
+        affected |= referenced_tables(previous[name]["description"]) & live_names
+    affected |= children(touched) & live_names
+
+    # A model's relationships need the tables it points at (reflected along with
+    # it) and the tables pointing at it
+    needed = affected | (children(affected) & live_names)
+    missing = sorted(needed - set(metadata.tables))
+    if missing:
+        metadata.reflect(bind=engine, only=missing)
+
+    return {
+        "added": added,
+        "changed": changed,
+        "dropped": dropped,
+        "affected": sorted(affected),
+        "metadata": metadata,
+        "fingerprints": live_fingerprints,
+        "descriptions": described,
+    }
+
+
+def diff_descriptions(old, new):
+    """Human-readable summary of what changed in a table."""
+    changes = []
+    old_columns = {column["name"]: column for column in old["columns"]}
+    new_columns = {column["name"]: column for column in new["columns"]}
+    changes += [f"+ column {name}" for name in new_columns if name not in old_columns]
+    changes += [f"- column {name}" for name in old_columns if name not in new_columns]
+    changes += [
+        f"~ column {name}" for name in new_columns
+        if name in old_columns and new_columns[name] != old_columns[name]
+    ]
+    for key, label in (("indexes", "index"), ("foreign_keys", "foreign key"), ("unique", "unique constraint"), ("checks", "check")):
+        old_items = [json.dumps(item, sort_keys=True) for item in old[key]]
+        new_items = [json.dumps(item, sort_keys=True) for item in new[key]]
+        added = len([item for item in new_items if item not in old_items])
+        removed = len([item for item in old_items if item not in new_items])
+        if added:
+            changes.append(f"+ {added} {label}(s)")
+        if removed:
+            changes.append(f"- {removed} {label}(s)")
+    return changes
+
+
+def snapshot_tables(metadata, live_fingerprints=None, tables=None):
+    """Snapshot entries for the reflected tables (or just `tables`)."""
+    entries = {}
+    for name, table in metadata.tables.items():
+        if name in SKIP_TABLES or (tables is not None and name not in tables):
+            continue
+        description = describe_table(table)
+        entries[name] = {
+            "hash": table_hash(description),
+            "fingerprint": (live_fingerprints or {}).get(name),
+            "description": description,
+        }
+    return entries
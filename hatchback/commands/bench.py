@@ -0,0 +1,140 @@
+import os
+import sys
+import json
+import shutil
+import subprocess
+from rich.table import Table
+from ..utils import console, get_venv_executable
+
+# Run settings that must match for two results to be comparable
+COMPARABLE_SETTINGS = ("dataset", "database", "concurrency")
+
+def handle_bench(args):
+    if not os.path.exists(os.path.join("benchmarks", "runner.py")):
+        console.print("[bold red]Error: benchmarks/runner.py not found. Are you in the project root?[/bold red]")
+        console.print("Projects created before benchmark support can get it with [bold]hatchback upgrade[/bold].")
+        return
+
+    python_cmd = get_venv_executable("python")
+    env = os.environ.copy()
+    env["PYTHONPATH"] = os.getcwd()
+
+    cmd = [
+        python_cmd, "-m", "benchmarks",
+        "--dataset", args.dataset,
+        "--requests", str(args.requests),
+        "--concurrency", str(args.concurrency),
+        "--warmup", str(args.warmup),
+        "--output", args.output,
+    ]
+    if args.db_url:
+        cmd.extend(["--db-url", args.db_url])
+        console.print("[yellow]Warning: the tables in the --db-url database are dropped and recreated.[/yellow]")
+    for pattern in args.scenario or []:
+        cmd.extend(["--scenario", pattern])
+
+    console.print(f"[bold green]Benchmarking with the '{args.dataset}' dataset "
+                  f"({args.requests} requests x {args.concurrency} clients per scenario)...[/bold green]")
+    try:
+        subprocess.run(cmd, check=True, env=env)
+    except subprocess.CalledProcessError:
+        console.print("[bold red]Error: benchmark run failed.[/bold red]")
+        sys.exit(1)
+    except Exception as e:
+        console.print(f"[bold red]Error running benchmarks:[/bold red] {e}")
+        sys.exit(1)
+
+    with open(args.output) as f:
+        results = json.load(f)
+
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        mismatched = [
+            key for key in COMPARABLE_SETTINGS
+            if baseline["meta"].get(key) != results["meta"].get(key)
+        ]
+        if mismatched:
+            console.print(f"[yellow]Baseline was recorded with different settings ({', '.join(mismatched)}); "
+                          f"not comparing.[/yellow]")
+            baseline = None
+
+    failures = _report(results, baseline, args)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        shutil.copyfile(args.output, args.baseline)
+        console.print(f"[bold green]Baseline saved to {args.baseline}[/bold green]")
+    elif baseline is None:
+        console.print("[dim]No baseline to compare against. Record one with 'hatchback bench --save-baseline'.[/dim]")
+
+    if failures:
+        console.print(f"\n[bold red]{len(failures)} problem(s):[/bold red]")
+        for failure in failures:
+            console.print(f"  [red]- {failure}[/red]")
+        sys.exit(1)
+
+
+def _report(results, baseline, args):
+    """Print the results table and return the list of regressions and errors."""
+    table = Table(title=f"Benchmark results ({results['meta']['dataset']} dataset, {results['meta']['database']})")
+    table.add_column("Scenario", style="cyan")
+    table.add_column("req/s", justify="right")
+    table.add_column("p50 ms", justify="right")
+    table.add_column("p95 ms", justify="right")
+    table.add_column("p99 ms", justify="right")
+    table.add_column("Errors", justify="right")
+    if baseline:
+        table.add_column("vs baseline", justify="right")
+
+    failures = []
+    for name, current in results["scenarios"].items():
+        row = [
+            name,
+            f"{current['throughput']:,.1f}",
+            f"{current['p50_ms']:.2f}",
+            f"{current['p95_ms']:.2f}",
+            f"{current['p99_ms']:.2f}",
+            f"[red]{current['errors']}[/red]" if current["errors"] else "0",
+        ]
+        if current["errors"]:
+            failures.append(f"{name}: {current['errors']} request(s) failed")
+
+        if baseline:
+            previous = baseline["scenarios"].get(name)
+            if previous is None:
+                row.append("[dim]new[/dim]")
+            else:
+                problems = _compare(current, previous, args)
+                failures.extend(f"{name}: {problem}" for problem in problems)
+                row.append(_format_delta(current, previous, bool(problems)))
+        table.add_row(*row)
+
+    console.print(table)
+    return failures
+
+
+def _compare(current, previous, args):
+    problems = []
+    if previous["p95_ms"] and args.latency_threshold is not None:
+        increase = (current["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"] * 100
+        if increase > args.latency_threshold:
+            problems.append(f"p95 latency up {increase:.1f}% "
+                            f"({previous['p95_ms']:.2f} -> {current['p95_ms']:.2f} ms, limit {args.latency_threshold}%)")
+    if previous["throughput"] and args.throughput_threshold is not None:
+        drop = (previous["throughput"] - current["throughput"]) / previous["throughput"] * 100
+        if drop > args.throughput_threshold:
+            problems.append(f"throughput down {drop:.1f}% "
+                            f"({previous['throughput']:,.1f} -> {current['throughput']:,.1f} req/s, limit {args.throughput_threshold}%)")
+    return problems
+
+
+def _format_delta(current, previous, regressed):
+    def change(key):
+        if not previous[key]:
+            return "n/a"
+        return f"{(current[key] - previous[key]) / previous[key] * 100:+.1f}%"
+
+    text = f"p95 {change('p95_ms')}, req/s {change('throughput')}"
+    return f"[bold red]{text}[/bold red]" if regressed else f"[green]{text}[/green]"
@@ -0,0 +1,315 @@
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import platform
+import tempfile
+import threading
+import subprocess
+from datetime import datetime
+from rich.table import Table
+from ..utils import console, format_size
+
+# One entry per (requirements, interpreter): a wheelhouse and a venv built from it
+ENTRY_FORMAT = 1
+_build_lock = threading.Lock()
+
+
+class CacheError(Exception):
+    pass
+
+
+def cache_dir():
+    """HATCHBACK_CACHE_DIR, or hatchback/ under the user cache directory."""
+    if os.environ.get("HATCHBACK_CACHE_DIR"):
+        return os.environ["HATCHBACK_CACHE_DIR"]
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "hatchback")
+
+
+def _envs_dir():
+    return os.path.join(cache_dir(), "envs")
+
+
+def _venv_bin(venv_dir):
+    return os.path.join(venv_dir, "Scripts" if os.name == "nt" else "bin")
+
+
+def _venv_python(venv_dir):
+    return os.path.join(_venv_bin(venv_dir), "python.exe" if os.name == "nt" else "python")
+
+
+def cache_key(requirements_path):
+    """
+    Key an entry by the requirements and the interpreter that will run them:
+    wheels and venvs are only reusable for the same Python build.
+    """
+    with open(requirements_path, "r") as f:
+        requirements = sorted(
+            line.strip() for line in f
+            if line.strip() and not line.strip().startswith("#")
+        )
+    digest = hashlib.sha256()
+    digest.update("\n".join(requirements).encode())
+    digest.update(f"{ENTRY_FORMAT}|{sys.version}|{sys.base_prefix}|{platform.machine()}".encode())
+    return digest.hexdigest()[:16]
+
+
+def _read_meta(entry_dir):
+    try:
+        with open(os.path.join(entry_dir, "meta.json"), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(entry_dir, meta):
+    # Written aside and renamed over the old one: a concurrent reader must never
+    # see a truncated file, or it would take a live entry for debris
+    fd, path = tempfile.mkstemp(prefix=".meta-", suffix=".json", dir=entry_dir)
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(path, os.path.join(entry_dir, "meta.json"))
+    except BaseException:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        raise
+
+
+def _run(cmd):
+    try:
+        subprocess.run(cmd, check=True, capture_output=True)
+    except subprocess.CalledProcessError as e:
+        output = (e.stderr or e.stdout or b"").decode(errors="replace").strip().splitlines()
+        raise CacheError(f"{' '.join(cmd)} failed" + (f": {output[-1]}" if output else "")) from e
+
+
+def ensure_entry(requirements_path):
+    """
+    Return the cache entry for these requirements, building it if needed.
+
+    Building downloads and builds every wheel into a wheelhouse and installs a
+    venv from it, offline. Entries are built in a temporary directory and
+    renamed into place, so a half-built entry is never used.
+    """
+    key = cache_key(requirements_path)
+    entry_dir = os.path.join(_envs_dir(), key)
+
+    with _build_lock:
+        if _read_meta(entry_dir) is None:
+            # A directory without meta.json is debris from an older, broken entry
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.makedirs(_envs_dir(), exist_ok=True)
+            build_dir = tempfile.mkdtemp(prefix=f".{key}-", dir=_envs_dir())
+            try:
+                wheels_dir = os.path.join(build_dir, "wheels")
+                venv_dir = os.path.join(build_dir, "venv")
+                shutil.copyfile(requirements_path, os.path.join(build_dir, "requirements.txt"))
+                _run([sys.executable, "-m", "venv", venv_dir])
+                python = _venv_python(venv_dir)
+                _run([python, "-m", "pip", "wheel", "-q", "-r", requirements_path, "-w", wheels_dir])
+                _run([python, "-m", "pip", "install", "-q", "--no-index", "--find-links", wheels_dir, "-r", requirements_path])
+                now = time.time()
+                _write_meta(build_dir, {
+                    "key": key,
+                    "format": ENTRY_FORMAT,
+                    "python": platform.python_version(),
+                    "interpreter": sys.base_prefix,
+                    # Console scripts keep this path in their shebang after the rename
+                    "build_venv": venv_dir,
+                    "created_at": now,
+                    "last_used": now,
+                })
+                try:
+                    os.rename(build_dir, entry_dir)
+                except OSError:
+                    # Another process finished the same entry first; use theirs
+                    shutil.rmtree(build_dir, ignore_errors=True)
+            except BaseException:
+                shutil.rmtree(build_dir, ignore_errors=True)
+                raise
+
+        meta = _read_meta(entry_dir)
+        if meta is None:
+            raise CacheError(f"cache entry {key} has no readable meta.json")
+        meta["last_used"] = time.time()
+        _write_meta(entry_dir, meta)
+    return entry_dir
+
+
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _clone_venv(cached_venv, build_venv, target_venv):
+    """
+    Create target_venv and fill it from the cached venv. Installed packages are
+    hardlinked (copied across filesystems); console scripts are rewritten to
+    point at the new interpreter. Safe because pip replaces files instead of
+    editing them in place.
+    """
+    _run([sys.executable, "-m", "venv", "--without-pip", target_venv])
+
+    for root, dirs, files in os.walk(os.path.join(cached_venv, "lib")):
+        rel_root = os.path.relpath(root, cached_venv)
+        os.makedirs(os.path.join(target_venv, rel_root), exist_ok=True)
+        for filename in files:
+            if filename.endswith(".pyc"):
+                continue
+            dst = os.path.join(target_venv, rel_root, filename)
+            if not os.path.exists(dst):
+                _link_or_copy(os.path.join(root, filename), dst)
+
+    cached_bin, target_bin = _venv_bin(cached_venv), _venv_bin(target_venv)
+    old_prefix, new_prefix = os.fsencode(build_venv), os.fsencode(target_venv)
+    for filename in os.listdir(cached_bin):
+        src, dst = os.path.join(cached_bin, filename), os.path.join(target_bin, filename)
+        if os.path.exists(dst) or os.path.islink(src) or not os.path.isfile(src):
+            continue
+        with open(src, "rb") as f:
+            content = f.read()
+        if content.startswith(b"#!"):
+            content = content.replace(old_prefix, new_prefix)
+        with open(dst, "wb") as f:
+            f.write(content)
+        shutil.copymode(src, dst)
+
+
+def install_from_cache(requirements_path, venv_dir):
+    """
+    Provision venv_dir from the wheel cache, building the cache entry on first
+    use. After that no network access is needed. Returns the entry key.
+    """
+    entry_dir = ensure_entry(requirements_path)
+    meta = _read_meta(entry_dir)
+    if meta is None:
+        # Removed by `hatchback cache prune` in the meantime
+        raise CacheError(f"cache entry {os.path.basename(entry_dir)} disappeared")
+    cached_venv = os.path.join(entry_dir, "venv")
+
+    if os.name != "nt":
+        try:
+            _clone_venv(cached_venv, meta["build_venv"], venv_dir)
+            return meta["key"]
+        except (OSError, CacheError):
+            shutil.rmtree(venv_dir, ignore_errors=True)
+
+    # Windows launchers embed the interpreter path, so install offline instead
+    _run([sys.executable, "-m", "venv", venv_dir])
+    _run([_venv_python(venv_dir), "-m", "pip", "install", "-q", "--no-index",
+          "--find-links", os.path.join(entry_dir, "wheels"), "-r", requirements_path])
+    return meta["key"]
+
+
+def _entries():
+    if not os.path.isdir(_envs_dir()):
+        return []
+    entries = []
+    for name in sorted(os.listdir(_envs_dir())):
+        entry_dir = os.path.join(_envs_dir(), name)
+        meta = _read_meta(entry_dir)
+        if meta is not None:
+            entries.append((entry_dir, meta))
+    return entries
+
+
+def _dir_size(path):
+    total = 0
+    seen = set()
+    for root, dirs, files in os.walk(path):
+        for filename in files:
+            stat = os.lstat(os.path.join(root, filename))
+            if (stat.st_dev, stat.st_ino) not in seen:
+                seen.add((stat.st_dev, stat.st_ino))
+                total += stat.st_size
+    return total
+
+
+def _template_requirements():
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(package_dir, "template", "requirements.txt")
+
+
+def handle_cache(args):
+    if args.action == "path":
+        console.print(cache_dir())
+    elif args.action == "list":
+        _list_entries()
+    elif args.action == "warm":
+        _warm(args.requirements or _template_requirements())
+    elif args.action == "prune":
+        _prune(args)
+
+
+def _list_entries():
+    entries = _entries()
+    if not entries:
+        console.print(f"[dim]The cache at {cache_dir()} is empty. Fill it with 'hatchback cache warm'.[/dim]")
+        return
+
+    current = cache_key(_template_requirements())
+    table = Table(title=f"Hatchback cache ({cache_dir()})")
+    table.add_column("Key", style="cyan")
+    table.add_column("Python")
+    table.add_column("Created")
+    table.add_column("Last used")
+    table.add_column("Size", justify="right")
+    for entry_dir, meta in entries:
+        key = meta["key"] + (" [green](current)[/green]" if meta["key"] == current else "")
+        table.add_row(
+            key,
+            meta["python"],
+            datetime.fromtimestamp(meta["created_at"]).strftime("%Y-%m-%d %H:%M"),
+            datetime.fromtimestamp(meta["last_used"]).strftime("%Y-%m-%d %H:%M"),
+            format_size(_dir_size(entry_dir)),
+        )
+    console.print(table)
+
+
+def _warm(requirements_path):
+    if not os.path.exists(requirements_path):
+        console.print(f"[bold red]Error: {requirements_path} not found.[/bold red]")
+        return
+    try:
+        with console.status("[bold green]Building wheelhouse and environment...[/bold green]", spinner="dots"):
+            entry_dir = ensure_entry(requirements_path)
+    except CacheError as e:
+        console.print(f"[bold red]Error warming the cache:[/bold red] {e}")
+        sys.exit(1)
+    console.print(f"[bold green]✓ Cache ready:[/bold green] {entry_dir}")
+    console.print("[dim]New projects now install from it, offline.[/dim]")
+
+
+def _prune(args):
+    """Remove all entries with --all; otherwise stale ones (not current, or unused for --older-than days)."""
+    current = cache_key(_template_requirements())
+    cutoff = time.time() - args.older_than * 86400 if args.older_than is not None else None
+
+    removed = 0
+    freed = 0
+    for entry_dir, meta in _entries():
+        stale = meta["key"] != current or (cutoff is not None and meta["last_used"] < cutoff)
+        if args.all or stale:
+            freed += _dir_size(entry_dir)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            removed += 1
+            console.print(f"[red]Removed {meta['key']}[/red]")
+
+    # Leftovers from interrupted builds
+    if os.path.isdir(_envs_dir()):
+        for name in os.listdir(_envs_dir()):
+            if name.startswith("."):
+                shutil.rmtree(os.path.join(_envs_dir(), name), ignore_errors=True)
+
+    console.print(f"[bold green]Pruned {removed} entr{'y' if removed == 1 else 'ies'}, freed {format_size(freed)}.[/bold green]")
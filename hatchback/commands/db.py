@@ -0,0 +1,117 @@
+import os
+import sys
+
+from rich.markup import escape
+from rich.table import Table
+
+from ..utils import console, format_size
+from .migrate import _run_migration_tool
+
+ADVICE_STYLES = {"missing": "bold green", "redundant": "yellow", "unused": "dim"}
+
+
+def _advise(args):
+    """Propose index changes from live plans and index statistics, as a migration to review."""
+    cmd = ["advise", "--top", str(args.top)]
+    if args.log:
+        cmd += ["--log", os.path.abspath(args.log)]
+    if args.drop_unused:
+        cmd.append("--drop-unused")
+    if args.dry_run:
+        cmd.append("--dry-run")
+    with console.status("Planning query shapes and reading index statistics...", spinner="dots"):
+        summary = _run_migration_tool(cmd)
+    if summary is None:
+        sys.exit(1)
+
+    console.print(f"[dim]Planned {summary['queries']} query shape(s) from {escape(summary['source'])}; "
+                  f"index usage counted since {summary['since'][:16].replace('T', ' ')}.[/dim]")
+    for note in summary["notes"]:
+        console.print(f"[yellow]{escape(note)}[/yellow]")
+    for error in summary["errors"]:
+        console.print(f"[yellow]Could not plan {escape(error)}[/yellow]")
+
+    if not summary["advice"]:
+        console.print("[bold green]No index changes to suggest.[/bold green]")
+        return
+
+    table = Table(title="Index advice")
+    table.add_column("Change")
+    table.add_column("Table", style="cyan")
+    table.add_column("Index")
+    table.add_column("Columns")
+    table.add_column("Size", justify="right")
+    table.add_column("Why")
+    for advice in summary["advice"]:
+        style = ADVICE_STYLES[advice["kind"]]
+        action = {"missing": "create", "redundant": "drop"}.get(advice["kind"], "drop?" if not advice["applied"] else "drop")
+        why = escape(advice["reason"])
+        if advice["kind"] == "missing":
+            why += f"\n[dim]{len(advice['evidence'])} query shape(s)[/dim]"
+        table.add_row(
+            f"[{style}]{action}[/{style}]",
+            advice["table"],
+            advice["index"],
+            ", ".join(advice["columns"]),
+            format_size(advice["size"]) if advice["size"] else "-",
+            why,
+        )
+    console.print(table)
+
+    if not summary["migration"]:
+        if not args.dry_run:
+            console.print("[dim]Nothing to apply; rerun with --drop-unused to drop the unused indexes.[/dim]")
+        return
+
+    console.print(f"[bold green]✓ Wrote {os.path.relpath(summary['migration'])}[/bold green] "
+                  "[dim](review the evidence in it, then 'hatchback migrate apply')[/dim]")
+    changes = [advice["model_change"] for advice in summary["advice"] if advice["model_change"] and advice["applied"]]
+    if changes:
+        console.print("[bold]Update the models to match, or the next autogenerate will undo it:[/bold]")
+        for change in changes:
+            console.print(f"  - {escape(change)}")
+
+
+def _split_tenant(args):
+    """Move one tenant's rows out of the shared hash partitions into partitions of its own, as a migration."""
+    if not args.tenant:
+        console.print("[bold red]Error: give the tenant's id or subdomain, e.g. hatchback db split-tenant acme[/bold red]")
+        sys.exit(1)
+    cmd = ["split-tenant", args.tenant]
+    for table in args.table or []:
+        cmd += ["--table", table]
+    if args.dry_run:
+        cmd.append("--dry-run")
+    with console.status("Locating the tenant's partitions...", spinner="dots"):
+        summary = _run_migration_tool(cmd)
+    if summary is None:
+        sys.exit(1)
+
+    tenant = summary["tenant"]
+    for note in summary["notes"]:
+        console.print(f"[dim]{escape(note)}[/dim]")
+    if not summary["splits"]:
+        console.print(f"[bold green]{escape(tenant['subdomain'])} already has its own partitions.[/bold green]")
+        return
+
+    table = Table(title=f"Split tenant {escape(tenant['subdomain'])} ({tenant['id']})")
+    table.add_column("Table", style="cyan")
+    table.add_column("From")
+    table.add_column("Size", justify="right")
+    table.add_column("Rows moved", justify="right")
+    table.add_column("To", style="bold green")
+    table.add_column("Others stay in")
+    for split in summary["splits"]:
+        table.add_row(split["table"], split["partition"], split["size"], f"~{split['rows']:,}", split["target"], split["shared"])
+    console.print(table)
+
+    if summary["migration"]:
+        console.print(f"[bold green]✓ Wrote {os.path.relpath(summary['migration'])}[/bold green] "
+                      "[dim](it locks each table while the rows are copied; apply it when traffic is low)[/dim]")
+
+
+def handle_db(args):
+    if args.action == "advise":
+        _advise(args)
+    elif args.action == "split-tenant":
+        _split_tenant(args)
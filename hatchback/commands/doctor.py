@@ -0,0 +1,54 @@
+import os
+import sys
+from collections import Counter
+
+from rich.markup import escape
+
+from ..perf_lint import RULES, lint
+from ..utils import console
+
+
+def _codes(value):
+    codes = {code.strip().upper() for code in value.split(",") if code.strip()}
+    unknown = codes - set(RULES)
+    if unknown:
+        raise ValueError(f"unknown rule(s) {', '.join(sorted(unknown))}; rules are {', '.join(RULES)}")
+    return codes
+
+
+def handle_doctor(args):
+    """
+    Report performance foot-guns in the project's source, as file:line findings.
+    Exits with status 1 when there are findings, so it can gate CI.
+    """
+    if not os.path.exists("app"):
+        console.print("[bold red]Error: 'app' directory not found. Are you in the project root?[/bold red]")
+        sys.exit(1)
+
+    try:
+        select = _codes(args.select) if args.select else set(RULES)
+        select -= _codes(args.ignore) if args.ignore else set()
+    except ValueError as e:
+        console.print(f"[bold red]Error: {e}[/bold red]")
+        sys.exit(1)
+
+    findings, errors = lint(paths=args.paths or ["app"], select=select)
+    for error in errors:
+        console.print(f"[yellow]Skipped {escape(error)}[/yellow]")
+
+    for finding in findings:
+        console.print(
+            f"[cyan]{finding.path}:{finding.line}:{finding.column}[/cyan] [bold red]{finding.rule}[/bold red] {escape(finding.message)}",
+            soft_wrap=True, highlight=False,
+        )
+
+    if not findings:
+        console.print("[bold green]No performance issues found.[/bold green]")
+        return
+
+    counts = Counter(finding.rule for finding in findings)
+    console.print(f"\n[bold]{len(findings)} finding(s)[/bold]")
+    for rule, count in sorted(counts.items()):
+        console.print(f"  {rule}  {count:>3}  {RULES[rule]}")
+    console.print("[dim]Silence a line with '# noqa: HBK00N' once you have checked it.[/dim]")
+    sys.exit(1)
@@ -3,12 +3,90 @@ import shutil
 import sys
 import subprocess
 import secrets
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from rich.prompt import Prompt, Confirm
 from rich.panel import Panel
+from rich.table import Table
 from rich.text import Text
-from ..utils import console, play_intro
+from ..utils import console, load_manifest, play_intro
+from .cache import CacheError, install_from_cache
+from .make import resource_specs, scaffold_resources
+
+# __file__ is .../hatchback/commands/init.py, the template lives in .../hatchback/template
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATE_DIR = os.path.join(PACKAGE_DIR, "template")
+DOCKER_FILES = ["Dockerfile", "docker-compose.yml", ".dockerignore"]
+
+
+def copy_template(target_dir, db_name, include_docker):
+    """Copy the project template into target_dir and write its .env."""
+    shutil.copytree(TEMPLATE_DIR, target_dir, dirs_exist_ok=True)
+    if not include_docker:
+        for f in DOCKER_FILES:
+            f_path = os.path.join(target_dir, f)
+            if os.path.exists(f_path):
+                os.remove(f_path)
+
+    # Create .env file with chosen DB name and generated secret key
+    env_example_path = os.path.join(target_dir, ".env.example")
+    env_path = os.path.join(target_dir, ".env")
+    if os.path.exists(env_example_path):
+        with open(env_example_path, "r") as f:
+            env_content = f.read()
+
+        # Replace default DB name if it exists, or append it
+        if "DATABASE_NAME=" in env_content:
+            env_content = env_content.replace("DATABASE_NAME=boilerplate_db", f"DATABASE_NAME={db_name}")
+        else:
+            env_content += f"\nDATABASE_NAME={db_name}\n"
+
+        # Append a generated SECRET_KEY; it overrides the placeholder from .env.example
+        env_content += f"\nSECRET_KEY={secrets.token_urlsafe(32)}\n"
+
+        with open(env_path, "w") as f:
+            f.write(env_content)
+
+
+def create_venv(target_dir, use_uv):
+    venv_dir = os.path.join(target_dir, "venv")
+    if use_uv:
+        subprocess.run(["uv", "venv", venv_dir], check=True, capture_output=True)
+    else:
+        subprocess.run([sys.executable, "-m", "venv", venv_dir], check=True, capture_output=True)
+
+
+def install_requirements(target_dir, use_uv):
+    venv_dir = os.path.join(target_dir, "venv")
+    requirements = os.path.join(target_dir, "requirements.txt")
+    if use_uv:
+        venv_python = os.path.join(venv_dir, "Scripts", "python.exe") if os.name == 'nt' else os.path.join(venv_dir, "bin", "python")
+        subprocess.run(["uv", "pip", "install", "-p", venv_python, "-r", requirements], check=True, capture_output=True)
+    else:
+        pip_exe = os.path.join(venv_dir, "Scripts", "pip") if os.name == 'nt' else os.path.join(venv_dir, "bin", "pip")
+        subprocess.run([pip_exe, "install", "-r", requirements], check=True, capture_output=True)
+
+
+def install_with_cache(target_dir, name=None):
+    """
+    Create the venv from the local wheel cache (see `hatchback cache`). Returns
+    False when the cache cannot be used, so the caller installs normally.
+    """
+    venv_dir = os.path.join(target_dir, "venv")
+    try:
+        install_from_cache(os.path.join(target_dir, "requirements.txt"), venv_dir)
+        return True
+    except (CacheError, OSError) as e:
+        prefix = f"{name}: " if name else ""
+        console.print(f"[yellow]{prefix}Wheel cache unavailable ({e}). Installing without it.[/yellow]")
+        shutil.rmtree(venv_dir, ignore_errors=True)
+        return False
+
 
 def handle_init(args):
+    if getattr(args, "from_manifest", None):
+        init_from_manifest(args.from_manifest, jobs=args.jobs)
+        return
+
     play_intro()
     console.print(Panel(
         "Welcome to Hatchback!\n\n"
@@ -37,78 +115,36 @@ def handle_init(args):
 
     should_include_docker = args.docker if args.docker or args.no_docker else Confirm.ask("[bold green]Include Docker files?[/bold green]", default=True)
 
-    # Adjust package_dir to point to the parent of 'commands' (i.e., hatchback)
-    # __file__ is .../hatchback/commands/init.py
-    # os.path.dirname(__file__) is .../hatchback/commands
-    # os.path.dirname(...) is .../hatchback
-    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    template_dir = os.path.join(package_dir, "template")
     target_dir = os.path.join(os.getcwd(), project_name) if project_name else os.getcwd()
     
     console.print(f"\n🚗 Revving up your new FastAPI + Postgres backend in [bold yellow]{target_dir}[/bold yellow]...")
     
     try:
         with console.status("[bold green]Configuring FastAPI structure...[/bold green]", spinner="dots"):
-            shutil.copytree(template_dir, target_dir, dirs_exist_ok=True)
-            if not should_include_docker:
-                for f in ["Dockerfile", "docker-compose.yml", ".dockerignore"]:
-                    f_path = os.path.join(target_dir, f)
-                    if os.path.exists(f_path):
-                        os.remove(f_path)
-            
-            # Create .env file with chosen DB name and generated secret key
-            env_example_path = os.path.join(target_dir, ".env.example")
-            env_path = os.path.join(target_dir, ".env")
-            if os.path.exists(env_example_path):
-                with open(env_example_path, "r") as f:
-                    env_content = f.read()
-                
-                # Replace default DB name if it exists, or append it
-                if "DATABASE_NAME=" in env_content:
-                    env_content = env_content.replace("DATABASE_NAME=boilerplate_db", f"DATABASE_NAME={db_name}")
-                else:
-                    env_content += f"\nDATABASE_NAME={db_name}\n"
-                
-                # Generate and set SECRET_KEY
-                secret_key = secrets.token_urlsafe(32)
-                if "SECRET_KEY=" in env_content:
-                    # Replace existing placeholder if any, though .env.example usually has it empty or default
-                    # We'll just append if it's not clearly replaceable, but let's assume we append or replace
-                    # For now, let's just append it if it's not there, or replace the line if we can find a pattern
-                    # But simpler: just append it if not present, or replace the specific default line
-                    pass 
-                
-                # Actually, let's just append it to ensure it's set
-                env_content += f"\nSECRET_KEY={secret_key}\n"
-
-                with open(env_path, "w") as f:
-                    f.write(env_content)
-        
+            copy_template(target_dir, db_name, should_include_docker)
+
         console.print("[bold green]✅ Configuring FastAPI structure...[/bold green]")
         if should_include_docker:
              console.print("[bold green]✅ Configuring Docker Compose services...[/bold green]")
         console.print("[bold green]✅ Configuring Alembic migrations environment...[/bold green]")
 
-        if should_install:
-            venv_dir = os.path.join(target_dir, "venv")
-            
-            if use_uv:
-                with console.status("[bold green]Creating virtual environment with uv...[/bold green]", spinner="dots"):
-                    subprocess.run(["uv", "venv", venv_dir], check=True, capture_output=True)
-            else:
-                with console.status("[bold green]Creating virtual environment...[/bold green]", spinner="dots"):
-                    subprocess.run([sys.executable, "-m", "venv", venv_dir], check=True)
+        installed_from_cache = False
+        if should_install and not args.no_cache:
+            with console.status("[bold green]Installing requirements from the wheel cache...[/bold green]", spinner="dots"):
+                installed_from_cache = install_with_cache(target_dir)
+            if installed_from_cache:
+                console.print("[bold green]✓ Virtual environment created from the wheel cache.[/bold green]")
+
+        if should_install and not installed_from_cache:
+            status = "Creating virtual environment with uv..." if use_uv else "Creating virtual environment..."
+            with console.status(f"[bold green]{status}[/bold green]", spinner="dots"):
+                create_venv(target_dir, use_uv)
             console.print("[bold green]✓ Virtual environment created.[/bold green]")
-            
+
             with console.status("[bold green]Installing requirements...[/bold green]", spinner="dots"):
-                if use_uv:
-                    venv_python = os.path.join(venv_dir, "Scripts", "python.exe") if os.name == 'nt' else os.path.join(venv_dir, "bin", "python")
-                    subprocess.run(["uv", "pip", "install", "-p", venv_python, "-r", os.path.join(target_dir, "requirements.txt")], check=True, capture_output=True)
-                else:
-                    pip_exe = os.path.join(venv_dir, "Scripts", "pip") if os.name == 'nt' else os.path.join(venv_dir, "bin", "pip")
-                    subprocess.run([pip_exe, "install", "-r", os.path.join(target_dir, "requirements.txt")], check=True, capture_output=True)
+                install_requirements(target_dir, use_uv)
             console.print("[bold green]✓ Dependencies installed.[/bold green]")
-        
+
         db_started = False
         if should_include_docker:
             if Confirm.ask("[bold green]Start database container now?[/bold green]", default=True):
@@ -130,12 +166,17 @@ def handle_init(args):
         console.print("  [green]init[/green]      Initialize a new project")
         console.print("  [green]run[/green]       Run the development server")
         console.print("  [green]migrate[/green]   Manage database migrations")
+        console.print("  [green]db[/green]        Index advice and tenant partitions on the live database")
         console.print("  [green]make[/green]      Scaffold a new resource")
         console.print("  [green]remove[/green]    Remove a scaffolded resource")
         console.print("  [green]seed[/green]      Seed the database with initial data")
         console.print("  [green]inspect[/green]   Inspect existing DB and scaffold")
         console.print("  [green]upgrade[/green]   Sync latest skills and infra files")
         console.print("  [green]test[/green]      Run the test suite")
+        console.print("  [green]doctor[/green]    Find performance foot-guns in the code")
+        console.print("  [green]profile[/green]   Profile a request (flame graph)")
+        console.print("  [green]bench[/green]     Benchmark endpoints against a baseline")
+        console.print("  [green]cache[/green]     Manage the local wheel cache")
         console.print("\nRun 'hatchback --help' for more information.")
         
         next_steps = Text()
@@ -163,3 +204,134 @@ def handle_init(args):
     except Exception as e:
         console.print(f"[bold red]Error initializing project:[/bold red] {e}")
         sys.exit(1)
+
+
+# Keys a project entry in an init manifest may set
+MANIFEST_KEYS = {"name", "path", "db", "docker", "install", "use_uv", "cache", "resources"}
+
+
+def _project_specs(manifest):
+    """
+    Normalize a manifest into a list of project specs. A manifest is either a
+    single project, a list of projects, or a mapping with `projects` and
+    optional `defaults` applied to every project.
+    """
+    if isinstance(manifest, list):
+        defaults, projects = {}, manifest
+    elif isinstance(manifest, dict) and "projects" in manifest:
+        defaults, projects = manifest.get("defaults") or {}, manifest["projects"] or []
+    elif isinstance(manifest, dict):
+        defaults, projects = {}, [manifest]
+    else:
+        raise ValueError("manifest must be a project, a list of projects or a mapping with 'projects'")
+
+    specs = []
+    seen_paths = set()
+    for index, project in enumerate(projects, start=1):
+        if isinstance(project, str):
+            project = {"name": project}
+        spec = {**defaults, **project}
+
+        unknown = set(spec) - MANIFEST_KEYS
+        if unknown:
+            raise ValueError(f"project #{index}: unknown key(s) {', '.join(sorted(unknown))}")
+        if not spec.get("name"):
+            raise ValueError(f"project #{index} has no name")
+
+        spec.setdefault("path", spec["name"])
+        spec.setdefault("db", f"{spec['name']}_db")
+        spec.setdefault("docker", True)
+        spec.setdefault("install", True)
+        spec.setdefault("cache", True)
+        # A list of names, or a mapping of resource definitions like `hatchback make --spec`
+        spec["resources"] = resource_specs(spec.get("resources") or [])
+
+        target_dir = os.path.abspath(spec["path"])
+        if target_dir in seen_paths:
+            raise ValueError(f"project #{index}: path '{spec['path']}' is used by another project")
+        seen_paths.add(target_dir)
+        specs.append(spec)
+    return specs
+
+
+def create_project(spec):
+    """Generate one project from a manifest spec without prompts. Returns its directory."""
+    name = spec["name"]
+    target_dir = os.path.abspath(spec["path"])
+    if os.path.isdir(target_dir) and os.listdir(target_dir):
+        raise FileExistsError(f"{target_dir} already exists and is not empty")
+
+    copy_template(target_dir, spec["db"], spec["docker"])
+    scaffold_resources(spec["resources"], base_dir=target_dir, quiet=True)
+    resources = [resource["name"] for resource in spec["resources"]]
+    console.print(f"[green]✓[/green] [bold]{name}[/bold] generated"
+                  + (f" with {', '.join(resources)}" if resources else ""))
+
+    if spec["install"] and spec["cache"] and install_with_cache(target_dir, name):
+        console.print(f"[green]✓[/green] [bold]{name}[/bold] dependencies installed from the wheel cache")
+    elif spec["install"]:
+        uv_available = shutil.which("uv") is not None
+        use_uv = spec.get("use_uv", uv_available)
+        if use_uv and not uv_available:
+            console.print(f"[yellow]{name}: 'uv' not found, falling back to pip.[/yellow]")
+            use_uv = False
+        create_venv(target_dir, use_uv)
+        install_requirements(target_dir, use_uv)
+        console.print(f"[green]✓[/green] [bold]{name}[/bold] dependencies installed")
+
+    return target_dir
+
+
+def init_from_manifest(manifest_path, jobs=None):
+    """
+    Generate every project described in a manifest. Projects, including their
+    dependency installs, are built in parallel; there is no intro or prompt.
+    """
+    try:
+        specs = _project_specs(load_manifest(manifest_path))
+    except FileNotFoundError:
+        console.print(f"[bold red]Error: manifest '{manifest_path}' not found.[/bold red]")
+        sys.exit(1)
+    except ImportError:
+        console.print("[bold red]Error: YAML manifests need PyYAML (pip install pyyaml), or use a JSON manifest.[/bold red]")
+        sys.exit(1)
+    except Exception as e:
+        console.print(f"[bold red]Error: invalid manifest '{manifest_path}':[/bold red] {e}")
+        sys.exit(1)
+
+    if not specs:
+        console.print("[yellow]The manifest describes no projects. Nothing to do.[/yellow]")
+        return
+
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(specs)))
+    console.print(f"🚗 Generating [bold]{len(specs)}[/bold] project(s) from [bold yellow]{manifest_path}[/bold yellow] "
+                  f"({jobs} in parallel)...")
+
+    # Keyed by position: projects may share a name as long as their paths differ
+    results = {}
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(create_project, spec): index for index, spec in enumerate(specs)}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                results[index] = (True, future.result())
+            except subprocess.CalledProcessError as e:
+                output = (e.stderr or e.stdout or b"").decode(errors="replace").strip().splitlines()
+                results[index] = (False, f"{' '.join(map(str, e.cmd))} failed" + (f": {output[-1]}" if output else ""))
+            except Exception as e:
+                results[index] = (False, str(e))
+
+    table = Table(title="Projects")
+    table.add_column("Project", style="cyan")
+    table.add_column("Status")
+    table.add_column("Location / error")
+    for index, spec in enumerate(specs):
+        ok, detail = results[index]
+        table.add_row(spec["name"], "[green]created[/green]" if ok else "[red]failed[/red]", detail)
+    console.print(table)
+
+    failed = [index for index, (ok, _) in results.items() if not ok]
+    if failed:
+        console.print(f"[bold red]{len(failed)} of {len(specs)} project(s) failed.[/bold red]")
+        sys.exit(1)
+    console.print("[bold green]✨ All projects generated.[/bold green] Next: cd into a project and run 'hatchback migrate create -m \"init\"'.")
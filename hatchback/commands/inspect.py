@@ -1,20 +1,47 @@
 import os
-import subprocess
-import sys
-import re
+import json
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from rich.panel import Panel
+from rich.progress import Progress
 from rich.prompt import Prompt, Confirm
-from ..utils import console, to_pascal_case
-import shutil
-from sqlalchemy import create_engine, inspect
-from .make import scaffold_resource
+from rich.table import Table
+from ..utils import console
+from sqlalchemy import CheckConstraint, Enum, create_engine
+from ..codegen import (
+    build_models, diff_descriptions, fingerprints, plan_changes, reflect, render_model_file,
+    render_models_module, render_schema_file, singularize, snapshot_tables,
+)
+from .make import BUILTIN_COLUMNS, IDENTIFIER, resource_specs, scaffold_resources
+from .remove import remove_resource
+
+SNAPSHOT_PATH = os.path.join(".hatchback", "schema_snapshot.json")
+SNAPSHOT_VERSION = 1
+
+# Python type of a reflected column -> the spec field type whose sample values
+# the scaffolded tests and benchmark scenarios put in their payloads
+SPEC_TYPES = {
+    "int": "integer",
+    "float": "float",
+    "Decimal": "decimal",
+    "bool": "boolean",
+    "date": "date",
+    "datetime": "datetime",
+    "UUID": "uuid",
+    "dict": "json",
+}
 
 def handle_inspect(args):
     """
-    Inspect an existing database and generate SQLAlchemy models.
+    Inspect an existing database and generate SQLAlchemy models. The schema is
+    reflected once and the models are generated in-process.
     """
     console.print(Panel("Database Inspector", style="bold blue"))
 
+    if args.dry_run and not args.scaffold:
+        console.print("[bold red]Error: --dry-run only applies to --scaffold.[/bold red]")
+        return
+
     # Try to load .env to get default DB connection if not provided
     db_url = args.url
     if not db_url:
@@ -37,261 +64,219 @@ def handle_inspect(args):
 
         db_url = Prompt.ask("[bold green]Enter Database URL[/bold green]", default=default_url)
 
-    if args.scaffold:
-        # Full automatic scaffold mode
-        try:
-            engine = create_engine(db_url)
-            console.print(f"[bold green]Connecting to {db_url}...[/bold green]")
-            inspector = inspect(engine)
-            tables = inspector.get_table_names()
-            
-            console.print(f"[bold green]Found {len(tables)} tables: {', '.join(tables)}[/bold green]")
-            
-            if not Confirm.ask("Do you want to scaffold all these tables?"):
+    try:
+        engine = create_engine(db_url)
+    except Exception as e:
+        console.print(f"[bold red]Error: invalid database URL: {e}[/bold red]")
+        return
+
+    try:
+        if args.scaffold:
+            snapshot = None if args.full else _load_snapshot(engine.dialect.name)
+            if snapshot is not None:
+                _scaffold_incremental(engine, snapshot, args.dry_run)
                 return
 
-            # Create mapping for singularization
-            # table_name -> SingularClassName
-            table_to_class = {}
-            for t in tables:
-                if t == "alembic_version": continue
-                res_name = t[:-1] if t.endswith('s') else t
-                table_to_class[t] = to_pascal_case(res_name)
-
-            for table in tables:
-                if table == "alembic_version": continue
-                
-                # Simple singularization: remove 's' at end if present
-                resource = table[:-1] if table.endswith('s') else table
-                TargetClass = to_pascal_case(resource)
-                
-                console.print(f"\nProcessing table [cyan]{table}[/cyan] -> resource [green]{resource}[/green] (Class: {TargetClass})")
-                
-                # 1. Scaffold files (Service, Repo, Route, etc.)
-                # This creates app/models/resource.py too, but we will overwrite it
-                scaffold_resource(resource)
-                
-                # 2. Overwrite model with sqlacodegen for just this table
-                model_path = os.path.join(os.getcwd(), f"app/models/{resource}.py")
-                
-                # We use --nobase if available, or just handle stripping
-                # sqlacodegen doesn't have --nobase by default in all versions.
-                # using subprocess to run it
-                cmd = [
-                    "sqlacodegen",
-                    db_url,
-                    "--tables", table,
-                    "--outfile", model_path
-                ]
-                
-                # Fallback mechanism for running sqlacodegen
-                if not shutil.which("sqlacodegen"):
-                    cmd = [sys.executable, "-m", "sqlacodegen", db_url, "--tables", table, "--outfile", model_path]
-
-                try:
-                    subprocess.run(cmd, check=True, capture_output=True)
-                    console.print(f"  [green]Generated model from DB for {table}[/green]")
-                except subprocess.CalledProcessError as e:
-                    console.print(f"  [red]Failed to generate model for {table}: {e}[/red]")
-                    continue
-
-                # 3. Post-process model file to fix Base and imports
-                try:
-                    with open(model_path, 'r') as f:
-                        content = f.read()
-
-                    lines = content.splitlines()
-                    
-                    # Separate imports and class logic
-                    raw_imports = []
-                    class_lines = []
-                    
-                    is_processing_class = False
-                    is_target_class = False
-                    current_class_buffer = []
-                    
-                    for line in lines:
-                        stripped = line.strip()
-                        
-                        # Collect imports
-                        if line.startswith("import ") or line.startswith("from "):
-                            if "declarative_base" in line or "Base =" in line:
-                                continue 
-                            if "create_engine" in line or "engine =" in line:
-                                continue
-                            if "app.config.database" in line: # Avoid duplicating if somehow present
-                                continue
-                            raw_imports.append(line)
-                            continue
-
-                        # Detect Class Start
-                        if line.startswith("class "):
-                            # If we were processing a class, and it was the target, save it
-                            if current_class_buffer and is_target_class:
-                                class_lines.extend(current_class_buffer)
-                                # Only one class per file in this architecture
-                                pass
-
-                            # Start new buffer
-                            current_class_buffer = [line]
-                            is_processing_class = True
-                            is_target_class = False # Reset
-                            
-                            if "class Base" in line:
-                                is_processing_class = False
-                                current_class_buffer = []
-
-                        elif is_processing_class:
-                           current_class_buffer.append(line)
-                           if "__tablename__ =" in line:
-                                extracted = line.split("=")[1].strip().strip("'").strip('"')
-                                if extracted == table:
-                                    is_target_class = True
-                    
-                    # Flush last buffer
-                    if current_class_buffer and is_target_class:
-                        class_lines.extend(current_class_buffer)
-
-                    # Optimize Imports
-                    class_content = "\n".join(class_lines)
-                    final_imports = ["from app.config.database import Base"]
-                    
-                    for imp in raw_imports:
-                        # Simple unused import removal
-                        # Case 1: from X import A, B, C
-                        if "import " in imp and "from " in imp:
-                            parts = imp.split(" import ")
-                            module_part = parts[0]
-                            names_part = parts[1]
-                            
-                            # remove comments if any
-                            names_part = names_part.split("#")[0].strip()
-                            
-                            # parse names (careful with parens which sqlacodegen uses for long imports)
-                            # sqlacodegen generated imports are usually clean single lines or parens
-                            # Simple regex approach to find words
-                            import_names = [n.strip() for n in names_part.replace("(", "").replace(")", "").split(",") if n.strip()]
-                            
-                            used_names = []
-                            for name in import_names:
-                                # Check usage whole word
-                                if re.search(r'\b' + re.escape(name) + r'\b', class_content):
-                                    used_names.append(name)
-                            
-                            if used_names:
-                                final_imports.append(f"{module_part} import {', '.join(sorted(used_names))}")
-                                
-                        # Case 2: import X
-                        elif imp.startswith("import "):
-                             name = imp.split("import ")[1].strip()
-                             if re.search(r'\b' + re.escape(name) + r'\b', class_content):
-                                 final_imports.append(imp)
-
-                    # Assemble final file
-                    # Imports + 2 blank lines + Class
-                    class_content = "\n".join(class_lines)
-                    
-                    # Fix Class Name Mismatch (Plural -> Singular)
-                    # sqlacodegen uses PascalCase(table_name). e.g. 'users' -> 'Users', 'shifts' -> 'Shifts'
-                    # We want 'User', 'Shift'
-                    # We also need to fix relationships: related classes will be 'Shifts', 'Tenants'
-                    # We need to map them to 'Shift', 'Tenant'
-                    
-                    # 1. Rename the class definition
-                    # Find "class Plural(Base):" and replace with "class Singular(Base):"
-                    # We don't know exactly what sqlacodegen generated, but it usually matches table name
-                    # We can try to regex replace the class definition line we found
-                    
-                    # A safer way is to just replace the class name if it starts with "class "
-                    # But we need to know the old name.
-                    # We can parse it from class_lines[0] usually
-                    
-                    old_class_name = None
-                    for i, l in enumerate(class_lines):
-                        if l.startswith("class "):
-                            old_class_name = l.split("class ")[1].split("(")[0]
-                            # Replace with TargetClass
-                            class_lines[i] = l.replace(f"class {old_class_name}", f"class {TargetClass}")
-                            break
-                    
-                    class_content = "\n".join(class_lines)
-
-                    # 2. Fix Relationship types
-                    # Replace Mapped['OldName'] with Mapped['NewName']
-                    # Replace relationship('OldName') with relationship('NewName')
-                    
-                    for t_name, new_cls_name in table_to_class.items():
-                         # sqlacodegen likely used PascalCase(t_name)
-                         # e.g. t_name='tenants' -> likely 'Tenants'
-                         # We can try strict checking but usually Capitalizing first letter is enough if table is lower
-                         # or removing underscores
-                         
-                         # Heuristic: convert table name to pascal case to guess what sqlacodegen did
-                         # e.g. 'users' -> 'Users'. 'user_roles' -> 'UserRoles'.
-                         # This usually matches to_pascal_case(t_name)
-                         
-                         probable_old_class = to_pascal_case(t_name)
-                         
-                         if probable_old_class != new_cls_name:
-                             # Replace string references
-                             # relationship('Old') -> relationship('New')
-                             class_content = class_content.replace(f"'{probable_old_class}'", f"'{new_cls_name}'")
-                             class_content = class_content.replace(f'"{probable_old_class}"', f'"{new_cls_name}"')
-                             class_content = class_content.replace(f"[{probable_old_class}]", f"[{new_cls_name}]") # for List[Old]
-                             # Also Mapped['Old']
-                             class_content = class_content.replace(f"Mapped['{probable_old_class}']", f"Mapped['{new_cls_name}']")
-
-                    final_content = "\n".join(final_imports) + "\n\n\n" + class_content + "\n"
-                    
-                    with open(model_path, 'w') as f:
-                        f.write(final_content)
-                        
-                except Exception as e:
-                     console.print(f"  [yellow]Warning: Could not post-process model file: {e}[/yellow]")
-
-            console.print("\n[bold green]✅ Full scaffold complete![/bold green]")
-            console.print("Don't forget to review the generated models and schemas.")
-            return
-
-        except Exception as e:
-            console.print(f"[bold red]Error inspecting database: {e}[/bold red]")
-            return
+        with console.status(f"[bold green]Reflecting {engine.url.render_as_string(hide_password=True)}...[/bold green]", spinner="dots"):
+            metadata = reflect(engine)
+            live_fingerprints = fingerprints(engine) if args.scaffold else None
+    except Exception as e:
+        console.print(f"[bold red]Error inspecting database: {e}[/bold red]")
+        return
+    finally:
+        engine.dispose()
+
+    models, skipped = build_models(metadata)
+    for table, reason in skipped:
+        console.print(f"[yellow]Skipping table {table}: {reason}[/yellow]")
+    if not models:
+        console.print("[yellow]No tables to generate models for.[/yellow]")
+        return
+
+    if args.scaffold:
+        _scaffold(list(models.values()), metadata, live_fingerprints, engine.dialect.name, args.dry_run)
+        return
 
     # Non-scaffold mode (just dump models to one file)
-    # Output file
     output_file = args.output
     if not output_file:
         output_file = Prompt.ask("[bold green]Enter output file path[/bold green]", default="app/models/imported.py")
 
-    # Check if sqlacodegen is available
-    if not shutil.which("sqlacodegen"):
-        console.print("[yellow]sqlacodegen not found in PATH. Attempting to install or run via python -m...[/yellow]")
-        # In a real scenario, we might want to pip install it or ensure it's in the hatchback env
-        # Since we added it to setup.py, it should be available where hatchback is running.
-    
-    console.print(f"[bold green]Running sqlacodegen against {db_url}...[/bold green]")
-    
-    cmd = [
-        "sqlacodegen",
-        db_url,
-        "--outfile", output_file
-    ]
+    os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+    with open(output_file, "w") as f:
+        f.write(render_models_module(models.values()))
+    console.print(f"[bold green]✅ {len(models)} models generated in {output_file}[/bold green]")
+
+
+def _scaffold(models, metadata, live_fingerprints, dialect, dry_run):
+    """Generate every table, then record the schema snapshot later runs diff against."""
+    names = [model.table.name for model in models]
+    preview = ", ".join(names[:20]) + (f" and {len(names) - 20} more" if len(names) > 20 else "")
+    console.print(f"[bold green]Found {len(models)} tables: {preview}[/bold green]")
+
+    if dry_run or not Confirm.ask("Do you want to scaffold all these tables?"):
+        return
+
+    generated = _generate(models)
+    _save_snapshot(dialect, snapshot_tables(metadata, live_fingerprints))
+    console.print(f"\n[bold green]✅ Full scaffold complete! {generated} models generated.[/bold green]")
+    console.print("Don't forget to review the generated models and schemas.")
+
+
+def _scaffold_incremental(engine, snapshot, dry_run):
+    """Regenerate only what changed since the snapshot was taken."""
+    with console.status("[bold green]Comparing the database with the schema snapshot...[/bold green]", spinner="dots"):
+        plan = plan_changes(engine, snapshot)
+
+    previous = snapshot["tables"]
+    tables = {name: entry for name, entry in previous.items() if name not in plan["dropped"]}
+    tables.update(snapshot_tables(plan["metadata"], plan["fingerprints"], tables=plan["descriptions"]))
+
+    if not (plan["added"] or plan["changed"] or plan["dropped"]):
+        console.print("[bold green]✓ Schema unchanged since the last inspect. Nothing to regenerate.[/bold green]")
+        if not dry_run:
+            _save_snapshot(engine.dialect.name, tables)
+        return
+
+    _print_plan(plan, previous)
+    if dry_run or not Confirm.ask("Apply these changes?"):
+        return
 
+    models, skipped = build_models(plan["metadata"])
+    for table, reason in skipped:
+        if table in plan["affected"]:
+            console.print(f"[yellow]Skipping table {table}: {reason}[/yellow]")
+    generated = _generate([models[name] for name in plan["affected"] if name in models])
+
+    for name in plan["dropped"]:
+        remove_resource(singularize(name).lower(), force=True)
+
+    _save_snapshot(engine.dialect.name, tables)
+    console.print(f"\n[bold green]✅ Regenerated {generated} model(s), removed {len(plan['dropped'])} resource(s).[/bold green]")
+
+
+def _print_plan(plan, previous):
+    table = Table(title="Pending schema changes")
+    table.add_column("Table", style="cyan")
+    table.add_column("Change")
+    table.add_column("Details")
+    for name in plan["added"]:
+        table.add_row(name, "[green]added[/green]", "new resource")
+    for name in plan["changed"]:
+        details = diff_descriptions(previous[name]["description"], plan["descriptions"][name])
+        table.add_row(name, "[yellow]changed[/yellow]", ", ".join(details))
+    for name in plan["dropped"]:
+        table.add_row(name, "[red]dropped[/red]", "resource files will be deleted")
+    for name in sorted(set(plan["affected"]) - set(plan["added"]) - set(plan["changed"])):
+        table.add_row(name, "[dim]relationships[/dim]", "[dim]model regenerated for a related table[/dim]")
+    console.print(table)
+
+
+def _spec_field(column):
+    """The spec field for a column, or None if no sample value is sure to fit it."""
+    if isinstance(column.type, Enum):
+        return None
     try:
-        subprocess.run(cmd, check=True)
-        console.print(f"[bold green]✅ Models generated successfully in {output_file}[/bold green]")
-        console.print("[dim]Note: You may need to adjust the generated models to match your project structure (e.g. inheriting from your project's Base).[/dim]")
+        python_type = column.type.python_type.__name__
+    except NotImplementedError:
+        return None
+    if python_type == "str":
+        length = getattr(column.type, "length", None)
+        return {"type": "string", "length": length} if length else {"type": "text"}
+    return {"type": SPEC_TYPES[python_type]} if python_type in SPEC_TYPES else None
+
+
+def _resource_spec(model):
+    """
+    The spec of a reflected table, with a field per column a create payload can
+    set. The generated routes take a UUID id the database generates; when they
+    cannot create a row from sample values (another key, a required column
+    without a field, a check constraint), sample_payload is False.
+    """
+    table = model.table
+    key = list(table.primary_key.columns)
+    creatable = (
+        len(key) == 1 and key[0].name == "id" and model.attributes["id"] == "id"
+        and key[0].server_default is not None and _spec_field(key[0]) == {"type": "uuid"}
+        and not any(isinstance(constraint, CheckConstraint) for constraint in table.constraints)
+    )
+    fields = {}
+    for column in table.columns:
+        if column.primary_key:
+            continue
+        name = model.attributes[column.name]
+        field = _spec_field(column)
+        # Foreign keys need an existing row, so payloads leave them out
+        if field is None or column.foreign_keys or not IDENTIFIER.match(name) or name in BUILTIN_COLUMNS:
+            if not column.nullable and column.server_default is None:
+                creatable = False
+            continue
+        fields[name] = dict(field, nullable=column.nullable)
+    spec = resource_specs({model.resource: {"fields": fields}})[0]
+    spec["sample_payload"] = creatable
+    return spec
+
 
-    except subprocess.CalledProcessError as e:
-        console.print(f"[bold red]Error running sqlacodegen: {e}[/bold red]")
+def _generate(models):
+    """
+    Write the model and schema files of each table in parallel, then scaffold
+    the rest of each resource in one batch. Returns how many tables succeeded.
+    """
+    invalid = [model for model in models if not IDENTIFIER.match(model.resource)]
+    for model in invalid:
+        console.print(f"[yellow]Skipping table {model.table.name}: '{model.resource}' is not a valid resource name[/yellow]")
+    models = [model for model in models if model not in invalid]
+
+    app_dir = os.path.join(os.getcwd(), "app")
+    for package in ("models", "schemas"):
+        os.makedirs(os.path.join(app_dir, package), exist_ok=True)
+
+    def write(model):
+        with open(os.path.join(app_dir, "models", f"{model.resource}.py"), "w") as f:
+            f.write(render_model_file(model))
+        with open(os.path.join(app_dir, "schemas", f"{model.resource}.py"), "w") as f:
+            f.write(render_schema_file(model))
+
+    failed = 0
+    with Progress(console=console) as progress, ThreadPoolExecutor() as pool:
+        task = progress.add_task("Generating models", total=len(models))
+        futures = {pool.submit(write, model): model for model in models}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                failed += 1
+                progress.console.print(f"  [red]Failed to generate model for {futures[future].table.name}: {e}[/red]")
+            progress.advance(task)
+
+    # Models and schemas now exist, so this only adds repositories, services, routes and tests
+    with console.status("[bold green]Scaffolding services, repositories and routes...[/bold green]", spinner="dots"):
+        scaffold_resources([_resource_spec(model) for model in models], quiet=True)
+    return len(models) - failed
+
+
+def _load_snapshot(dialect):
+    """The snapshot from the last scaffold, or None if there is none or it cannot be used."""
+    try:
+        with open(SNAPSHOT_PATH, "r") as f:
+            snapshot = json.load(f)
     except FileNotFoundError:
-        # Fallback: try running with current python executable
-        try:
-             # This assumes sqlacodegen is installed in the same env as hatchback
-            cmd = [sys.executable, "-m", "sqlacodegen", db_url, "--outfile", output_file]
-            subprocess.run(cmd, check=True)
-            console.print(f"[bold green]✅ Models generated successfully in {output_file}[/bold green]")
-        except Exception as e:
-            console.print("[bold red]Could not find or run sqlacodegen. Please ensure it is installed.[/bold red]")
-            console.print(f"[red]{e}[/red]")
+        return None
+    except ValueError:
+        console.print(f"[yellow]Ignoring unreadable {SNAPSHOT_PATH}; running a full inspect.[/yellow]")
+        return None
+    if snapshot.get("version") != SNAPSHOT_VERSION or snapshot.get("dialect") != dialect:
+        console.print(f"[yellow]{SNAPSHOT_PATH} was recorded differently; running a full inspect.[/yellow]")
+        return None
+    return snapshot
+
 
+def _save_snapshot(dialect, tables):
+    os.makedirs(os.path.dirname(SNAPSHOT_PATH), exist_ok=True)
+    with open(SNAPSHOT_PATH, "w") as f:
+        json.dump({
+            "version": SNAPSHOT_VERSION,
+            "dialect": dialect,
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+            "tables": tables,
+        }, f, indent=2, sort_keys=True)
@@ -1,118 +1,811 @@
 import os
-from ..utils import console, to_pascal_case
-
-def scaffold_resource(resource):
-    resource = resource.lower()
-    Resource = to_pascal_case(resource)
-    
-    console.print(f"[bold green]Scaffolding resource: {Resource}[/bold green]")
-    
-    # Define paths
-    base_dir = os.getcwd()
+import re
+import json
+import sys
+from ..utils import console, load_manifest, to_pascal_case
+
+# __file__ is .../hatchback/commands/make.py; templates live in .../hatchback/scaffold_templates
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scaffold_templates")
+
+# Spec field type -> (SQLAlchemy type, Python type)
+FIELD_TYPES = {
+    "string": ("String", "str"),
+    "text": ("Text", "str"),
+    "integer": ("Integer", "int"),
+    "bigint": ("BigInteger", "int"),
+    "float": ("Float", "float"),
+    "decimal": ("Numeric", "Decimal"),
+    "boolean": ("Boolean", "bool"),
+    "date": ("Date", "date"),
+    "datetime": ("DateTime", "datetime"),
+    "uuid": ("UUID", "UUID"),
+    "json": ("JSON", "dict"),
+}
+
+# Module each non-builtin Python type used in schemas and repositories comes from
+PYTHON_TYPE_IMPORTS = {
+    "Decimal": "decimal",
+    "date": "datetime",
+    "datetime": "datetime",
+    "UUID": "uuid",
+}
+
+RESOURCE_KEYS = {"fields", "relations", "indexes", "unique", "tenant_scoped", "partition_by", "partitions"}
+FIELD_KEYS = {"type", "length", "precision", "scale", "nullable", "unique", "index", "default"}
+RELATION_KEYS = {"to", "nullable", "ondelete"}
+
+# Columns every scaffolded model has
+BUILTIN_COLUMNS = {"id": "UUID", "created_at": "datetime"}
+
+# The column tenant-scoped models add, and the indexes every one of them gets:
+# lookups by id and newest-first listings within one tenant
+TENANT_COLUMN = "tenant_id"
+TENANT_INDEXES = [[TENANT_COLUMN, "id"], [TENANT_COLUMN, "created_at"]]
+
+# Partitioned resources are hash-partitioned on the tenant column: every query
+# of a tenant-scoped repository filters on it, so each one reads one partition
+PARTITIONED_PRIMARY_KEY = [TENANT_COLUMN, "id"]
+DEFAULT_PARTITIONS = 16
+
+IDENTIFIER = re.compile(r"^[a-z][a-z0-9_]*$")
+
+# What `hatchback make <resource>` generates without a spec
+DEFAULT_FIELDS = {"name": {"type": "string", "length": 100}}
+
+
+def _field_spec(resource, name, field):
+    if isinstance(field, str):
+        field = {"type": field}
+    if not isinstance(field, dict):
+        raise ValueError(f"{resource}.{name}: expected a type name or a mapping")
+    unknown = set(field) - FIELD_KEYS
+    if unknown:
+        raise ValueError(f"{resource}.{name}: unknown key(s) {', '.join(sorted(unknown))}")
+    if field.get("type") not in FIELD_TYPES:
+        raise ValueError(f"{resource}.{name}: type must be one of {', '.join(FIELD_TYPES)}")
+    if "default" in field and not isinstance(field["default"], (str, int, float, bool)):
+        raise ValueError(f"{resource}.{name}: default must be a string, number or boolean")
+
+    spec = {"nullable": True, "unique": False, "index": False, **field}
+    if spec["type"] == "string":
+        spec.setdefault("length", 255)
+    return spec
+
+
+def resource_specs(resources, tenant_scoped=False, partition_by=None, partitions=None):
+    """
+    Normalize the `resources` section of a spec into a list of resource specs.
+    It is either a list of names (placeholder `name` column, like `hatchback
+    make <resource>`) or a mapping of name -> {fields, relations, indexes,
+    unique, tenant_scoped, partition_by, partitions}. The arguments are the
+    defaults for resources that do not say; partitioning implies tenant
+    scoping. Raises ValueError on anything invalid.
+    """
+    if isinstance(resources, list):
+        resources = {name: None for name in resources}
+    if not isinstance(resources, dict):
+        raise ValueError("'resources' must be a list of names or a mapping of resource definitions")
+
+    specs = []
+    for resource, definition in resources.items():
+        resource = str(resource).lower()
+        if not IDENTIFIER.match(resource):
+            raise ValueError(f"'{resource}' is not a valid resource name (use snake_case)")
+        definition = {"fields": DEFAULT_FIELDS} if definition is None else definition
+        if not isinstance(definition, dict):
+            raise ValueError(f"{resource}: expected a mapping")
+        unknown = set(definition) - RESOURCE_KEYS
+        if unknown:
+            raise ValueError(f"{resource}: unknown key(s) {', '.join(sorted(unknown))}")
+        scoped = definition.get("tenant_scoped", tenant_scoped)
+        if not isinstance(scoped, bool):
+            raise ValueError(f"{resource}.tenant_scoped: expected true or false")
+        partition_key = definition.get("partition_by", partition_by)
+        count = definition.get("partitions", partitions)
+        if partition_key is None:
+            if definition.get("partitions") is not None:
+                raise ValueError(f"{resource}.partitions: set partition_by too")
+            count = None
+        else:
+            if partition_key != TENANT_COLUMN:
+                raise ValueError(f"{resource}.partition_by: only '{TENANT_COLUMN}' is supported")
+            if definition.get("tenant_scoped") is False:
+                raise ValueError(f"{resource}: partitioning by {TENANT_COLUMN} needs tenant_scoped")
+            scoped = True
+            count = DEFAULT_PARTITIONS if count is None else count
+            if isinstance(count, bool) or not isinstance(count, int) or count < 2:
+                raise ValueError(f"{resource}.partitions: expected a number of at least 2")
+
+        fields = {}
+        for name, field in (definition.get("fields") or {}).items():
+            if not IDENTIFIER.match(name) or name in BUILTIN_COLUMNS:
+                raise ValueError(f"{resource}: invalid field name '{name}'")
+            fields[name] = _field_spec(resource, name, field)
+
+        relations = {}
+        for name, relation in (definition.get("relations") or {}).items():
+            if isinstance(relation, str):
+                relation = {"to": relation}
+            if not isinstance(relation, dict) or not IDENTIFIER.match(name):
+                raise ValueError(f"{resource}: invalid relation '{name}'")
+            unknown = set(relation) - RELATION_KEYS
+            if unknown:
+                raise ValueError(f"{resource}.{name}: unknown key(s) {', '.join(sorted(unknown))}")
+            column = f"{name}_id"
+            if column in fields or name in fields or (scoped and column == TENANT_COLUMN):
+                raise ValueError(f"{resource}: relation '{name}' clashes with a field")
+            target = relation.get("to", name).lower()
+            relations[name] = {"to": target, "column": column}
+            # Foreign keys are always indexed: joins and lookups by parent depend on it
+            fields[column] = {
+                "type": "uuid",
+                "nullable": relation.get("nullable", True),
+                "unique": False,
+                "index": True,
+                "foreign_key": f"{target}s.id",
+                "ondelete": relation.get("ondelete"),
+            }
+
+        if scoped and TENANT_COLUMN in fields:
+            raise ValueError(f"{resource}: '{TENANT_COLUMN}' is added by tenant scoping; remove the field")
+
+        columns = set(fields) | set(BUILTIN_COLUMNS) | ({TENANT_COLUMN} if scoped else set())
+        composites = {}
+        for key in ("indexes", "unique"):
+            composites[key] = []
+            for entry in definition.get(key) or []:
+                entry = [entry] if isinstance(entry, str) else list(entry)
+                missing = [column for column in entry if column not in columns]
+                if not entry or missing:
+                    raise ValueError(f"{resource}.{key}: unknown column(s) {', '.join(missing) or '(none)'}")
+                composites[key].append(entry)
+
+        # A one-column entry is the same as the field flag
+        for entry in [e for e in composites["unique"] if len(e) == 1 and e[0] in fields]:
+            fields[entry[0]]["unique"] = True
+            composites["unique"].remove(entry)
+        for entry in [e for e in composites["indexes"] if len(e) == 1 and e[0] in fields]:
+            fields[entry[0]]["index"] = True
+            composites["indexes"].remove(entry)
+
+        # PostgreSQL enforces uniqueness per partition, so only with the partition key
+        if partition_key:
+            for name in [name for name, field in fields.items() if field["unique"]]:
+                raise ValueError(
+                    f"{resource}.{name}: a table partitioned by {TENANT_COLUMN} can only be unique per tenant; "
+                    f"list it in unique together with {TENANT_COLUMN}"
+                )
+            for entry in composites["unique"]:
+                if TENANT_COLUMN not in entry:
+                    raise ValueError(f"{resource}.unique: {', '.join(entry)} must include {TENANT_COLUMN} on a partitioned table")
+
+        specs.append({
+            "name": resource,
+            "fields": fields,
+            "relations": relations,
+            "indexes": composites["indexes"],
+            "unique": composites["unique"],
+            "tenant_scoped": scoped,
+            "partition_by": partition_key,
+            "partitions": count,
+        })
+
+    partitioned = {spec["name"] for spec in specs if spec["partition_by"]}
+    for spec in specs:
+        for name, relation in spec["relations"].items():
+            if relation["to"] in partitioned:
+                reference_partitioned(spec, name)
+    return specs
+
+
+def reference_partitioned(spec, relation):
+    """
+    Make a relation to a partitioned resource reference (tenant_id, id): its
+    primary key includes the partition key, so foreign keys to it must too.
+    """
+    target = spec["relations"][relation]["to"]
+    field = spec["fields"][spec["relations"][relation]["column"]]
+    if not spec["tenant_scoped"]:
+        raise ValueError(f"{spec['name']}.{relation}: {target} is partitioned by {TENANT_COLUMN}, so {spec['name']} must be tenant-scoped to reference it")
+    if (field.get("ondelete") or "").lower() == "set null":
+        raise ValueError(f"{spec['name']}.{relation}: ondelete 'set null' would clear {TENANT_COLUMN} too; use 'cascade' or leave it out")
+    field["tenant_key"] = True
+
+
+def _fill(content, marker, block):
+    """Replace a marker line with a block of code, or drop the line when the block is empty."""
+    if not block:
+        return re.sub(rf"^{marker}\n", "", content, flags=re.MULTILINE)
+    return content.replace(marker, block)
+
+
+def _python_type(spec, column):
+    if column in BUILTIN_COLUMNS:
+        return BUILTIN_COLUMNS[column]
+    if column == TENANT_COLUMN and spec["tenant_scoped"]:
+        return "UUID"
+    return FIELD_TYPES[spec["fields"][column]["type"]][1]
+
+
+def _type_imports(python_types):
+    modules = {}
+    for python_type in python_types:
+        if python_type in PYTHON_TYPE_IMPORTS:
+            modules.setdefault(PYTHON_TYPE_IMPORTS[python_type], set()).add(python_type)
+    return [f"from {module} import {', '.join(sorted(names))}" for module, names in sorted(modules.items())]
+
+
+def _literal(value):
+    """Python source for a value, with double-quoted strings like the rest of the project."""
+    return json.dumps(value) if isinstance(value, str) else repr(value)
+
+
+def _tenant_indexed(field):
+    """Whether a tenant-scoped model indexes the field as (tenant_id, field) instead of on its own."""
+    return field["index"] and not field["unique"] and (not field.get("foreign_key") or field.get("tenant_key"))
+
+
+def _without_prefixes(entries):
+    """entries without duplicates or any index that is a prefix of another: the longer one serves its lookups."""
+    indexes = []
+    for entry in entries:
+        if entry not in indexes and not any(other[: len(entry)] == entry and len(other) > len(entry) for other in entries):
+            indexes.append(entry)
+    return indexes
+
+
+def _leads_index(spec, column):
+    """Whether a declared composite index of a model that is not tenant-scoped starts with column."""
+    return any(entry[0] == column for entry in spec["indexes"])
+
+
+def _tenant_indexes(spec):
+    """
+    The indexes of a tenant-scoped model: TENANT_INDEXES, then each declared
+    index led by tenant_id, since every query filters on it first. Foreign key
+    indexes stay single-column for joins and cascades from the parent, unless
+    the key includes tenant_id. An index that is a prefix of another is left
+    out, and so is (tenant_id, id) on a partitioned model: its primary key.
+    """
+    declared = spec["indexes"] + [[name] for name, field in spec["fields"].items() if _tenant_indexed(field)]
+    indexes = _without_prefixes(
+        TENANT_INDEXES + [[TENANT_COLUMN] + [c for c in entry if c != TENANT_COLUMN] for entry in declared]
+    )
+    if spec["partition_by"]:
+        indexes.remove(PARTITIONED_PRIMARY_KEY)
+    return indexes
+
+
+def render_model(spec):
+    table = f"{spec['name']}s"
+    sqlalchemy_names = {"Column", "DateTime"}
+    columns = []
+    table_args, foreign_keys = [], []
+    if spec["partition_by"]:
+        sqlalchemy_names.update({"ForeignKey", "PrimaryKeyConstraint"})
+        columns.append(f'    {TENANT_COLUMN} = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), primary_key=True)')
+        table_args.append(f"PrimaryKeyConstraint({', '.join(_literal(c) for c in PARTITIONED_PRIMARY_KEY)})")
+    elif spec["tenant_scoped"]:
+        sqlalchemy_names.add("ForeignKey")
+        columns.append(f'    {TENANT_COLUMN} = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)')
+    for name, field in spec["fields"].items():
+        sql_type = FIELD_TYPES[field["type"]][0]
+        sqlalchemy_names.add(sql_type)
+        if field["type"] == "string":
+            type_expr = f"String({field['length']})"
+        elif field["type"] == "decimal" and "precision" in field:
+            type_expr = f"Numeric({field['precision']}, {field.get('scale', 0)})"
+        elif field["type"] == "uuid":
+            type_expr = "UUID(as_uuid=True)"
+        else:
+            type_expr = sql_type
+
+        args = [type_expr]
+        if field.get("tenant_key"):
+            # References a partitioned table: the constraint is (tenant_id, column), in __table_args__
+            sqlalchemy_names.add("ForeignKeyConstraint")
+            target = field["foreign_key"].split(".")[0]
+            ondelete = f", ondelete={_literal(field['ondelete'].upper())}" if field.get("ondelete") else ""
+            foreign_keys.append(
+                f"ForeignKeyConstraint([{_literal(TENANT_COLUMN)}, {_literal(name)}], "
+                f"[{_literal(f'{target}.{TENANT_COLUMN}')}, {_literal(field['foreign_key'])}]{ondelete})"
+            )
+        elif field.get("foreign_key"):
+            sqlalchemy_names.add("ForeignKey")
+            ondelete = f", ondelete={_literal(field['ondelete'].upper())}" if field.get("ondelete") else ""
+            args.append(f"ForeignKey({_literal(field['foreign_key'])}{ondelete})")
+        args.append(f"nullable={field['nullable']}")
+        if field["unique"]:
+            args.append("unique=True")
+        # A composite index led by the column serves it too (foreign keys included)
+        if field["index"] and not (_tenant_indexed(field) if spec["tenant_scoped"] else _leads_index(spec, name)):
+            args.append("index=True")
+        if "default" in field:
+            args.append(f"default={_literal(field['default'])}")
+        columns.append(f"    {name} = Column({', '.join(args)})")
+    sqlalchemy_names.discard("UUID")
+
+    relations = [
+        f"    {name} = relationship({_literal(to_pascal_case(relation['to']))})"
+        for name, relation in spec["relations"].items()
+    ]
+
+    for entry in _tenant_indexes(spec) if spec["tenant_scoped"] else _without_prefixes(spec["indexes"]):
+        sqlalchemy_names.add("Index")
+        table_args.append(f"Index({_literal('_'.join(['ix', table] + entry))}, {', '.join(_literal(c) for c in entry)})")
+    for entry in spec["unique"]:
+        sqlalchemy_names.add("UniqueConstraint")
+        table_args.append(f"UniqueConstraint({', '.join(_literal(c) for c in entry)}, name={_literal('_'.join(['uq', table] + entry))})")
+    table_args += foreign_keys
+    if spec["partition_by"]:
+        # Table options are a dict, which must come last
+        table_args.append(f"hash_partitions({_literal(spec['partition_by'])}, {spec['partitions']})")
+
+    imports = [
+        "import uuid",
+        "from datetime import datetime",
+        f"from sqlalchemy import {', '.join(sorted(sqlalchemy_names))}",
+        "from sqlalchemy.dialects.postgresql import UUID",
+    ]
+    if relations:
+        imports.append("from sqlalchemy.orm import relationship")
+    if spec["partition_by"]:
+        imports.append("from app.models.partitioning import hash_partitions")
+
+    content = _fill(_template("model.tpl"), "__imports__", "\n".join(imports))
+    content = _fill(content, "__table_args__", "".join(
+        ["    __table_args__ = (\n"] + [f"        {arg},\n" for arg in table_args] + ["    )\n"]
+    ).rstrip("\n") if table_args else "")
+    content = _fill(content, "__columns__", "\n".join(columns))
+    return _fill(content, "__relations__", "\n" + "\n".join(relations) if relations else "")
+
+
+def _schema_field(name, field, required):
+    python_type = FIELD_TYPES[field["type"]][1]
+    constraints = []
+    if field["type"] == "string":
+        constraints.append(f"max_length={field['length']}")
+    if field["type"] == "decimal" and "precision" in field:
+        constraints.append(f"max_digits={field['precision']}, decimal_places={field.get('scale', 0)}")
+
+    if required:
+        annotation, default = python_type, None
+    else:
+        annotation, default = f"Optional[{python_type}]", _literal(field.get("default"))
+    if constraints:
+        args = ([] if default is None else [default]) + constraints
+        return f"    {name}: {annotation} = Field({', '.join(args)})"
+    return f"    {name}: {annotation}" + ("" if default is None else f" = {default}")
+
+
+def render_schema(spec):
+    base_fields, update_fields = [], []
+    for name, field in spec["fields"].items():
+        required = not field["nullable"] and "default" not in field
+        base_fields.append(_schema_field(name, field, required))
+        update_fields.append(_schema_field(name, {k: v for k, v in field.items() if k != "default"}, False))
+
+    python_types = {FIELD_TYPES[f["type"]][1] for f in spec["fields"].values()} | {"UUID", "datetime"}
+    pydantic_names = ["BaseModel", "ConfigDict"]
+    if any("Field(" in line for line in base_fields + update_fields):
+        pydantic_names.append("Field")
+    imports = _type_imports(python_types) + [
+        "from typing import Optional",
+        f"from pydantic import {', '.join(pydantic_names)}",
+    ]
+
+    content = _fill(_template("schema.tpl"), "__imports__", "\n".join(sorted(imports[:-1]) + imports[-1:]))
+    content = _fill(content, "__base_fields__", "\n".join(base_fields) or "    pass")
+    return _fill(content, "__update_fields__", "\n".join(update_fields) or "    pass")
+
+
+def query_methods(spec):
+    """
+    Repository lookups that the declared indexes can serve, as (name, columns,
+    order_by, unique). Unique keys get `get_by_*` returning one row; indexes get
+    paginated `get_all_by_*`. A composite index (a, b) filters on a and orders
+    by b, which is the access pattern such an index exists for. For
+    tenant-scoped resources tenant_id is left out: every method filters on it.
+    """
+    methods = {}
+    scoped = spec["tenant_scoped"]
+
+    def add(columns, order_by=None, unique=False):
+        if not columns:
+            return
+        name = ("get_by_" if unique else "get_all_by_") + "_and_".join(columns)
+        methods.setdefault(name, (name, columns, order_by, unique))
+
+    for name, field in spec["fields"].items():
+        if field["unique"]:
+            add([name], unique=True)
+    for entry in spec["unique"]:
+        add([c for c in entry if not (scoped and c == TENANT_COLUMN)], unique=True)
+    for entry in spec["indexes"]:
+        entry = [c for c in entry if not (scoped and c == TENANT_COLUMN)]
+        add(entry[:-1] or entry, order_by=entry[-1] if len(entry) > 1 else "created_at" if scoped else None)
+    for name, field in spec["fields"].items():
+        if field["index"] and not field["unique"]:
+            add([name], order_by="created_at")
+    return list(methods.values())
+
+
+def _tenant_parents(spec):
+    """(relation, column, target, model class) of each relation whose parent rows must be in the row's tenant."""
+    return [
+        (name, relation["column"], relation["to"], to_pascal_case(relation["to"]))
+        for name, relation in spec["relations"].items()
+        if spec["fields"][relation["column"]].get("tenant_parent")
+    ]
+
+
+def render_repository(spec):
+    methods = []
+    # Tenant-scoped lookups take the tenant first and filter on it first
+    scope = [TENANT_COLUMN] if spec["tenant_scoped"] else []
+    python_types = {"UUID"} if scope else set()
+    parents = _tenant_parents(spec)
+    if parents:
+        entries = "".join(f"\n            ({_literal(name)}, {_literal(column)}, {model})," for name, column, _, model in parents)
+        methods.append(
+            "    def missing_parent(self, tenant_id: UUID, data: dict):\n"
+            '        """\n'
+            "        The first relation in data whose row is not in the tenant, or None:\n"
+            "        the foreign keys reference id alone, so they would take another tenant's rows.\n"
+            '        """\n'
+            f"        for relation, column, model in ({entries}\n        ):\n"
+            "            value = data.get(column)\n"
+            "            if value is not None and not self.db.query(model.id).filter(model.tenant_id == tenant_id, model.id == value).first():\n"
+            "                return relation\n"
+            "        return None"
+        )
+    for name, columns, order_by, unique in query_methods(spec):
+        params = [f"{column}: {_python_type(spec, column)}" for column in scope + columns]
+        python_types.update(_python_type(spec, column) for column in columns)
+        conditions = ", ".join(f"self.model.{column} == {column}" for column in scope + columns)
+        if unique:
+            methods.append(
+                f"    def {name}(self, {', '.join(params)}):\n"
+                f"        return self.db.query(self.model).filter({conditions}).first()"
+            )
+            continue
+        lines = [
+            f"    def {name}(self, {', '.join(params)}, skip: int = 0, limit: int = 100):",
+            "        return (",
+            "            self.db.query(self.model)",
+            f"            .filter({conditions})",
+        ]
+        if order_by:
+            lines.append(f"            .order_by(self.model.{order_by}.desc())")
+        lines += [
+            "            .offset(skip)",
+            "            .limit(limit)",
+            "            .all()",
+            "        )",
+        ]
+        methods.append("\n".join(lines))
+
+    imports = _type_imports(python_types) + sorted({f"from app.models.{target} import {model}" for _, _, target, model in parents})
+    content = _fill(_template(_variant("repository.tpl", spec)), "__imports__", "\n".join(imports))
+    return _fill(content, "__query_methods__", "".join(f"\n{method}\n" for method in methods).rstrip("\n"))
+
+
+def render_service(spec):
+    parents = bool(_tenant_parents(spec))
+    content = _fill(_template(_variant("service.tpl", spec)), "__imports__", "from fastapi import HTTPException" if parents else "")
+    content = _fill(content, "__check_parents__", "        self._check_parents(tenant_id, data)" if parents else "")
+    return _fill(content, "__parent_methods__", (
+        "\n"
+        "    def _check_parents(self, tenant_id: UUID, data: dict):\n"
+        "        # Another tenant's parent answers like a missing one\n"
+        "        missing = self.repo.missing_parent(tenant_id, data)\n"
+        "        if missing:\n"
+        '            raise HTTPException(status_code=404, detail=f"{missing} not found")'
+    ) if parents else "")
+
+
+def _sample_value(name, field):
+    """A Python expression for a valid value of the field; `n` makes it unique per call."""
+    kind = field["type"]
+    if kind in ("string", "text"):
+        length = field.get("length", 255)
+        return f'f"{name} {{n}}"' if length >= len(name) + 10 else f'str(n)[-{length}:]'
+    return {
+        "integer": "n",
+        "bigint": "n",
+        "float": "n + 0.5",
+        "decimal": "Decimal(n)",
+        "boolean": "True",
+        "date": "date(2024, 1, 1) + timedelta(days=n)",
+        "datetime": "datetime(2024, 1, 1) + timedelta(seconds=n)",
+        "uuid": "uuid.uuid4()",
+        "json": "{}",
+    }[kind]
+
+
+def _sample_payload(spec):
+    """
+    Whether sample values alone make a valid payload for spec: not for a
+    reflected table the routes cannot create rows in (see `hatchback inspect`),
+    nor with a required relation, which needs an existing row to point at.
+    """
+    if not spec.get("sample_payload", True):
+        return False
+    return not any(field.get("foreign_key") and not field["nullable"] for field in spec["fields"].values())
+
+
+def _render_payload(template, spec):
+    """Fill a template's build_payload() (__imports__, __payload__) with sample values."""
+    items, imports = [], set()
+    for name, field in spec["fields"].items():
+        # Optional relations are left unset
+        if field.get("foreign_key"):
+            continue
+        value = _sample_value(name, field)
+        items.append(f'        "{name}": {value},')
+        if "Decimal(" in value:
+            imports.add("from decimal import Decimal")
+        if "timedelta" in value:
+            imports.add(f"from datetime import {'date' if field['type'] == 'date' else 'datetime'}, timedelta")
+        if "uuid." in value:
+            imports.add("import uuid")
+
+    content = _fill(_template(_variant(template, spec)), "__imports__", "\n".join(sorted(imports)))
+    return _fill(content, "__payload__", "{\n" + "\n".join(items) + "\n    }" if items else "{}")
+
+
+def render_bench(spec):
+    # Scenarios without a payload that creates rows would only fail
+    if not _sample_payload(spec):
+        return None
+    return _render_payload("bench.tpl", spec)
+
+
+def render_test(spec):
+    if not _sample_payload(spec):
+        return _template(_variant("test_stub.tpl", spec))
+    return _render_payload("test.tpl", spec)
+
+
+_templates = {}
+
+
+def _variant(name, spec):
+    """The template for spec: `x_tenant.tpl` instead of `x.tpl` for tenant-scoped resources, where one exists."""
+    if spec["tenant_scoped"]:
+        scoped = name.replace(".tpl", "_tenant.tpl")
+        if os.path.exists(os.path.join(TEMPLATES_DIR, scoped)):
+            return scoped
+    return name
+
+
+def _template(name):
+    """Read a scaffold template, once per process."""
+    if name not in _templates:
+        with open(os.path.join(TEMPLATES_DIR, name), "r") as f:
+            _templates[name] = f.read()
+    return _templates[name]
+
+
+# Template -> (renderer for the spec-dependent parts, target path)
+FILES = {
+    "model.tpl": (render_model, "app/models/{resource}.py"),
+    "schema.tpl": (render_schema, "app/schemas/{resource}.py"),
+    "repository.tpl": (render_repository, "app/repositories/{resource}.py"),
+    "service.tpl": (render_service, "app/services/{resource}.py"),
+    "route.tpl": (None, "app/routes/{resource}.py"),
+    "test.tpl": (render_test, "tests/test_{resource}s.py"),
+    "bench.tpl": (render_bench, "benchmarks/bench_{resource}.py"),
+}
+
+
+def scaffold_resources(specs, base_dir=None, quiet=False):
+    """
+    Generate every resource in specs (see resource_specs) in the project at
+    base_dir (default: the current directory), then register them all with a
+    single rewrite of each package __init__.py. A spec sample values cannot
+    create rows for (see _sample_payload) gets stub tests and no benchmark
+    scenarios. quiet suppresses progress
+    output; errors are always printed, and return False having generated nothing.
+    """
+    echo = (lambda *args, **kwargs: None) if quiet else console.print
+    base_dir = base_dir or os.getcwd()
     app_dir = os.path.join(base_dir, "app")
-    
+
     if not os.path.exists(app_dir):
         console.print("[bold red]Error: 'app' directory not found. Are you in the project root?[/bold red]")
-        return
+        return False
 
-    # Locate templates directory
-    # __file__ is .../hatchback/commands/make.py
-    # os.path.dirname(__file__) is .../hatchback/commands
-    # os.path.dirname(...) is .../hatchback
-    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    templates_dir = os.path.join(package_dir, "scaffold_templates")
-
-    files_map = {
-        "model.tpl": f"app/models/{resource}.py",
-        "schema.tpl": f"app/schemas/{resource}.py",
-        "repository.tpl": f"app/repositories/{resource}.py",
-        "service.tpl": f"app/services/{resource}.py",
-        "route.tpl": f"app/routes/{resource}.py",
-        "test.tpl": f"tests/test_{resource}s.py",
-    }
-
-    for tpl_file, target_path in files_map.items():
-        tpl_path = os.path.join(templates_dir, tpl_file)
-        if not os.path.exists(tpl_path):
-            console.print(f"[bold red]Error: Template {tpl_file} not found at {tpl_path}[/bold red]")
-            continue
+    files = dict(FILES)
+    # Projects created before `hatchback bench` have no benchmarks package
+    if not os.path.exists(os.path.join(base_dir, "benchmarks", "runner.py")):
+        del files["bench.tpl"]
+        echo("[dim]No benchmarks/ package found; skipping benchmark scenarios (run 'hatchback upgrade' to add it).[/dim]")
 
-        with open(tpl_path, "r") as f:
-            content = f.read()
-        
-        # Replace placeholders
-        content = content.replace("__Resource__", Resource)
-        content = content.replace("__resource__", resource)
-        
-        full_target_path = os.path.join(base_dir, target_path)
-        os.makedirs(os.path.dirname(full_target_path), exist_ok=True)
-        
-        if os.path.exists(full_target_path):
-             console.print(f"[yellow]Skipping {target_path} (already exists)[/yellow]")
-        else:
+    names = {spec["name"] for spec in specs}
+    if not _partitioning_ready(specs, base_dir, app_dir, names):
+        return False
+    _mark_tenant_parents(specs, app_dir, names)
+    for spec in specs:
+        resource = spec["name"]
+        Resource = to_pascal_case(resource)
+        echo(f"[bold green]Scaffolding resource: {Resource}[/bold green]")
+
+        for relation in spec["relations"].values():
+            target = relation["to"]
+            if target not in names and not os.path.exists(os.path.join(app_dir, "models", f"{target}.py")):
+                console.print(f"[yellow]Warning: {resource} relates to '{target}', which is neither in this batch nor in app/models.[/yellow]")
+
+        for tpl_file, (render, target_path) in files.items():
+            target_path = target_path.format(resource=resource)
+            full_target_path = os.path.join(base_dir, target_path)
+            if os.path.exists(full_target_path):
+                echo(f"[yellow]Skipping {target_path} (already exists)[/yellow]")
+                continue
+
+            try:
+                content = render(spec) if render else _template(_variant(tpl_file, spec))
+            except FileNotFoundError:
+                console.print(f"[bold red]Error: Template {tpl_file} not found in {TEMPLATES_DIR}[/bold red]")
+                continue
+            if content is None:
+                echo(f"[dim]Skipping {target_path} (no sample payload for {resource})[/dim]")
+                continue
+            content = content.replace("__Resource__", Resource).replace("__resource__", resource)
+
+            os.makedirs(os.path.dirname(full_target_path), exist_ok=True)
             with open(full_target_path, "w") as f:
                 f.write(content)
-            console.print(f"[green]Created {target_path}[/green]")
-
-    # Update models/__init__.py
-    init_path = os.path.join(app_dir, "models", "__init__.py")
-    if os.path.exists(init_path):
-        with open(init_path, "a") as f:
-            f.write(f"\nfrom app.models.{resource} import {Resource}")
-        console.print(f"[green]Updated app/models/__init__.py[/green]")
-
-    # Update routes/__init__.py
-    routes_init_path = os.path.join(app_dir, "routes", "__init__.py")
-    if os.path.exists(routes_init_path):
-        with open(routes_init_path, "r") as f:
-            content = f.read()
-        
-        if f"from .{resource} import router" not in content:
-            # Add import
-            import_stmt = f"from .{resource} import router as {resource}_router\n"
-            content = import_stmt + content
-            
-            # Add to routers list
-            if "routers = [" in content:
-                content = content.replace("routers = [", f"routers = [{resource}_router, ")
-            
-            with open(routes_init_path, "w") as f:
-                f.write(content)
-            console.print(f"[green]Updated app/routes/__init__.py[/green]")
-
-    # Update services/__init__.py
-    services_init_path = os.path.join(app_dir, "services", "__init__.py")
-    if os.path.exists(services_init_path):
-        with open(services_init_path, "r") as f:
-            content = f.read()
-            
-        if f"from .{resource} import {Resource}Service" not in content:
-            import_stmt = f"from .{resource} import {Resource}Service\n"
-            content = import_stmt + content
-            
-            if "__all__ = [" in content:
-                content = content.replace("__all__ = [", f"__all__ = [\"{Resource}Service\", ")
-                
-            with open(services_init_path, "w") as f:
-                f.write(content)
-            console.print(f"[green]Updated app/services/__init__.py[/green]")
-
-    # Update repositories/__init__.py
-    repos_init_path = os.path.join(app_dir, "repositories", "__init__.py")
-    if os.path.exists(repos_init_path):
-        with open(repos_init_path, "r") as f:
-            content = f.read()
-            
-        if f"from .{resource} import {Resource}Repository" not in content:
-            import_stmt = f"from .{resource} import {Resource}Repository\n"
-            content = import_stmt + content
-            
-            if "__all__ = [" in content:
-                content = content.replace("__all__ = [", f"__all__ = [\"{Resource}Repository\", ")
-                
-            with open(repos_init_path, "w") as f:
+            echo(f"[green]Created {target_path}[/green]")
+
+    _register(app_dir, [spec["name"] for spec in specs], echo)
+
+
+def _register(app_dir, resources, echo):
+    """Add the resources to the models, routes, services and repositories packages."""
+
+    def update(package, change):
+        path = os.path.join(app_dir, package, "__init__.py")
+        if not os.path.exists(path):
+            return
+        with open(path, "r") as f:
+            original = f.read()
+        content = original
+        for resource in resources:
+            content = change(content, resource, to_pascal_case(resource))
+        if content != original:
+            with open(path, "w") as f:
                 f.write(content)
-            console.print(f"[green]Updated app/repositories/__init__.py[/green]")
+            echo(f"[green]Updated app/{package}/__init__.py[/green]")
+
+    def models(content, resource, Resource):
+        import_stmt = f"from app.models.{resource} import {Resource}"
+        if import_stmt in content:
+            return content
+        return content + f"\n{import_stmt}"
+
+    def routes(content, resource, Resource):
+        if f"from .{resource} import router" in content:
+            return content
+        content = f"from .{resource} import router as {resource}_router\n" + content
+        return content.replace("routers = [", f"routers = [{resource}_router, ")
+
+    def exported(suffix):
+        def change(content, resource, Resource):
+            name = f"{Resource}{suffix}"
+            if f"from .{resource} import {name}" in content:
+                return content
+            content = f"from .{resource} import {name}\n" + content
+            return content.replace("__all__ = [", f"__all__ = [\"{name}\", ")
+        return change
+
+    update("models", models)
+    update("routes", routes)
+    update("services", exported("Service"))
+    update("repositories", exported("Repository"))
+
+
+def _mark_tenant_parents(specs, app_dir, names):
+    """
+    Flag the relations of tenant-scoped resources to tenant-scoped parents
+    (tenant_parent), whose ids the repository checks against the tenant.
+    Parents that are partitioned need no check: the (tenant_id, id) foreign
+    key already keeps rows in their tenant.
+    """
+    scoped = {spec["name"] for spec in specs if spec["tenant_scoped"]}
+    for spec in specs:
+        if not spec["tenant_scoped"]:
+            continue
+        for relation in spec["relations"].values():
+            field = spec["fields"][relation["column"]]
+            if field.get("tenant_key"):
+                continue
+            if relation["to"] in names:
+                field["tenant_parent"] = relation["to"] in scoped
+                continue
+            path = os.path.join(app_dir, "models", f"{relation['to']}.py")
+            if os.path.exists(path):
+                with open(path, "r") as f:
+                    field["tenant_parent"] = re.search(rf"^\s+{TENANT_COLUMN}\s*=\s*Column\(", f.read(), re.MULTILINE) is not None
+
+
+def _partitioning_ready(specs, base_dir, app_dir, names):
+    """
+    Check what partitioned resources need from the project, and point relations
+    at partitioned models outside the batch through tenant_id. False on errors.
+    """
+    for spec in specs:
+        for name, relation in spec["relations"].items():
+            path = os.path.join(app_dir, "models", f"{relation['to']}.py")
+            if relation["to"] in names or not os.path.exists(path):
+                continue
+            with open(path, "r") as f:
+                if "hash_partitions(" not in f.read():
+                    continue
+            try:
+                reference_partitioned(spec, name)
+            except ValueError as e:
+                console.print(f"[bold red]Error:[/bold red] {e}")
+                return False
+
+    if not any(spec["partition_by"] for spec in specs):
+        return True
+    if not os.path.exists(os.path.join(app_dir, "models", "partitioning.py")):
+        console.print("[bold red]Error: app/models/partitioning.py not found; run 'hatchback upgrade' to add it.[/bold red]")
+        return False
+    env_path = os.path.join(base_dir, "alembic", "env.py")
+    if os.path.exists(env_path):
+        with open(env_path, "r") as f:
+            if "create_partitions" not in f.read():
+                console.print(
+                    "[yellow]Warning: alembic/env.py does not add partitions to autogenerated migrations; pass "
+                    "process_revision_directives=create_partitions (from app.migrations.partitions) to its "
+                    "context.configure(), or the partitioned tables will have no partitions to hold rows.[/yellow]"
+                )
+    return True
+
+
+def scaffold_resource(resource, base_dir=None, quiet=False):
+    """Generate one resource with the placeholder `name` column."""
+    scaffold_resources(resource_specs([resource]), base_dir=base_dir, quiet=quiet)
+
 
 def handle_make(args):
-    scaffold_resource(args.resource)
+    if not args.spec:
+        if not args.resource:
+            console.print("[bold red]Error: give a resource name or --spec, e.g. hatchback make product[/bold red]")
+            return
+        if args.partitions is not None and not args.partition_by:
+            console.print("[bold red]Error: --partitions needs --partition-by[/bold red]")
+            return
+        try:
+            specs = resource_specs(
+                [args.resource], tenant_scoped=args.tenant_scoped, partition_by=args.partition_by, partitions=args.partitions,
+            )
+        except ValueError as e:
+            console.print(f"[bold red]Error:[/bold red] {e}")
+            return
+        scaffold_resources(specs)
+        return
+
+    try:
+        spec = load_manifest(args.spec)
+        if not isinstance(spec, dict) or "resources" not in spec:
+            raise ValueError("expected a mapping with a 'resources' key")
+        specs = resource_specs(
+            spec["resources"], tenant_scoped=args.tenant_scoped, partition_by=args.partition_by, partitions=args.partitions,
+        )
+    except FileNotFoundError:
+        console.print(f"[bold red]Error: spec '{args.spec}' not found.[/bold red]")
+        sys.exit(1)
+    except ImportError:
+        console.print("[bold red]Error: YAML specs need PyYAML (pip install pyyaml), or use a JSON spec.[/bold red]")
+        sys.exit(1)
+    except Exception as e:
+        console.print(f"[bold red]Error: invalid spec '{args.spec}':[/bold red] {e}")
+        sys.exit(1)
+
+    if scaffold_resources(specs) is False:
+        sys.exit(1)
+    console.print(f"[bold green]✓ Scaffolded {len(specs)} resource(s) from {args.spec}.[/bold green]")
+    console.print("[dim]Next: hatchback migrate create -m \"add resources\"[/dim]")
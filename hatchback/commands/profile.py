@@ -0,0 +1,136 @@
+import os
+import sys
+import json
+import shutil
+import subprocess
+from rich.table import Table
+from ..utils import console, get_venv_executable
+
+SPEEDSCOPE_URL = "https://www.speedscope.app"
+
+def handle_profile(args):
+    if not os.path.exists(os.path.join("app", "diagnostics")):
+        console.print("[bold red]Error: app/diagnostics not found. Are you in the project root?[/bold red]")
+        console.print("Projects created before profiling support can get it with [bold]hatchback upgrade[/bold].")
+        return
+
+    if args.memory:
+        _profile_memory(args)
+        return
+
+    if not args.method or not args.path:
+        console.print("[bold red]Error: METHOD and PATH are required, e.g. hatchback profile GET /users[/bold red]")
+        return
+
+    cmd = ["profile", args.method, args.path, "--repeat", str(args.repeat), "--interval", str(args.interval)]
+    if args.output_dir:
+        cmd.extend(["--output-dir", args.output_dir])
+
+    console.print(f"[bold green]Profiling {args.method.upper()} {args.path}...[/bold green]")
+    summary = _run_diagnostics(cmd, args)
+    if summary is None:
+        return
+
+    console.print(f"Status: [bold]{summary['status']}[/bold]  Requests: {summary['requests']}  "
+                  f"Wall time: {summary['duration'] * 1000:.1f} ms")
+    console.print(f"Profile written to [bold cyan]{summary['profile']}[/bold cyan]")
+
+    if args.no_open:
+        return
+    if shutil.which("speedscope"):
+        subprocess.run(["speedscope", summary["profile"]])
+    else:
+        console.print(f"Open it at [link={SPEEDSCOPE_URL}]{SPEEDSCOPE_URL}[/link] (drag and drop the file),")
+        console.print("or install the viewer with [bold]npm install -g speedscope[/bold] to open it automatically.")
+
+
+def _profile_memory(args):
+    """
+    Drive each endpoint in a loop between two tracemalloc snapshots and report
+    how much memory stayed allocated. Steady growth per request is a leak
+    candidate; exits with status 1 when any endpoint exceeds --threshold.
+    """
+    endpoints = list(args.endpoint or [])
+    if args.method and args.path:
+        endpoints.insert(0, f"{args.method} {args.path}")
+
+    cmd = ["memory", "--iterations", str(args.iterations), "--warmup", str(args.warmup)]
+    for endpoint in endpoints:
+        cmd.extend(["--endpoint", endpoint])
+
+    console.print(f"[bold green]Measuring memory growth over {args.iterations} requests per endpoint...[/bold green]")
+    summary = _run_diagnostics(cmd, args)
+    if summary is None:
+        return
+
+    table = Table(title="Memory growth per endpoint")
+    table.add_column("Endpoint", style="cyan")
+    table.add_column("Status", justify="right")
+    table.add_column("Retained", justify="right")
+    table.add_column("Per request", justify="right")
+    table.add_column("Objects", justify="right")
+    table.add_column("RSS", justify="right")
+
+    suspects = []
+    for result in summary["results"]:
+        leaking = result["growth_per_request"] > args.threshold
+        if leaking:
+            suspects.append(result)
+        per_request = f"{result['growth_per_request']:,.0f} B"
+        table.add_row(
+            result["endpoint"],
+            str(result["status"]),
+            _format_bytes(result["growth"]),
+            f"[bold red]{per_request}[/bold red]" if leaking else per_request,
+            f"{result['objects']:+,}",
+            _format_bytes(result["rss_growth"]) if result["rss_growth"] is not None else "-",
+        )
+    console.print(table)
+
+    for result in suspects:
+        console.print(f"\n[bold yellow]Top allocation growth for {result['endpoint']}:[/bold yellow]")
+        for item in result["top"]:
+            console.print(f"  {_format_bytes(item['size_diff']):>10}  {item['count_diff']:+,} objects  {item['location']}")
+
+    if suspects:
+        console.print(f"\n[bold red]{len(suspects)} endpoint(s) retained more than {args.threshold} bytes per request.[/bold red]")
+        sys.exit(1)
+    console.print("\n[bold green]No endpoint exceeded the growth threshold.[/bold green]")
+
+
+def _run_diagnostics(diagnostics_args, args):
+    """Run `python -m app.diagnostics` in the project venv and return its JSON summary."""
+    python_cmd = get_venv_executable("python")
+    env = os.environ.copy()
+    env["PYTHONPATH"] = os.getcwd()
+
+    cmd = [python_cmd, "-m", "app.diagnostics"] + diagnostics_args
+    for header in args.header or []:
+        cmd.extend(["--header", header])
+    if args.data is not None:
+        cmd.extend(["--data", args.data])
+    if args.as_user:
+        cmd.extend(["--as-user", args.as_user])
+
+    try:
+        result = subprocess.run(cmd, env=env, capture_output=True, text=True)
+    except Exception as e:
+        console.print(f"[bold red]Error running diagnostics:[/bold red] {e}")
+        return None
+
+    lines = result.stdout.strip().splitlines()
+    if result.returncode != 0 or not lines:
+        console.print("[bold red]Error: profiling failed.[/bold red]")
+        console.print(result.stderr or result.stdout)
+        return None
+    return json.loads(lines[-1])
+
+
+def _format_bytes(size):
+    sign = "-" if size < 0 else "+"
+    size = abs(size)
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{sign}{size:,.0f} {unit}" if unit == "B" else f"{sign}{size:,.1f} {unit}"
+        size /= 1024
+    return f"{sign}{size:,.1f} GiB"
@@ -24,6 +24,7 @@ def remove_resource(resource, force=False):
         f"app/services/{resource}.py",
         f"app/routes/{resource}.py",
         f"tests/test_{resource}s.py",
+        f"benchmarks/bench_{resource}.py",
     ]
 
     existing_files = [f for f in files_to_remove if os.path.exists(os.path.join(base_dir, f))]
@@ -3,6 +3,16 @@ import sys
 import subprocess
 from ..utils import console, get_venv_executable
 
+# CLI flag -> environment variable read by the project's gunicorn.conf.py
+PROD_SETTINGS = {
+    "workers": "WEB_CONCURRENCY",
+    "keep_alive": "KEEP_ALIVE",
+    "backlog": "BACKLOG",
+    "max_requests": "MAX_REQUESTS",
+    "max_requests_jitter": "MAX_REQUESTS_JITTER",
+    "graceful_timeout": "GRACEFUL_TIMEOUT",
+}
+
 def handle_run(args):
     if not os.path.exists("app"):
         console.print("[bold red]Error: 'app' directory not found. Are you in the project root?[/bold red]")
@@ -11,18 +21,66 @@ def handle_run(args):
 
     python_exe = sys.executable
 
-    console.print(f"[bold green]Starting server on {args.host}:{args.port}...[/bold green]")
-    
     env = os.environ.copy()
     env["PYTHONPATH"] = os.getcwd()
 
+    if getattr(args, "prod", False):
+        cmd = _build_prod_command(python_exe, args, env)
+        if cmd is None:
+            return
+    else:
+        console.print(f"[bold green]Starting server on {args.host}:{args.port}...[/bold green]")
+        cmd = [python_exe, "-m", "uvicorn", "app.main:app", "--reload", "--host", args.host, "--port", str(args.port)]
+
     try:
-        subprocess.run(
-            [python_exe, "-m", "uvicorn", "app.main:app", "--reload", "--host", args.host, "--port", str(args.port)], 
-            check=True,
-            env=env
-        )
+        subprocess.run(cmd, check=True, env=env)
     except KeyboardInterrupt:
         console.print("\n[yellow]Server stopped.[/yellow]")
     except Exception as e:
         console.print(f"[bold red]Error running server:[/bold red] {e}")
+
+
+def _build_prod_command(python_exe, args, env):
+    """
+    Build the production server command.
+
+    Gunicorn is used as the process manager with the project's gunicorn.conf.py,
+    which preloads the app, freezes the GC before forking and recycles workers.
+    CLI flags are passed through environment variables so the Dockerfile CMD and
+    `hbk run --prod` share a single source of configuration.
+    """
+    env["HOST"] = args.host
+    env["PORT"] = str(args.port)
+    for option, env_var in PROD_SETTINGS.items():
+        value = getattr(args, option, None)
+        if value is not None:
+            env[env_var] = str(value)
+
+    workers = env.get("WEB_CONCURRENCY", os.cpu_count() or 1)
+
+    if os.name == "nt":
+        # Gunicorn does not run on Windows. Fall back to uvicorn's own
+        # multi-process supervisor (no preload, no copy-on-write sharing).
+        console.print("[yellow]Warning: gunicorn is not available on Windows. Falling back to uvicorn workers without preload.[/yellow]")
+        cmd = [
+            python_exe, "-m", "uvicorn", "app.main:app",
+            "--host", args.host, "--port", str(args.port),
+            "--workers", str(workers),
+            "--timeout-keep-alive", env.get("KEEP_ALIVE", "5"),
+            "--backlog", env.get("BACKLOG", "2048"),
+            "--timeout-graceful-shutdown", env.get("GRACEFUL_TIMEOUT", "30"),
+        ]
+        if "MAX_REQUESTS" in env:
+            cmd += ["--limit-max-requests", env["MAX_REQUESTS"]]
+        console.print(f"[bold green]Starting production server on {args.host}:{args.port} with {workers} workers...[/bold green]")
+        return cmd
+
+    config_path = os.path.join(os.getcwd(), "gunicorn.conf.py")
+    if not os.path.exists(config_path):
+        console.print("[bold red]Error: gunicorn.conf.py not found in the project root.[/bold red]")
+        console.print("Run [bold]hatchback upgrade[/bold] to add it to an existing project.")
+        return None
+
+    console.print(f"[bold green]Starting production server on {args.host}:{args.port} with {workers} workers...[/bold green]")
+    console.print("[dim]Send SIGHUP to the master process for a graceful reload.[/dim]")
+    return [python_exe, "-m", "gunicorn", "app.main:app", "-c", config_path]
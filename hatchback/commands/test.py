@@ -1,12 +1,154 @@
+import glob
+import os
+import shutil
+import socket
 import subprocess
+import sys
+import tempfile
+from contextlib import contextmanager, nullcontext
+
+from ..test_impact import COVERAGE_PATH, ImpactMap, changed_files
 from ..utils import console, get_venv_executable
 
+# Tuned for throwaway data: durability costs time and protects nothing here
+EPHEMERAL_SETTINGS = "-F -c synchronous_commit=off -c full_page_writes=off -c max_connections=200"
+
+
+def _postgres_bindir():
+    """The directory holding initdb and pg_ctl, or None."""
+    pg_ctl = shutil.which("pg_ctl")
+    if pg_ctl:
+        return os.path.dirname(pg_ctl)
+    pg_config = shutil.which("pg_config")
+    if pg_config:
+        bindir = subprocess.run([pg_config, "--bindir"], capture_output=True, text=True).stdout.strip()
+        if os.path.exists(os.path.join(bindir, "pg_ctl")):
+            return bindir
+    # Debian/Ubuntu keep the server binaries off the PATH
+    candidates = glob.glob("/usr/lib/postgresql/*/bin/pg_ctl")
+    candidates.sort(key=lambda path: int(path.split("/")[4]) if path.split("/")[4].isdigit() else 0)
+    return os.path.dirname(candidates[-1]) if candidates else None
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def temporary_postgres():
+    """
+    Start a private PostgreSQL server on a temp dir and yield a URL naming
+    its test databases. The server and its files are removed on exit.
+    """
+    bindir = _postgres_bindir()
+    if bindir is None:
+        raise RuntimeError("no PostgreSQL server binaries (initdb, pg_ctl) found; install PostgreSQL or pass --postgres URL")
+    if hasattr(os, "geteuid") and os.geteuid() == 0:
+        raise RuntimeError("PostgreSQL refuses to run as root; run as another user or pass --postgres URL")
+
+    directory = tempfile.mkdtemp(prefix="hatchback-pg-")
+    data = os.path.join(directory, "data")
+    port = _free_port()
+    try:
+        subprocess.run(
+            [os.path.join(bindir, "initdb"), "-D", data, "-U", "postgres", "-A", "trust", "-E", "UTF8", "--no-sync"],
+            check=True, capture_output=True, text=True,
+        )
+        subprocess.run(
+            [
+                os.path.join(bindir, "pg_ctl"), "-D", data, "-l", os.path.join(directory, "server.log"), "-w",
+                "-o", f"-p {port} -k {directory} -c listen_addresses=127.0.0.1 {EPHEMERAL_SETTINGS}",
+                "start",
+            ],
+            check=True, capture_output=True, text=True,
+        )
+    except subprocess.CalledProcessError as e:
+        shutil.rmtree(directory, ignore_errors=True)
+        raise RuntimeError(f"could not start PostgreSQL: {(e.stderr or e.stdout).strip()}")
+
+    try:
+        yield f"postgresql://postgres@127.0.0.1:{port}/hatchback_test"
+    finally:
+        subprocess.run([os.path.join(bindir, "pg_ctl"), "-D", data, "-m", "immediate", "-w", "stop"], capture_output=True)
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def _has_module(name):
+    """Whether the project environment can import name."""
+    python = get_venv_executable("python")
+    return subprocess.run([python, "-c", f"import {name}"], capture_output=True).returncode == 0
+
+
+def _run_pytest(command, env):
+    try:
+        return subprocess.run(command, env=env).returncode
+    except FileNotFoundError:
+        console.print("[bold red]Error: pytest not found. Activate the project's virtual environment or create ./venv.[/bold red]")
+        return 1
+
+
 def handle_test(args):
     pytest_cmd = get_venv_executable("pytest")
-    console.print("[bold green]Running tests...[/bold green]")
-    try:
-        subprocess.run([pytest_cmd], check=True)
-    except subprocess.CalledProcessError:
+    command = [pytest_cmd]
+    if args.workers:
+        if not _has_module("xdist"):
+            console.print("[bold red]Error: -n needs pytest-xdist. Install it with: pip install pytest-xdist[/bold red]")
+            sys.exit(1)
+        command += ["-n", args.workers]
+
+    env = os.environ.copy()
+    impact = selected = None
+    if args.changed:
+        try:
+            changed = changed_files(args.changed)
+        except RuntimeError as e:
+            console.print(f"[bold red]Error: cannot list changed files: {e}[/bold red]")
+            sys.exit(1)
+        impact = ImpactMap()
+        coverage = _has_module("pytest_cov")
+        if not coverage:
+            console.print("[yellow]pytest-cov is not installed; mapping tests by imports only, so tests using `client` run on any app change.[/yellow]")
+        selected, reason = impact.select(changed, coverage)
+        if selected is None:
+            console.print(f"[bold]{reason}: running every test.[/bold]")
+        elif not selected:
+            console.print(f"[bold green]No tests affected by {len(changed)} changed file(s).[/bold green]")
+            impact.update([], coverage)
+            return
+        else:
+            console.print(
+                f"[bold]{len(changed)} changed file(s): running {len(selected)} of {len(impact.tests)} test files[/bold]"
+                + (f" [dim]({reason})[/dim]" if reason else "")
+            )
+        if coverage:
+            # Per-test contexts tell which app files each test executed; kept apart from the user's .coverage
+            command += ["--cov=app", "--cov-context=test", "--cov-report="]
+            env["COVERAGE_FILE"] = COVERAGE_PATH
+            os.makedirs(os.path.dirname(COVERAGE_PATH), exist_ok=True)
+        command += selected or []
+
+    if args.postgres is None:
+        console.print("[bold green]Running tests...[/bold green]")
+        returncode = _run_pytest(command, env)
+    else:
+        url = args.postgres or os.environ.get("TEST_DATABASE_URL")
+        if not url:
+            console.print("[dim]No PostgreSQL configured; starting a temporary server...[/dim]")
+        try:
+            with nullcontext(url) if url else temporary_postgres() as url:
+                console.print(f"[bold green]Running tests on PostgreSQL[/bold green] [dim]{url.split('@')[-1]}[/dim]")
+                env["TEST_DATABASE_URL"] = url
+                returncode = _run_pytest(command, env)
+        except RuntimeError as e:
+            console.print(f"[bold red]Error: {e}[/bold red]")
+            sys.exit(1)
+
+    # 0: passed, 1: some failed; either way the run recorded what each test executed
+    if impact is not None and returncode in (0, 1):
+        impact.update(impact.tests if selected is None else selected, coverage)
+
+    if returncode:
         console.print("[bold red]Tests failed.[/bold red]")
-    except Exception as e:
-        console.print(f"[bold red]Error running tests:[/bold red] {e}")
+        sys.exit(returncode)
@@ -10,6 +10,13 @@ from ..utils import console
 # Docker files are explicitly excluded per design decision.
 UPGRADE_PATHS = [
     ".github/skills",
+    "gunicorn.conf.py",
+    "app/diagnostics",
+    "app/migrations",
+    "app/models/partitioning.py",
+    "benchmarks/__init__.py",
+    "benchmarks/__main__.py",
+    "benchmarks/runner.py",
 ]
 
 # Files that should NEVER be overwritten by upgrade
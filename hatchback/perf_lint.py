@@ -0,0 +1,614 @@
+"""
+Static performance checks for generated projects, run by `hatchback doctor`.
+
+The project is parsed with `ast`, never imported. Calls are resolved only as
+far as the source makes plain: import aliases, parameter annotations, local
+`x = Class(...)` assignments and the `self.x = ...` assignments of __init__.
+Whatever cannot be resolved is left alone, so the checks err towards silence
+rather than noise.
+"""
+import ast
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Set
+
+RULES = {
+    "HBK001": "blocking call in an async route",
+    "HBK002": "unbounded query",
+    "HBK003": "pagination or counting in Python",
+    "HBK004": "query in a loop",
+    "HBK005": "filter on an unindexed column",
+    "HBK006": "heavy object built per request",
+}
+
+HTTP_METHODS = {"get", "post", "put", "patch", "delete", "head", "options", "api_route", "websocket"}
+
+# Calls that block the calling thread (a trailing dot matches the whole module)
+BLOCKING_CALLS = (
+    "time.sleep", "bcrypt.", "requests.", "urllib.request.urlopen", "subprocess.", "smtplib.",
+    "socket.create_connection", "psycopg2.connect", "open",
+)
+
+# Constructors that open connections, pools or clients: build once, not per request
+HEAVY_CONSTRUCTORS = {
+    "mailersend.MailerSendClient", "httpx.Client", "httpx.AsyncClient", "requests.Session",
+    "sqlalchemy.create_engine", "sqlalchemy.ext.asyncio.create_async_engine", "passlib.context.CryptContext",
+    "redis.Redis", "redis.StrictRedis", "redis.from_url", "redis.asyncio.Redis", "boto3.client", "boto3.resource",
+    "pymongo.MongoClient", "elasticsearch.Elasticsearch", "concurrent.futures.ThreadPoolExecutor",
+    "concurrent.futures.ProcessPoolExecutor", "openai.OpenAI", "anthropic.Anthropic",
+}
+
+# Session methods that run SQL
+SESSION_QUERIES = {"query", "execute", "scalars", "scalar", "get", "commit", "flush", "refresh", "merge"}
+SESSION_NAMES = {"db", "session", "db_session"}
+
+NOQA = re.compile(r"#\s*noqa:\s*([A-Z0-9, ]+)")
+
+DATABASE = "the database"
+
+
+@dataclass
+class Finding:
+    path: str
+    line: int
+    column: int
+    rule: str
+    message: str
+
+
+@dataclass
+class Model:
+    table: str
+    columns: Set[str]
+    indexed: Set[str]
+
+
+class _Module:
+    def __init__(self, path, source):
+        self.path = path
+        self.source = source
+        self.lines = source.splitlines()
+        self.tree = ast.parse(source)
+        self.imports = {}
+        for node in ast.walk(self.tree):
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    self.imports[alias.asname or alias.name.split(".")[0]] = alias.name if alias.asname else alias.name.split(".")[0]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                for alias in node.names:
+                    self.imports[alias.asname or alias.name] = f"{node.module}.{alias.name}"
+
+    def segment(self, node):
+        """The source text of node, on one line."""
+        return " ".join((ast.get_source_segment(self.source, node) or "").split())
+
+    def resolve(self, node):
+        """The dotted name a call target refers to, with import aliases expanded."""
+        parts = []
+        while isinstance(node, ast.Attribute):
+            parts.append(node.attr)
+            node = node.value
+        if not isinstance(node, ast.Name):
+            return None
+        parts.append(self.imports.get(node.id, node.id))
+        return ".".join(reversed(parts))
+
+
+class _Class:
+    def __init__(self, module, node):
+        self.module = module
+        self.node = node
+        self.name = node.name
+        self.bases = [base.id if isinstance(base, ast.Name) else getattr(base, "attr", None) for base in node.bases]
+        self.methods = {item.name: item for item in node.body if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef))}
+        # self.<attr> -> class name, "Session" or a model name (for self.model)
+        self.attributes = {}
+        self.model = None
+        init = self.methods.get("__init__")
+        if init is None:
+            return
+        annotations = _annotations(init)
+        for node in ast.walk(init):
+            if isinstance(node, ast.Assign):
+                for target in node.targets:
+                    if isinstance(target, ast.Attribute) and isinstance(target.value, ast.Name) and target.value.id == "self":
+                        value = node.value
+                        if isinstance(value, ast.Call) and isinstance(value.func, ast.Name):
+                            self.attributes[target.attr] = value.func.id
+                        elif isinstance(value, ast.Name) and value.id in annotations:
+                            self.attributes[target.attr] = annotations[value.id]
+                        elif isinstance(value, ast.Name) and target.attr == "model":
+                            self.model = value.id
+                        if target.attr in SESSION_NAMES:
+                            self.attributes.setdefault(target.attr, "Session")
+            elif (
+                isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == "__init__"
+                and isinstance(node.func.value, ast.Call) and getattr(node.func.value.func, "id", None) == "super"
+                and len(node.args) >= 2 and isinstance(node.args[1], ast.Name)
+            ):
+                # BaseRepository subclasses: super().__init__(db, Model)
+                self.model = node.args[1].id
+
+
+def _annotations(function):
+    """{parameter: annotated class name} for a function's parameters."""
+    found = {}
+    args = function.args
+    for arg in args.posonlyargs + args.args + args.kwonlyargs:
+        annotation = arg.annotation
+        if isinstance(annotation, ast.Subscript):
+            annotation = annotation.value
+        if isinstance(annotation, ast.Name):
+            found[arg.arg] = annotation.id
+        elif isinstance(annotation, ast.Attribute):
+            found[arg.arg] = annotation.attr
+    return found
+
+
+def _defaults(function):
+    """{parameter: default node} for a function's parameters."""
+    args = function.args
+    positional = args.posonlyargs + args.args
+    found = dict(zip([arg.arg for arg in positional[len(positional) - len(args.defaults):]], args.defaults))
+    found.update({arg.arg: default for arg, default in zip(args.kwonlyargs, args.kw_defaults) if default is not None})
+    return found
+
+
+def _chain(node):
+    """([(method, call), ...] outermost last, root expression) for a call chain like db.query(X).filter(...).all()."""
+    calls = []
+    while isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+        calls.append((node.func.attr, node))
+        node = node.func.value
+    return list(reversed(calls)), node
+
+
+def _walk(node):
+    """ast.walk that does not descend into nested functions, classes or lambdas."""
+    pending = list(ast.iter_child_nodes(node))
+    while pending:
+        child = pending.pop()
+        yield child
+        if not isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)):
+            pending.extend(ast.iter_child_nodes(child))
+
+
+def _is_route(function):
+    return any(
+        isinstance(decorator, ast.Call) and isinstance(decorator.func, ast.Attribute) and decorator.func.attr in HTTP_METHODS
+        for decorator in function.decorator_list
+    )
+
+
+def _name(node):
+    """The last segment of a Name or Attribute (what a decorator or call is called)."""
+    return node.id if isinstance(node, ast.Name) else getattr(node, "attr", None)
+
+
+def _is_cached(function):
+    return any(
+        _name(decorator.func if isinstance(decorator, ast.Call) else decorator) in ("lru_cache", "cache")
+        for decorator in function.decorator_list
+    )
+
+
+class _Scope:
+    """What the names inside one function refer to."""
+
+    def __init__(self, linter, module, function, cls=None):
+        self.linter = linter
+        self.module = module
+        self.function = function
+        self.cls = cls
+        self.types = dict(_annotations(function))
+        self.assignments = {}
+        for node in _walk(function):
+            if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+                name = node.targets[0].id
+                self.assignments.setdefault(name, []).append(node.value)
+                if isinstance(node.value, ast.Call) and isinstance(node.value.func, ast.Name) and node.value.func.id in linter.classes:
+                    self.types[name] = node.value.func.id
+
+    def type_of(self, node):
+        """The class name (or "Session") an expression holds, when the source says so."""
+        if isinstance(node, ast.Name):
+            if node.id in self.types:
+                return self.types[node.id]
+            return "Session" if node.id in SESSION_NAMES else None
+        if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id == "self" and self.cls:
+            found = self.linter.attribute(self.cls, node.attr)
+            return found or ("Session" if node.attr in SESSION_NAMES else None)
+        return None
+
+    def model_of(self, node):
+        """The model class an expression such as `User` or `self.model` names."""
+        if isinstance(node, ast.Name) and node.id in self.linter.models:
+            return node.id
+        if (
+            isinstance(node, ast.Attribute) and node.attr == "model" and isinstance(node.value, ast.Name)
+            and node.value.id == "self" and self.cls
+        ):
+            return self.linter.class_model(self.cls)
+        return None
+
+    def blocking(self, call):
+        """Why a call blocks the thread, or None."""
+        dotted = self.module.resolve(call.func)
+        if dotted and any(dotted == name or (name.endswith(".") and dotted.startswith(name)) for name in BLOCKING_CALLS):
+            return dotted
+        if not isinstance(call.func, ast.Attribute):
+            return None
+        chain, root = _chain(call)
+        if any(method == "query" for method, _ in chain):
+            return DATABASE
+        receiver = call.func.value
+        kind = self.type_of(receiver)
+        if kind == "Session" and call.func.attr in SESSION_QUERIES:
+            return DATABASE
+        if isinstance(receiver, ast.Name) and receiver.id == "self" and self.cls:
+            return self.linter.method_blocks(self.cls, call.func.attr)
+        if kind in self.linter.classes:
+            reason = self.linter.method_blocks(kind, call.func.attr)
+            return reason
+        return None
+
+    def queries(self, call):
+        """Whether a call runs SQL, directly or through project methods."""
+        return self.blocking(call) == DATABASE
+
+
+class Linter:
+    """
+    Lints the modules under paths. The whole app/ package is always parsed,
+    so calls into modules outside paths still resolve.
+    """
+
+    def __init__(self, root=".", paths=("app",)):
+        self.root = root
+        self.modules = []
+        self.errors = []
+        self.paths = [os.path.normpath(path).replace(os.sep, "/") for path in paths]
+        parsed = set()
+        for path in dict.fromkeys(["app", *paths]):
+            full = os.path.join(root, path)
+            files = [full] if os.path.isfile(full) else [
+                os.path.join(dirpath, filename)
+                for dirpath, dirnames, filenames in os.walk(full)
+                if "__pycache__" not in dirpath
+                for filename in sorted(filenames) if filename.endswith(".py")
+            ]
+            for file in sorted(files):
+                relative = os.path.relpath(file, root).replace(os.sep, "/")
+                if relative in parsed:
+                    continue
+                parsed.add(relative)
+                try:
+                    with open(file, "r") as f:
+                        self.modules.append(_Module(relative, f.read()))
+                except (SyntaxError, UnicodeDecodeError) as e:
+                    self.errors.append(f"{relative}: cannot parse ({e})")
+
+        self.classes: Dict[str, _Class] = {}
+        self.functions = {}
+        for module in self.modules:
+            for node in module.tree.body:
+                if isinstance(node, ast.ClassDef):
+                    self.classes[node.name] = _Class(module, node)
+                elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    self.functions.setdefault(node.name, node)
+        self.models = {name: model for name, cls in self.classes.items() if (model := _model(cls.node))}
+        self.dependencies = self._dependencies()
+        self._blocks = {}
+        self._heavy = {}
+        self.findings: List[Finding] = []
+
+    # -- project lookups --------------------------------------------------
+
+    def _lineage(self, name, seen=None):
+        """The class and its project base classes, nearest first."""
+        seen = seen if seen is not None else set()
+        cls = self.classes.get(name)
+        if cls is None or name in seen:
+            return []
+        seen.add(name)
+        lineage = [cls]
+        for base in cls.bases:
+            lineage += self._lineage(base, seen)
+        return lineage
+
+    def attribute(self, name, attr):
+        for cls in self._lineage(name):
+            if attr in cls.attributes:
+                return cls.attributes[attr]
+        return None
+
+    def class_model(self, name):
+        for cls in self._lineage(name):
+            if cls.model in self.models:
+                return cls.model
+        return None
+
+    def method_blocks(self, name, method):
+        """Why calling a project class's method blocks the thread (None for async or unknown methods)."""
+        key = (name, method)
+        if key in self._blocks:
+            return self._blocks[key]
+        self._blocks[key] = None  # cycle guard
+        for cls in self._lineage(name):
+            function = cls.methods.get(method)
+            if function is None:
+                continue
+            if isinstance(function, ast.AsyncFunctionDef):
+                break
+            scope = _Scope(self, cls.module, function, cls.name)
+            reasons = [scope.blocking(node) for node in _walk(function) if isinstance(node, ast.Call)]
+            reasons = [reason for reason in reasons if reason]
+            if reasons:
+                # The database first: it is what HBK004 looks for
+                self._blocks[key] = DATABASE if DATABASE in reasons else reasons[0]
+            break
+        return self._blocks[key]
+
+    def heavy(self, name, seen=None):
+        """What a project class's constructor builds that should be built once, or None."""
+        if name in self._heavy:
+            return self._heavy[name]
+        self._heavy[name] = None
+        for cls in self._lineage(name):
+            init = cls.methods.get("__init__")
+            if init is None:
+                continue
+            for node in _walk(init):
+                if not isinstance(node, ast.Call):
+                    continue
+                dotted = cls.module.resolve(node.func)
+                if dotted in HEAVY_CONSTRUCTORS:
+                    self._heavy[name] = dotted
+                elif isinstance(node.func, ast.Name) and node.func.id in self.classes and node.func.id != name:
+                    inner = self.heavy(node.func.id)
+                    if inner:
+                        self._heavy[name] = f"{inner} (via {node.func.id})"
+                if self._heavy[name]:
+                    return self._heavy[name]
+            break
+        return self._heavy[name]
+
+    def _dependencies(self):
+        """Names of the functions used as FastAPI dependencies (Depends(name))."""
+        names = set()
+        for module in self.modules:
+            for node in ast.walk(module.tree):
+                if isinstance(node, ast.Call) and _name(node.func) == "Depends" and node.args:
+                    if isinstance(node.args[0], (ast.Name, ast.Attribute)):
+                        names.add(_name(node.args[0]))
+        return names
+
+    # -- running ----------------------------------------------------------
+
+    def report(self, module, node, rule, message):
+        line = module.lines[node.lineno - 1] if node.lineno <= len(module.lines) else ""
+        noqa = NOQA.search(line)
+        if noqa and rule in {code.strip() for code in noqa.group(1).split(",")}:
+            return
+        finding = Finding(module.path, node.lineno, node.col_offset + 1, rule, message)
+        if finding not in self.findings:
+            self.findings.append(finding)
+
+    def _linted(self, module):
+        return any(path == "." or module.path == path or module.path.startswith(path + "/") for path in self.paths)
+
+    def run(self, select=None):
+        for module in filter(self._linted, self.modules):
+            for node in module.tree.body:
+                if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    self._function(_Scope(self, module, node))
+                elif isinstance(node, ast.ClassDef):
+                    for item in node.body:
+                        if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                            self._function(_Scope(self, module, item, node.name))
+        findings = [f for f in self.findings if select is None or f.rule in select]
+        return sorted(findings, key=lambda f: (f.path, f.line, f.column, f.rule))
+
+    def _function(self, scope):
+        function = scope.function
+        per_request = (_is_route(function) or function.name in self.dependencies) and not _is_cached(function)
+        if isinstance(function, ast.AsyncFunctionDef) and _is_route(function):
+            self._blocking_calls(scope)
+        if per_request:
+            self._heavy_constructions(scope)
+        self._loops(scope)
+        for node in _walk(function):
+            if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+                if node.func.attr == "all" and not node.args:
+                    self._unbounded(scope, node)
+                elif node.func.attr == "offset":
+                    self._unordered(scope, node)
+                elif node.func.attr in ("filter", "where", "filter_by"):
+                    self._unindexed(scope, node)
+            if isinstance(node, ast.Subscript) and isinstance(node.slice, ast.Slice) and self._loads_all(scope, node.value):
+                self.report(scope.module, node, "HBK003",
+                            "slices a full result set in Python: every row is loaded to return one page; "
+                            "pass skip/limit down to the query (.offset().limit())")
+            if (
+                isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == "len"
+                and len(node.args) == 1 and self._loads_all(scope, node.args[0])
+            ):
+                self.report(scope.module, node, "HBK003",
+                            "counts rows by loading them all; use query.count() or select(func.count())")
+
+    # -- rules ------------------------------------------------------------
+
+    def _blocking_calls(self, scope):
+        awaited = {id(node.value) for node in _walk(scope.function) if isinstance(node, ast.Await)}
+        for node in _walk(scope.function):
+            if not isinstance(node, ast.Call) or id(node) in awaited:
+                continue
+            reason = scope.blocking(node)
+            if reason is None:
+                continue
+            target = scope.module.segment(node.func)
+            via = "" if reason in (DATABASE, target) or target.endswith(reason) else f" ({reason})"
+            what = "blocks on the database" if reason == DATABASE else f"blocks{via or ''}"
+            self.report(scope.module, node, "HBK001",
+                        f"async def {scope.function.name} calls {target}(), which {what} and stalls the event loop "
+                        f"for every request; declare the route with def (FastAPI runs it in a threadpool) "
+                        f"or await run_in_threadpool(...)")
+
+    def _heavy_constructions(self, scope):
+        for node in _walk(scope.function):
+            if not isinstance(node, ast.Call):
+                continue
+            dotted = scope.module.resolve(node.func)
+            if dotted in HEAVY_CONSTRUCTORS:
+                reason, name = dotted, dotted
+            elif isinstance(node.func, ast.Name) and node.func.id in self.classes and (reason := self.heavy(node.func.id)):
+                name = node.func.id
+            else:
+                continue
+            builds = "" if name == reason else f" and builds {reason}"
+            self.report(scope.module, node, "HBK006",
+                        f"{name} is constructed on every request{builds}; create it once "
+                        f"(at import, with functools.lru_cache or on app.state) and share it")
+
+    def _loops(self, scope):
+        bodies = []
+        for node in _walk(scope.function):
+            if isinstance(node, (ast.For, ast.AsyncFor, ast.While)):
+                bodies.append(node.body + node.orelse)
+            elif isinstance(node, (ast.ListComp, ast.SetComp, ast.GeneratorExp, ast.DictComp)):
+                parts = [node.key, node.value] if isinstance(node, ast.DictComp) else [node.elt]
+                for generator in node.generators:
+                    parts += generator.ifs
+                parts += [generator.iter for generator in node.generators[1:]]
+                bodies.append(parts)
+        for body in bodies:
+            nodes = [node for statement in body for node in [statement, *_walk(statement)]]
+            # Report a chain like db.query(X).filter(...).first() once, at its outermost call
+            links = {id(node.func.value) for node in nodes if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)}
+            for node in nodes:
+                if isinstance(node, ast.Call) and id(node) not in links and scope.queries(node):
+                        self.report(scope.module, node, "HBK004",
+                                    f"{scope.module.segment(node.func)}() runs a query on every iteration (N+1); fetch the rows "
+                                    f"in one query (filter with .in_(), join, or selectinload) before the loop")
+
+    def _query_chain(self, scope, node):
+        """(method names, calls) of a query chain, following a variable back to its assignments."""
+        chain, root = _chain(node)
+        names = [method for method, _ in chain]
+        calls = [call for _, call in chain]
+        if isinstance(root, ast.Name) and root.id in scope.assignments:
+            for value in scope.assignments[root.id]:
+                inner, _ = _chain(value)
+                names += [method for method, _ in inner]
+                calls += [call for _, call in inner]
+        if not ({"query", "scalars", "select"} & set(names)):
+            return None, None
+        return names, calls
+
+    def _unbounded(self, scope, node):
+        names, calls = self._query_chain(scope, node)
+        if names is None:
+            return
+        if "limit" not in names:
+            self.report(scope.module, node, "HBK002",
+                        ".all() without .limit() loads every matching row; bound it or paginate")
+            return
+        defaults = _defaults(scope.function)
+        for method, call in zip(names, calls):
+            if method == "limit" and call.args and isinstance(call.args[0], ast.Name):
+                default = defaults.get(call.args[0].id)
+                if isinstance(default, ast.Constant) and default.value is None:
+                    self.report(scope.module, node, "HBK002",
+                                f".all() is unbounded when {call.args[0].id} is None, its default; "
+                                f"give it a finite default")
+                    return
+
+    def _unordered(self, scope, node):
+        names, _ = self._query_chain(scope, node)
+        if names is None or "order_by" in names:
+            return
+        message = "OFFSET without ORDER BY: rows come back in no set order, so pages can repeat or skip rows"
+        params = {arg.arg for arg in scope.function.args.args}
+        used = {name.id for name in _walk(scope.function) if isinstance(name, ast.Name)}
+        if "order_by" in params and "order_by" not in used:
+            message += f"; {scope.function.name}() takes order_by but never uses it"
+        self.report(scope.module, node, "HBK003", message)
+
+    def _loads_all(self, scope, node):
+        if not isinstance(node, ast.Call) or not isinstance(node.func, ast.Attribute):
+            return False
+        name = node.func.attr
+        return (name == "all" and not node.args) or name.startswith(("get_all", "find_all", "list_all"))
+
+    def _unindexed(self, scope, node):
+        columns = []
+        if node.func.attr == "filter_by":
+            chain, root = _chain(node)
+            model = None
+            for method, call in chain:
+                if method == "query" and call.args:
+                    model = scope.model_of(call.args[0])
+            if model:
+                columns = [(model, keyword.arg) for keyword in node.keywords if keyword.arg]
+        else:
+            for arg in node.args:
+                for item in [arg, *ast.walk(arg)]:
+                    if isinstance(item, ast.Compare) and isinstance(item.ops[0], (ast.Eq, ast.In, ast.Is)):
+                        column = item.left
+                    elif isinstance(item, ast.Call) and isinstance(item.func, ast.Attribute) and item.func.attr in ("in_", "is_"):
+                        column = item.func.value
+                    else:
+                        continue
+                    if isinstance(column, ast.Attribute):
+                        model = scope.model_of(column.value)
+                        if model:
+                            columns.append((model, column.attr))
+        columns = [(model, column) for model, column in columns if column in self.models[model].columns]
+        if not columns or any(column in self.models[model].indexed for model, column in columns):
+            return
+        model, column = columns[0]
+        self.report(scope.module, node, "HBK005",
+                    f"filters on {self.models[model].table}.{column}, which has no index, so every call scans the "
+                    f"table; add index=True to the column (or an Index in __table_args__)")
+
+
+def _model(node):
+    """The table and column indexes of a declarative model class, or None."""
+    table = None
+    columns, indexed = set(), set()
+    for item in node.body:
+        if not isinstance(item, ast.Assign) or len(item.targets) != 1 or not isinstance(item.targets[0], ast.Name):
+            continue
+        name, value = item.targets[0].id, item.value
+        if name == "__tablename__" and isinstance(value, ast.Constant):
+            table = value.value
+        elif name == "__table_args__":
+            for call in ast.walk(value):
+                kind = _name(call.func) if isinstance(call, ast.Call) else None
+                if kind not in ("Index", "UniqueConstraint", "PrimaryKeyConstraint"):
+                    continue
+                # A composite index serves filters on its leading column; Index() is named first
+                leading = call.args[1:2] if kind == "Index" else call.args[:1]
+                for first in leading:
+                    if isinstance(first, ast.Constant) and isinstance(first.value, str):
+                        indexed.add(first.value)
+                    elif isinstance(first, (ast.Attribute, ast.Name)):
+                        indexed.add(_name(first))
+        elif isinstance(value, ast.Call) and _name(value.func) in ("Column", "mapped_column"):
+            columns.add(name)
+            if any(
+                keyword.arg in ("index", "unique", "primary_key")
+                and isinstance(keyword.value, ast.Constant) and keyword.value.value is True
+                for keyword in value.keywords
+            ):
+                indexed.add(name)
+    if table is None:
+        return None
+    return Model(table, columns, indexed)
+
+
+def lint(root=".", paths=("app",), select=None):
+    """(findings, parse errors) for the project at root."""
+    linter = Linter(root, paths)
+    return linter.run(select), linter.errors
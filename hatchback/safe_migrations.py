@@ -0,0 +1,340 @@
+"""
+Rewrite autogenerated Alembic migrations into online (non-blocking) PostgreSQL
+equivalents for `hatchback migrate create --safe`.
+
+The migration source is parsed with `ast` and each top-level `op.*` call in
+upgrade() and downgrade() is replaced in place; everything else in the file
+is left byte-for-byte. Operations on tables created in the same function are
+not rewritten, since nothing can be waiting on a table that does not exist yet.
+"""
+import ast
+import re
+
+ONLINE_IMPORT = "from app.migrations import online"
+
+# Defaults PostgreSQL evaluates per row, so adding a column with one rewrites the table
+VOLATILE_DEFAULT = re.compile(
+    r"\b(random|gen_random_uuid|uuid_generate_v[14]|clock_timestamp|timeofday|nextval)\s*\(", re.IGNORECASE
+)
+
+SIGNATURES = {
+    "create_index": ["index_name", "table_name", "columns"],
+    "drop_index": ["index_name", "table_name"],
+    "create_foreign_key": ["constraint_name", "source_table", "referent_table", "local_cols", "remote_cols"],
+    "create_check_constraint": ["constraint_name", "table_name", "condition"],
+    "create_unique_constraint": ["constraint_name", "table_name", "columns"],
+    "drop_constraint": ["constraint_name", "table_name"],
+    "add_column": ["table_name", "column"],
+    "alter_column": ["table_name", "column_name"],
+}
+
+# What makes each plain operation a no-op when it already ran. Autocommit
+# blocks (concurrent index builds, the online.* helpers) commit what came
+# before them, so a retried revision re-runs operations that are applied already
+IDEMPOTENT = {
+    "create_table": "if_not_exists",
+    "add_column": "if_not_exists",
+    "create_index": "if_not_exists",
+    "drop_table": "if_exists",
+    "drop_column": "if_exists",
+    "drop_index": "if_exists",
+    "drop_constraint": "if_exists",
+}
+
+
+class Unsupported(Exception):
+    """An operation the rewriter cannot make online; it is kept and reported."""
+
+
+def _quote(identifier):
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _columns(names):
+    return ", ".join(_quote(name) for name in names)
+
+
+def _literal(node):
+    """Evaluate a literal argument, unwrapping op.f('name')."""
+    if (
+        isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+        and node.func.attr == "f" and len(node.args) == 1
+    ):
+        node = node.args[0]
+    try:
+        return ast.literal_eval(node)
+    except ValueError:
+        raise Unsupported("non-literal argument")
+
+
+def _sql_text(node):
+    """The SQL of sa.text('...') / text('...') or a string literal, else None."""
+    if isinstance(node, ast.Call) and getattr(node.func, "attr", getattr(node.func, "id", None)) == "text" and node.args:
+        node = node.args[0]
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    return None
+
+
+class _Call:
+    def __init__(self, source, node, signature):
+        self.source = source
+        self.node = node
+        self.args = {}
+        for name, arg in zip(signature, node.args):
+            self.args[name] = arg
+        for kw in node.keywords:
+            if kw.arg is not None:
+                self.args[kw.arg] = kw.value
+
+    def segment(self, node):
+        return ast.get_source_segment(self.source, node)
+
+    def literal(self, name, default=None):
+        return _literal(self.args[name]) if name in self.args else default
+
+    def with_keywords(self, drop=(), add=()):
+        """The call's source with keywords in `drop` removed and `add` appended."""
+        parts = [self.segment(arg) for arg in self.node.args]
+        parts += [self.segment(kw) for kw in self.node.keywords if kw.arg not in drop]
+        return f"{self.segment(self.node.func)}({', '.join(list(parts) + list(add))})"
+
+
+class _Rewriter:
+    def __init__(self, source):
+        self.source = source
+        self.notes = []
+        self.uses_online = False
+        # (table, type) -> constraint names generated for unnamed constraints
+        self.named = {}
+
+    def rewrite(self, name, call, created):
+        if "schema" in call.args:
+            raise Unsupported("schema-qualified operation")
+        handler = getattr(self, f"_{name}")
+        return handler(call, created)
+
+    def _online(self, line):
+        self.uses_online = True
+        return line
+
+    def _create_index(self, call, created):
+        table = call.literal("table_name")
+        if table in created or "postgresql_concurrently" in call.args:
+            return None
+        self.notes.append(f"create_index on {table}: CREATE INDEX CONCURRENTLY")
+        lines = ["with op.get_context().autocommit_block():"]
+        name = call.literal("index_name")
+        if name:
+            # IF NOT EXISTS would keep the invalid index an interrupted build leaves
+            lines.append("    " + self._online(f"online.drop_invalid_index({name!r})"))
+        lines.append("    " + call.with_keywords(add=["postgresql_concurrently=True", "if_not_exists=True"]))
+        return lines
+
+    def _drop_index(self, call, created):
+        if "postgresql_concurrently" in call.args:
+            return None
+        self.notes.append(f"drop_index {call.literal('index_name')}: DROP INDEX CONCURRENTLY")
+        return [
+            "with op.get_context().autocommit_block():",
+            "    " + call.with_keywords(add=["postgresql_concurrently=True", "if_exists=True"]),
+        ]
+
+    def _add_constraint(self, table, name, kind, definition):
+        self.named.setdefault((table, kind), []).append(name)
+        self.notes.append(f"{kind} {name} on {table}: NOT VALID + VALIDATE")
+        return [self._online(f"online.add_constraint({table!r}, {name!r}, {definition!r})")]
+
+    def _create_foreign_key(self, call, created):
+        table = call.literal("source_table")
+        if table in created:
+            return None
+        local, remote = call.literal("local_cols"), call.literal("remote_cols")
+        name = call.literal("constraint_name") or f"{table}_{'_'.join(local)}_fkey"
+        definition = (
+            f"FOREIGN KEY ({_columns(local)}) REFERENCES {_quote(call.literal('referent_table'))} ({_columns(remote)})"
+        )
+        if call.literal("match"):
+            definition += f" MATCH {call.literal('match')}"
+        if call.literal("ondelete"):
+            definition += f" ON DELETE {call.literal('ondelete')}"
+        if call.literal("onupdate"):
+            definition += f" ON UPDATE {call.literal('onupdate')}"
+        if call.literal("deferrable"):
+            definition += " DEFERRABLE"
+        if call.literal("initially"):
+            definition += f" INITIALLY {call.literal('initially')}"
+        return self._add_constraint(table, name, "foreignkey", definition)
+
+    def _create_check_constraint(self, call, created):
+        table = call.literal("table_name")
+        if table in created:
+            return None
+        condition = _sql_text(call.args["condition"])
+        if condition is None:
+            raise Unsupported("check condition is not a SQL string")
+        name = call.literal("constraint_name") or f"{table}_check"
+        return self._add_constraint(table, name, "check", f"CHECK ({condition})")
+
+    def _create_unique_constraint(self, call, created):
+        table = call.literal("table_name")
+        if table in created:
+            return None
+        columns = call.literal("columns")
+        name = call.literal("constraint_name") or f"{table}_{'_'.join(columns)}_key"
+        self.named.setdefault((table, "unique"), []).append(name)
+        self.notes.append(f"unique {name} on {table}: concurrent index + USING INDEX")
+        return [self._online(f"online.add_unique_constraint({table!r}, {name!r}, {columns!r})")]
+
+    def _drop_constraint(self, call, created):
+        # Autogenerate drops unnamed constraints with name None, which fails at run time;
+        # point it at the name this rewrite gave the constraint
+        if call.literal("constraint_name") is not None:
+            return None
+        names = self.named.get((call.literal("table_name"), call.literal("type_")), [])
+        if len(names) != 1:
+            return None
+        if not call.node.args:
+            return None
+        parts = [repr(names[0])] + [call.segment(arg) for arg in call.node.args[1:]]
+        parts += [call.segment(kw) for kw in call.node.keywords]
+        return [f"{call.segment(call.node.func)}({', '.join(parts)})"]
+
+    def _add_column(self, call, created):
+        table = call.literal("table_name")
+        column_node = call.args["column"]
+        if table in created or not isinstance(column_node, ast.Call) or not column_node.args:
+            return None
+        column = _Call(self.source, column_node, ["name"])
+        name = column.literal("name")
+        not_null = "nullable" in column.args and _literal(column.args["nullable"]) is False
+        default = column.args.get("server_default")
+
+        if default is None:
+            if not not_null:
+                return None
+            expression = None
+        else:
+            expression = _sql_text(default)
+            if expression is None:
+                raise Unsupported("server_default is not a SQL string")
+            if not VOLATILE_DEFAULT.search(expression):
+                # PostgreSQL 11+ stores a constant default in the catalog without a rewrite
+                return None
+
+        lines = [
+            f"op.add_column({table!r}, {column.with_keywords(drop={'nullable', 'server_default'}, add=['nullable=True'])}, "
+            "if_not_exists=True)"
+        ]
+        if expression is None:
+            lines.append(self._online(f"online.backfill({table!r}, {name!r}, 'NULL')  # TODO: SQL expression for existing rows"))
+        else:
+            lines.append(f"op.alter_column({table!r}, {name!r}, server_default={call.segment(default)})")
+            lines.append(self._online(f"online.backfill({table!r}, {name!r}, {expression!r})"))
+        if not_null:
+            lines.append(self._online(f"online.set_not_null({table!r}, {name!r})"))
+        self.notes.append(f"add_column {table}.{name}: nullable add + batched backfill"
+                          + (" + online SET NOT NULL" if not_null else ""))
+        return lines
+
+    def _alter_column(self, call, created):
+        table, name = call.literal("table_name"), call.literal("column_name")
+        if table in created:
+            return None
+        lines = []
+        if "type_" in call.args:
+            self.notes.append(f"[warning] alter_column {table}.{name}: a type change rewrites the table; left as is")
+            lines.append("# hatchback: this type change rewrites the table under an ACCESS EXCLUSIVE lock")
+        if "nullable" not in call.args or _literal(call.args["nullable"]) is not False:
+            return (lines + [call.with_keywords()]) if lines else None
+
+        changes = [key for key in call.args if key not in ("table_name", "column_name", "nullable") and not key.startswith("existing_")]
+        if changes:
+            lines.append(call.with_keywords(drop={"nullable"}))
+        lines.append(self._online(f"online.set_not_null({table!r}, {name!r})"))
+        self.notes.append(f"alter_column {table}.{name}: online SET NOT NULL")
+        return lines
+
+
+def _op_call(statement):
+    if not (isinstance(statement, ast.Expr) and isinstance(statement.value, ast.Call)):
+        return None
+    func = statement.value.func
+    if isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name) and func.value.id == "op":
+        return func.attr
+    return None
+
+
+def rewrite_migration(source):
+    """
+    Return (new_source, notes). notes lists each rewrite, and operations that
+    were kept because they cannot be made online, prefixed with [warning].
+    """
+    tree = ast.parse(source)
+    lines = source.splitlines(keepends=True)
+    rewriter = _Rewriter(source)
+    replacements = []
+
+    functions = {node.name: node for node in tree.body if isinstance(node, ast.FunctionDef)}
+    # upgrade first: downgrade's drop_constraint fixes need the names it generated
+    for function_name in ("upgrade", "downgrade"):
+        function = functions.get(function_name)
+        if function is None:
+            continue
+        created = set()
+        kept = []
+        rewritten = []
+        for statement in function.body:
+            name = _op_call(statement)
+            if name is None:
+                continue
+            call_node = statement.value
+            if name == "create_table" and call_node.args:
+                try:
+                    created.add(_literal(call_node.args[0]))
+                except Unsupported:
+                    pass
+                kept.append((name, statement))
+                continue
+            if name not in SIGNATURES:
+                kept.append((name, statement))
+                continue
+            call = _Call(source, call_node, SIGNATURES[name])
+            try:
+                new_lines = rewriter.rewrite(name, call, created)
+            except (Unsupported, KeyError) as e:
+                reason = e.args[0] if isinstance(e, Unsupported) else f"missing {e.args[0]}"
+                rewriter.notes.append(f"[warning] {name} at line {statement.lineno}: {reason}; left as is")
+                kept.append((name, statement))
+                continue
+            if new_lines is None:
+                kept.append((name, statement))
+            else:
+                rewritten.append((statement, new_lines))
+
+        # Anything before an autocommit block is committed when it starts, so
+        # a retry after a lock timeout must be able to run it again
+        if any("autocommit_block" in line or "online." in line for _, new_lines in rewritten for line in new_lines):
+            resumable = []
+            for name, statement in kept:
+                keyword = IDEMPOTENT.get(name)
+                if keyword is None or any(kw.arg == keyword for kw in statement.value.keywords):
+                    continue
+                call = _Call(source, statement.value, [])
+                rewritten.append((statement, [call.with_keywords(add=[f"{keyword}=True"])]))
+                resumable.append(name)
+            if resumable:
+                rewriter.notes.append(
+                    f"{function_name}: {', '.join(dict.fromkeys(resumable))} made idempotent, so a retry resumes after committed steps"
+                )
+        for statement, new_lines in rewritten:
+            indent = " " * statement.col_offset
+            replacements.append((statement.lineno, statement.end_lineno, [indent + line + "\n" for line in new_lines]))
+
+    for start, end, new_lines in sorted(replacements, reverse=True):
+        lines[start - 1:end] = new_lines
+
+    new_source = "".join(lines)
+    if rewriter.uses_online and ONLINE_IMPORT not in new_source:
+        new_source = re.sub(r"^(import sqlalchemy as sa\n)", f"\\1{ONLINE_IMPORT}\n", new_source, count=1, flags=re.MULTILINE)
+    return new_source, rewriter.notes
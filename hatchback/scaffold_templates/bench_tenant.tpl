@@ -0,0 +1,64 @@
+"""Benchmark scenarios for /__resource__s, run by `hatchback bench`."""
+from itertools import count, cycle
+from uuid import UUID
+__imports__
+
+from fastapi.encoders import jsonable_encoder
+
+from app.models.__resource__ import __Resource__
+from benchmarks import scenario
+
+SEED_ROWS = 100
+_sequence = count()
+
+
+def build_payload():
+    # A fresh counter value per row keeps unique columns from colliding
+    n = next(_sequence)
+    return __payload__
+
+
+def _insert(ctx, count):
+    db = ctx.session_factory()
+    try:
+        # In the benchmark user's tenant, which every request is scoped to
+        items = [__Resource__(tenant_id=UUID(ctx.tenant_id), **build_payload()) for _ in range(count)]
+        db.add_all(items)
+        db.commit()
+        return [str(item.id) for item in items]
+    finally:
+        db.close()
+
+
+async def seed___resource__s(ctx):
+    ctx.state["ids"] = cycle(_insert(ctx, SEED_ROWS))
+
+
+async def seed_deletable___resource__s(ctx):
+    # One row per call, so every delete hits an existing row
+    ctx.state["ids"] = _insert(ctx, ctx.total_requests)
+
+
+@scenario("__resource__.list", setup=seed___resource__s)
+async def list___resource__s(ctx):
+    return await ctx.client.get("/__resource__s/", params={"limit": 100}, headers=ctx.auth_headers)
+
+
+@scenario("__resource__.read", setup=seed___resource__s)
+async def read___resource__(ctx):
+    return await ctx.client.get(f"/__resource__s/{next(ctx.state['ids'])}", headers=ctx.auth_headers)
+
+
+@scenario("__resource__.create")
+async def create___resource__(ctx):
+    return await ctx.client.post("/__resource__s/", json=jsonable_encoder(build_payload()), headers=ctx.auth_headers)
+
+
+@scenario("__resource__.update", setup=seed___resource__s)
+async def update___resource__(ctx):
+    return await ctx.client.put(f"/__resource__s/{next(ctx.state['ids'])}", json=jsonable_encoder(build_payload()), headers=ctx.auth_headers)
+
+
+@scenario("__resource__.delete", setup=seed_deletable___resource__s)
+async def delete___resource__(ctx):
+    return await ctx.client.delete(f"/__resource__s/{ctx.state['ids'].pop()}", headers=ctx.auth_headers)
@@ -1,6 +1,8 @@
+__imports__
 from app.models.__resource__ import __Resource__
 from app.repositories.base import BaseRepository
 
 class __Resource__Repository(BaseRepository):
     def __init__(self, db):
         super().__init__(db, __Resource__)
+__query_methods__
@@ -0,0 +1,47 @@
+__imports__
+from app.models.__resource__ import __Resource__
+from app.repositories.base import BaseRepository
+
+class __Resource__Repository(BaseRepository):
+    """
+    Every query filters on tenant_id first, so it reads one tenant's slice of
+    the (tenant_id, ...) indexes and never another tenant's rows.
+    """
+    def __init__(self, db):
+        super().__init__(db, __Resource__)
+
+    def get_all(self, tenant_id: UUID, skip: int = 0, limit: int = 100):
+        return (
+            self.db.query(self.model)
+            .filter(self.model.tenant_id == tenant_id)
+            .order_by(self.model.created_at.desc())
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+
+    def get_by_id(self, tenant_id: UUID, id: UUID):
+        return self.db.query(self.model).filter(self.model.tenant_id == tenant_id, self.model.id == id).first()
+
+    def create(self, tenant_id: UUID, obj):
+        obj.tenant_id = tenant_id
+        return super().create(obj)
+
+    def update(self, tenant_id: UUID, id: UUID, data: dict):
+        obj = self.get_by_id(tenant_id, id)
+        if not obj:
+            return None
+        for field, value in data.items():
+            setattr(obj, field, value)
+        self.db.commit()
+        self.db.refresh(obj)
+        return obj
+
+    def delete(self, tenant_id: UUID, id: UUID):
+        obj = self.get_by_id(tenant_id, id)
+        if not obj:
+            return False
+        self.db.delete(obj)
+        self.db.commit()
+        return True
+__query_methods__
@@ -0,0 +1,53 @@
+from typing import List
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from app.config.database import get_db
+from app.dependencies import get_current_active_user
+from app.models.user import User
+from app.schemas.__resource__ import __Resource__Create, __Resource__Update, __Resource__Response
+from app.services.__resource__ import __Resource__Service
+
+# The tenant always comes from the authenticated user, never from the request
+router = APIRouter(prefix="/__resource__s", tags=["__Resource__s"])
+
+def get_service(db: Session = Depends(get_db)):
+    return __Resource__Service(db)
+
+@router.get("/", response_model=List[__Resource__Response])
+def read_all(
+    skip: int = 0,
+    limit: int = 100,
+    current_user: User = Depends(get_current_active_user),
+    service: __Resource__Service = Depends(get_service),
+):
+    return service.get_all(current_user.tenant_id, skip, limit)
+
+@router.get("/{id}", response_model=__Resource__Response)
+def read_one(id: UUID, current_user: User = Depends(get_current_active_user), service: __Resource__Service = Depends(get_service)):
+    item = service.get(current_user.tenant_id, id)
+    if not item:
+        raise HTTPException(status_code=404, detail="__Resource__ not found")
+    return item
+
+@router.post("/", response_model=__Resource__Response)
+def create(item: __Resource__Create, current_user: User = Depends(get_current_active_user), service: __Resource__Service = Depends(get_service)):
+    return service.create(current_user.tenant_id, item.model_dump())
+
+@router.put("/{id}", response_model=__Resource__Response)
+def update(
+    id: UUID,
+    item: __Resource__Update,
+    current_user: User = Depends(get_current_active_user),
+    service: __Resource__Service = Depends(get_service),
+):
+    updated = service.update(current_user.tenant_id, id, item.model_dump(exclude_unset=True))
+    if not updated:
+        raise HTTPException(status_code=404, detail="__Resource__ not found")
+    return updated
+
+@router.delete("/{id}")
+def delete(id: UUID, current_user: User = Depends(get_current_active_user), service: __Resource__Service = Depends(get_service)):
+    if not service.delete(current_user.tenant_id, id):
+        raise HTTPException(status_code=404, detail="__Resource__ not found")
+    return True
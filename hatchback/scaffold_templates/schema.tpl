@@ -1,16 +1,13 @@
-from datetime import datetime
-from typing import Optional
-from uuid import UUID
-from pydantic import BaseModel, ConfigDict
+__imports__
 
 class __Resource__Base(BaseModel):
-    name: Optional[str] = None
+__base_fields__
 
 class __Resource__Create(__Resource__Base):
     pass
 
-class __Resource__Update(__Resource__Base):
-    pass
+class __Resource__Update(BaseModel):
+__update_fields__
 
 class __Resource__Response(__Resource__Base):
     id: UUID
@@ -1,5 +1,6 @@
 from uuid import UUID
 from sqlalchemy.orm import Session
+from app.models.__resource__ import __Resource__
 from app.repositories.__resource__ import __Resource__Repository
 
 class __Resource__Service:
@@ -10,10 +11,10 @@ class __Resource__Service:
         return self.repo.get_by_id(id)
 
     def get_all(self, skip: int = 0, limit: int = 100):
-        return self.repo.get_all(skip, limit)
+        return self.repo.get_all(skip=skip, limit=limit)
 
     def create(self, data: dict):
-        return self.repo.create(data)
+        return self.repo.create(__Resource__(**data))
 
     def update(self, id: UUID, data: dict):
         return self.repo.update(id, data)
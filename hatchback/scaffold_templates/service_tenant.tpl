@@ -0,0 +1,27 @@
+from uuid import UUID
+from sqlalchemy.orm import Session
+__imports__
+from app.models.__resource__ import __Resource__
+from app.repositories.__resource__ import __Resource__Repository
+
+class __Resource__Service:
+    def __init__(self, db: Session):
+        self.repo = __Resource__Repository(db)
+
+    def get(self, tenant_id: UUID, id: UUID):
+        return self.repo.get_by_id(tenant_id, id)
+
+    def get_all(self, tenant_id: UUID, skip: int = 0, limit: int = 100):
+        return self.repo.get_all(tenant_id, skip=skip, limit=limit)
+
+    def create(self, tenant_id: UUID, data: dict):
+__check_parents__
+        return self.repo.create(tenant_id, __Resource__(**data))
+
+    def update(self, tenant_id: UUID, id: UUID, data: dict):
+__check_parents__
+        return self.repo.update(tenant_id, id, data)
+
+    def delete(self, tenant_id: UUID, id: UUID):
+        return self.repo.delete(tenant_id, id)
+__parent_methods__
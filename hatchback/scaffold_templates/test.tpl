@@ -1,59 +1,73 @@
+from itertools import count
+__imports__
+
 import pytest
+from fastapi.encoders import jsonable_encoder
+
 from app.models.__resource__ import __Resource__
 
-def test_create___resource__(client, db_session):
-    # TODO: Update payload with required fields for __Resource__
-    payload = {
-        # "name": "Test __Resource__",
-        # "description": "Test Description"
-    }
-    
-    # response = client.post("/__resource__s/", json=payload)
-    # assert response.status_code == 200
-    # data = response.json()
-    # assert "id" in data
-
-def test_read___resource__s(client, db_session):
+_sequence = count(1)
+
+
+def build_payload():
+    # A fresh counter value per row keeps unique columns from colliding
+    n = next(_sequence)
+    return __payload__
+
+
+@pytest.fixture
+def __resource___factory(db_session):
+    """
+    Create and commit a __Resource__; keyword arguments override the payload.
+    Rolled back with the test's transaction like everything else.
+    """
+    def create(**overrides):
+        item = __Resource__(**{**build_payload(), **overrides})
+        db_session.add(item)
+        db_session.commit()
+        return item
+
+    return create
+
+
+def test_create___resource__(client):
+    response = client.post("/__resource__s/", json=jsonable_encoder(build_payload()))
+    assert response.status_code == 200
+    assert "id" in response.json()
+
+
+def test_read___resource__s(client, __resource___factory):
+    items = [__resource___factory() for _ in range(2)]
+
     response = client.get("/__resource__s/")
     assert response.status_code == 200
-    assert isinstance(response.json(), list)
-
-def test_read___resource___by_id(client, db_session):
-    # TODO: Create a __Resource__ in the database first
-    # item = __Resource__(...)
-    # db_session.add(item)
-    # db_session.commit()
-    
-    # response = client.get(f"/__resource__s/{item.id}")
-    # assert response.status_code == 200
-    # assert response.json()["id"] == str(item.id)
-    pass
-
-def test_update___resource__(client, db_session):
-    # TODO: Create a __Resource__ in the database first
-    # item = __Resource__(...)
-    # db_session.add(item)
-    # db_session.commit()
-
-    update_payload = {
-        # "name": "Updated Name"
-    }
-
-    # response = client.put(f"/__resource__s/{item.id}", json=update_payload)
-    # assert response.status_code == 200
-    # assert response.json()["name"] == "Updated Name"
-    pass
-
-def test_delete___resource__(client, db_session):
-    # TODO: Create a __Resource__ in the database first
-    # item = __Resource__(...)
-    # db_session.add(item)
-    # db_session.commit()
-
-    # response = client.delete(f"/__resource__s/{item.id}")
-    # assert response.status_code == 200
-    
-    # Verify it's gone
-    # response = client.get(f"/__resource__s/{item.id}")
-    # assert response.status_code == 404
-    pass
+    assert {item["id"] for item in response.json()} == {str(item.id) for item in items}
+
+
+def test_read___resource___by_id(client, __resource___factory):
+    item = __resource___factory()
+
+    response = client.get(f"/__resource__s/{item.id}")
+    assert response.status_code == 200
+    assert response.json()["id"] == str(item.id)
+
+
+def test_update___resource__(client, db_session, __resource___factory):
+    item = __resource___factory()
+    payload = build_payload()
+
+    response = client.put(f"/__resource__s/{item.id}", json=jsonable_encoder(payload))
+    assert response.status_code == 200
+    assert response.json()["id"] == str(item.id)
+    db_session.refresh(item)
+    assert {key: getattr(item, key) for key in payload} == payload
+
+
+def test_delete___resource__(client, __resource___factory):
+    item = __resource___factory()
+
+    response = client.delete(f"/__resource__s/{item.id}")
+    assert response.status_code == 200
+
+    response = client.get(f"/__resource__s/{item.id}")
+    assert response.status_code == 404
@@ -0,0 +1,99 @@
+from itertools import count
+from uuid import UUID
+__imports__
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+
+from app.models.__resource__ import __Resource__
+
+_sequence = count(1)
+
+
+def build_payload():
+    # A fresh counter value per row keeps unique columns from colliding
+    n = next(_sequence)
+    return __payload__
+
+
+@pytest.fixture
+def user(user_factory):
+    return user_factory()
+
+
+@pytest.fixture
+def headers(user, auth_headers):
+    return auth_headers(user)
+
+
+@pytest.fixture
+def __resource___factory(db_session, user):
+    """
+    Create and commit a __Resource__ in the user's tenant (pass tenant_id for
+    another one); keyword arguments override the payload.
+    """
+    def create(**overrides):
+        item = __Resource__(**{"tenant_id": user.tenant_id, **build_payload(), **overrides})
+        db_session.add(item)
+        db_session.commit()
+        return item
+
+    return create
+
+
+def test_requires_authentication(client):
+    response = client.get("/__resource__s/")
+    assert response.status_code == 401
+
+
+def test_create___resource__(client, db_session, user, headers):
+    response = client.post("/__resource__s/", json=jsonable_encoder(build_payload()), headers=headers)
+    assert response.status_code == 200
+    item = db_session.query(__Resource__).filter_by(id=UUID(response.json()["id"])).one()
+    assert item.tenant_id == user.tenant_id
+
+
+def test_read___resource__s_lists_own_tenant_only(client, headers, __resource___factory, tenant_factory):
+    items = [__resource___factory() for _ in range(2)]
+    __resource___factory(tenant_id=tenant_factory().id)
+
+    response = client.get("/__resource__s/", headers=headers)
+    assert response.status_code == 200
+    assert {item["id"] for item in response.json()} == {str(item.id) for item in items}
+
+
+def test_read___resource___by_id(client, headers, __resource___factory):
+    item = __resource___factory()
+
+    response = client.get(f"/__resource__s/{item.id}", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["id"] == str(item.id)
+
+
+def test_other_tenants___resource___is_not_found(client, headers, __resource___factory, tenant_factory):
+    item = __resource___factory(tenant_id=tenant_factory().id)
+
+    assert client.get(f"/__resource__s/{item.id}", headers=headers).status_code == 404
+    assert client.put(f"/__resource__s/{item.id}", json=jsonable_encoder(build_payload()), headers=headers).status_code == 404
+    assert client.delete(f"/__resource__s/{item.id}", headers=headers).status_code == 404
+
+
+def test_update___resource__(client, db_session, headers, __resource___factory):
+    item = __resource___factory()
+    payload = build_payload()
+
+    response = client.put(f"/__resource__s/{item.id}", json=jsonable_encoder(payload), headers=headers)
+    assert response.status_code == 200
+    assert response.json()["id"] == str(item.id)
+    db_session.refresh(item)
+    assert {key: getattr(item, key) for key in payload} == payload
+
+
+def test_delete___resource__(client, headers, __resource___factory):
+    item = __resource___factory()
+
+    response = client.delete(f"/__resource__s/{item.id}", headers=headers)
+    assert response.status_code == 200
+
+    response = client.get(f"/__resource__s/{item.id}", headers=headers)
+    assert response.status_code == 404
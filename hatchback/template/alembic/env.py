@@ -1,10 +1,15 @@
+import glob
+import os
+import re
 from logging.config import fileConfig
 from os import environ as env
 
-from sqlalchemy import engine_from_config, pool
+from sqlalchemy import engine_from_config, pool, text
+from sqlalchemy.exc import OperationalError
 
 from alembic import context
 from app.config.database import Base, validate_database
+from app.migrations.partitions import create_partitions, skip_partition_clones
 import app.models  # Import models to register them with Base
 
 # this is the Alembic Config object, which provides
@@ -35,6 +40,32 @@ if config.config_file_name is not None:
 # for 'autogenerate' support
 target_metadata = Base.metadata
 
+CREATE_TABLE = re.compile(r"op\.create_table\(\s*['\"]([^'\"]+)['\"]")
+
+
+def owned_tables():
+    """
+    Tables this project manages: those of the models, plus those created by its
+    migrations (so deleting a model still autogenerates the drop).
+    """
+    tables = {table.name for table in target_metadata.tables.values()}
+    for path in glob.glob(os.path.join(os.path.dirname(__file__), "versions", "*.py")):
+        with open(path, "r") as f:
+            tables.update(CREATE_TABLE.findall(f.read()))
+    return tables
+
+
+OWNED_TABLES = owned_tables()
+
+
+def include_name(name, type_, parent_names):
+    # Autogenerate reflects only the tables that pass this filter, so other
+    # tables sharing the database cost nothing and are never dropped
+    if type_ == "table":
+        return name in OWNED_TABLES
+    return True
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode."""
     url = config.get_main_option("sqlalchemy.url")
@@ -43,25 +74,52 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        transaction_per_migration=True,
     )
 
     with context.begin_transaction():
         context.run_migrations()
 
 
+def connect(connectable):
+    """Connect, creating the database only if it does not exist yet."""
+    try:
+        return connectable.connect()
+    except OperationalError as e:
+        if "does not exist" not in str(e.orig):
+            raise
+    validate_database()
+    return connectable.connect()
+
+
 def run_migrations_online() -> None:
     """Run migrations in 'online' mode."""
-    # Ensure database exists
-    validate_database()
-    
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
         poolclass=pool.NullPool,
     )
 
-    with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+    with connect(connectable) as connection:
+        # Set by `hatchback migrate apply`: fail fast instead of queueing behind
+        # long transactions while holding a lock every other query waits on
+        for setting in ("lock_timeout", "statement_timeout"):
+            value = env.get(f"MIGRATION_{setting.upper()}")
+            if value:
+                connection.execute(text("SELECT set_config(:name, :value, false)"), {"name": setting, "value": value})
+        # Autogenerate knows the partitioned parent tables, not their partitions
+        include_object = skip_partition_clones(connection)
+        connection.commit()
+
+        # One transaction per revision, so a retry resumes after the last applied one
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_name=include_name,
+            include_object=include_object,
+            process_revision_directives=create_partitions,
+            transaction_per_migration=True,
+        )
 
         with context.begin_transaction():
             context.run_migrations()
@@ -1,10 +1,12 @@
 from typing import List
 from uuid import UUID
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer
 from sqlalchemy.orm import Session
 
+from app import diagnostics
 from app.config.database import get_db
+from app.middleware.metrics import is_metrics_access_allowed
 from app.services.auth import AuthService
 from app.services.tenant import TenantService
 from app.services.user import UserService
@@ -86,3 +88,17 @@ class RoleChecker:
             )
         return user
 
+
+def require_metrics_access(request: Request):
+    client_host = request.client.host if request.client else None
+    if not is_metrics_access_allowed(client_host, request.headers.get("authorization")):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="error.operation_not_permitted",
+        )
+
+
+def require_diagnostics_enabled():
+    # Behave as if the endpoints did not exist unless DIAGNOSTICS_ENABLED is set
+    if not diagnostics.DIAGNOSTICS_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
@@ -0,0 +1,9 @@
+import os
+
+from .memory import MemoryTracker, memory_tracker
+from .profiler import SamplingProfiler
+
+# Enable the super-admin-only diagnostics: X-Profile requests and /debug/memory
+DIAGNOSTICS_ENABLED = os.getenv("DIAGNOSTICS_ENABLED", "false").lower() == "true"
+
+__all__ = ["DIAGNOSTICS_ENABLED", "MemoryTracker", "SamplingProfiler", "memory_tracker"]
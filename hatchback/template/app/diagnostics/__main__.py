@@ -0,0 +1,171 @@
+"""
+In-process diagnostics, driven by `hatchback profile`.
+
+    python -m app.diagnostics profile GET /users --as-user admin
+    python -m app.diagnostics memory --endpoint "GET /users" --as-user admin
+
+The app is imported and called through TestClient, so no server is needed and
+nothing but the profiled request runs in the process. The last line printed is
+a JSON summary the CLI reads.
+"""
+import argparse
+import json
+import sys
+
+from app.diagnostics.memory import MemoryTracker, current_rss
+from app.diagnostics.profiler import PROFILE_DIR, SamplingProfiler
+
+# Routes that are not worth driving in a loop by default
+SKIPPED_PREFIXES = ("/metrics", "/debug")
+
+
+def _parse_headers(raw_headers):
+    headers = {}
+    for raw in raw_headers or []:
+        name, _, value = raw.partition(":")
+        headers[name.strip()] = value.strip()
+    return headers
+
+
+def _build_client(as_user=None):
+    from fastapi.testclient import TestClient
+
+    from app.config.limiter import limiter
+    from app.main import app
+
+    # Repeated requests would otherwise trip the rate limits
+    limiter.enabled = False
+
+    if as_user:
+        from app.config.database import SessionLocal
+        from app.dependencies import get_current_user
+        from app.models.user import User
+
+        db = SessionLocal()
+        user = db.query(User).filter(User.username == as_user).first()
+        if not user:
+            sys.exit(f"User '{as_user}' not found")
+        app.dependency_overrides[get_current_user] = lambda: user
+
+    return TestClient(app)
+
+
+def _request_sender(client, method, path, raw_headers, data):
+    headers = _parse_headers(raw_headers)
+    if data is not None:
+        headers.setdefault("Content-Type", "application/json")
+
+    def send():
+        return client.request(method.upper(), path, headers=headers, content=data)
+
+    return send
+
+
+def profile(args):
+    client = _build_client(args.as_user)
+    send = _request_sender(client, args.method, args.path, args.header, args.data)
+
+    if args.warmup:
+        send()
+
+    with SamplingProfiler(interval=args.interval / 1000) as profiler:
+        for _ in range(args.repeat):
+            response = send()
+
+    output = profiler.save(f"{args.method.upper()} {args.path}", args.output_dir)
+    print(json.dumps({
+        "status": response.status_code,
+        "requests": args.repeat,
+        "duration": profiler.duration,
+        "profile": output,
+    }))
+
+
+def _default_endpoints():
+    """Every GET route without path parameters."""
+    from fastapi.routing import APIRoute
+
+    from app.main import app
+
+    return [
+        f"GET {route.path}"
+        for route in app.routes
+        if isinstance(route, APIRoute)
+        and "GET" in route.methods
+        and "{" not in route.path
+        and not route.path.startswith(SKIPPED_PREFIXES)
+    ]
+
+
+def memory(args):
+    client = _build_client(args.as_user)
+    endpoints = args.endpoint or _default_endpoints()
+    tracker = MemoryTracker(max_snapshots=2)
+    results = []
+
+    for endpoint in endpoints:
+        method, _, path = endpoint.partition(" ")
+        send = _request_sender(client, method, path.strip(), args.header, args.data)
+
+        # Warm up first so lazily built caches (compiled queries, imports,
+        # pydantic validators) are not mistaken for growth.
+        for _ in range(args.warmup):
+            send()
+
+        rss_before = current_rss()
+        baseline = tracker.take_snapshot("before")
+        for _ in range(args.iterations):
+            response = send()
+        after = tracker.take_snapshot("after")
+        rss_after = current_rss()
+
+        diff = tracker.diff(baseline["id"], after["id"], limit=args.top)
+        results.append({
+            "endpoint": f"{method.upper()} {path.strip()}",
+            "status": response.status_code,
+            "iterations": args.iterations,
+            "growth": diff["size_diff"],
+            "growth_per_request": diff["size_diff"] / args.iterations,
+            "objects": diff["count_diff"],
+            "rss_growth": rss_after - rss_before if rss_before is not None and rss_after is not None else None,
+            "top": [item for item in diff["top"] if item["size_diff"] > 0],
+        })
+        tracker.snapshots.clear()
+
+    tracker.stop()
+    print(json.dumps({"results": results}))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.diagnostics")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    profile_parser = subparsers.add_parser("profile", help="Profile a request in-process")
+    profile_parser.add_argument("method")
+    profile_parser.add_argument("path")
+    profile_parser.add_argument("--header", "-H", action="append", help="Request header, e.g. 'Authorization: Bearer ...'")
+    profile_parser.add_argument("--data", "-d", help="Request body (JSON)")
+    profile_parser.add_argument("--as-user", help="Authenticate as this username without a token")
+    profile_parser.add_argument("--repeat", type=int, default=1, help="Number of requests to profile")
+    profile_parser.add_argument("--interval", type=float, default=1.0, help="Sampling interval in milliseconds")
+    profile_parser.add_argument("--no-warmup", dest="warmup", action="store_false", help="Do not send an unprofiled request first")
+    profile_parser.add_argument("--output-dir", default=PROFILE_DIR)
+
+    memory_parser = subparsers.add_parser("memory", help="Report allocation growth per endpoint")
+    memory_parser.add_argument("--endpoint", "-e", action="append", help="'METHOD /path' to drive (repeatable, default: every GET route without parameters)")
+    memory_parser.add_argument("--header", "-H", action="append", help="Request header, e.g. 'Authorization: Bearer ...'")
+    memory_parser.add_argument("--data", "-d", help="Request body (JSON)")
+    memory_parser.add_argument("--as-user", help="Authenticate as this username without a token")
+    memory_parser.add_argument("--iterations", type=int, default=200, help="Requests per endpoint between the two snapshots")
+    memory_parser.add_argument("--warmup", type=int, default=20, help="Requests per endpoint before the first snapshot")
+    memory_parser.add_argument("--top", type=int, default=5, help="Allocation sites reported per endpoint")
+
+    args = parser.parse_args(argv)
+    if args.command == "profile":
+        profile(args)
+    elif args.command == "memory":
+        memory(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import gc
+import os
+import tracemalloc
+from collections import OrderedDict
+from datetime import datetime, timezone
+from itertools import count
+
+# Frames kept per allocation. More frames give better tracebacks at a higher cost.
+TRACEMALLOC_FRAMES = int(os.getenv("TRACEMALLOC_FRAMES", 10))
+# Snapshots kept in memory per worker; the oldest are dropped first
+MAX_SNAPSHOTS = int(os.getenv("MEMORY_MAX_SNAPSHOTS", 10))
+
+GROUP_BY = ("lineno", "filename", "traceback")
+
+# Allocations made by the tracing machinery itself are noise
+_NOISE_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def current_rss():
+    """Resident set size of this process in bytes, or None where it is not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _location(frame) -> str:
+    return f"{frame.filename}:{frame.lineno}"
+
+
+def _stat_to_dict(stat, group_by):
+    item = {
+        "location": _location(stat.traceback[0]),
+        "size": stat.size,
+        "count": stat.count,
+    }
+    if group_by == "traceback":
+        item["traceback"] = [_location(frame) for frame in stat.traceback]
+    return item
+
+
+def _diff_to_dict(stat, group_by):
+    item = {
+        "location": _location(stat.traceback[0]),
+        "size": stat.size,
+        "size_diff": stat.size_diff,
+        "count": stat.count,
+        "count_diff": stat.count_diff,
+    }
+    if group_by == "traceback":
+        item["traceback"] = [_location(frame) for frame in stat.traceback]
+    return item
+
+
+def _check_group_by(group_by):
+    if group_by not in GROUP_BY:
+        raise ValueError(f"group_by must be one of {', '.join(GROUP_BY)}")
+
+
+class MemoryTracker:
+    """
+    Take tracemalloc snapshots and compare them.
+
+    Tracing starts with the first snapshot (or `start()`), so only allocations
+    made after that point are seen: take a baseline, let the worker serve
+    traffic, take another snapshot and diff the two. Tracing slows every
+    allocation down, so stop it when done.
+
+    Snapshots live in the worker process that took them; behind gunicorn each
+    worker has its own set.
+    """
+
+    def __init__(self, max_snapshots: int = MAX_SNAPSHOTS, frames: int = TRACEMALLOC_FRAMES):
+        self.max_snapshots = max_snapshots
+        self.frames = frames
+        self.snapshots = OrderedDict()
+        self._ids = count(1)
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+
+    def stop(self):
+        """Stop tracing and forget all snapshots."""
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.snapshots.clear()
+
+    def status(self) -> dict:
+        current, peak = tracemalloc.get_traced_memory() if self.tracing else (0, 0)
+        return {
+            "pid": os.getpid(),
+            "tracing": self.tracing,
+            "traced_current": current,
+            "traced_peak": peak,
+            "rss": current_rss(),
+            "snapshots": [self._describe(snapshot_id) for snapshot_id in self.snapshots],
+        }
+
+    def take_snapshot(self, label: str = None) -> dict:
+        self.start()
+        # Collect first so garbage waiting for the cycle collector is not reported
+        gc.collect()
+        snapshot = tracemalloc.take_snapshot().filter_traces(_NOISE_FILTERS)
+
+        snapshot_id = next(self._ids)
+        self.snapshots[snapshot_id] = {
+            "snapshot": snapshot,
+            "label": label,
+            "taken_at": datetime.now(timezone.utc).isoformat(),
+            "traced_current": tracemalloc.get_traced_memory()[0],
+            "rss": current_rss(),
+        }
+        while len(self.snapshots) > self.max_snapshots:
+            self.snapshots.popitem(last=False)
+        return self._describe(snapshot_id)
+
+    def _describe(self, snapshot_id) -> dict:
+        entry = self.snapshots[snapshot_id]
+        return {
+            "id": snapshot_id,
+            "label": entry["label"],
+            "taken_at": entry["taken_at"],
+            "traced_current": entry["traced_current"],
+            "rss": entry["rss"],
+        }
+
+    def _get(self, snapshot_id):
+        try:
+            return self.snapshots[snapshot_id]["snapshot"]
+        except KeyError:
+            raise KeyError(f"Snapshot {snapshot_id} not found") from None
+
+    def top(self, snapshot_id, limit: int = 20, group_by: str = "lineno") -> list:
+        """Largest allocation sites still alive in a snapshot."""
+        _check_group_by(group_by)
+        stats = self._get(snapshot_id).statistics(group_by)
+        return [_stat_to_dict(stat, group_by) for stat in stats[:limit]]
+
+    def diff(self, from_id, to_id, limit: int = 20, group_by: str = "lineno") -> dict:
+        """Allocation sites that changed the most between two snapshots, biggest first."""
+        _check_group_by(group_by)
+        stats = self._get(to_id).compare_to(self._get(from_id), group_by)
+        return {
+            "from": self._describe(from_id),
+            "to": self._describe(to_id),
+            "size_diff": sum(stat.size_diff for stat in stats),
+            "count_diff": sum(stat.count_diff for stat in stats),
+            "top": [_diff_to_dict(stat, group_by) for stat in stats[:limit]],
+        }
+
+
+memory_tracker = MemoryTracker()
@@ -0,0 +1,126 @@
+import json
+import os
+import re
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+from time import perf_counter
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+# Leaf frames in these modules mean the thread is parked (idle threadpool
+# workers, the event loop waiting in select()) rather than doing work.
+IDLE_MODULES = ("threading.py", "selectors.py", "queue.py")
+
+
+def _is_idle(frame) -> bool:
+    return frame.f_code.co_filename.endswith(IDLE_MODULES)
+
+
+class SamplingProfiler:
+    """
+    Minimal wall-clock sampling profiler.
+
+    A background thread wakes up every `interval` seconds and records the stack
+    of every other thread in the process. Unlike tracing profilers the overhead
+    does not depend on how many Python calls the code makes, and unlike
+    single-thread profilers it sees the threadpool threads FastAPI runs sync
+    endpoints and dependencies in.
+
+    Every thread is sampled, so on a busy worker concurrent requests show up in
+    the profile too. Profile on a quiet worker, or in-process with
+    `hatchback profile`, when you need a clean picture.
+    """
+
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.samples = Counter()
+        self.started = None
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started = perf_counter()
+        self._thread = threading.Thread(target=self._run, name="hatchback-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._stop.is_set():
+            return self
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = perf_counter() - self.started
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        last = perf_counter()
+        while not self._stop.wait(self.interval):
+            now = perf_counter()
+            weight, last = now - last, now
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or _is_idle(frame):
+                    continue
+                self.samples[self._stack(frame)] += weight
+
+    @staticmethod
+    def _stack(frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+            frame = frame.f_back
+        stack.reverse()
+        return tuple(stack)
+
+    def to_speedscope(self, name: str = "request") -> dict:
+        """Render the samples in speedscope's 'sampled' format (https://www.speedscope.app)."""
+        frames = []
+        frame_index = {}
+        samples = []
+        weights = []
+        for stack, weight in self.samples.items():
+            indexes = []
+            for key in stack:
+                if key not in frame_index:
+                    frame_index[key] = len(frames)
+                    frames.append({"name": key[0], "file": key[1], "line": key[2]})
+                indexes.append(frame_index[key])
+            samples.append(indexes)
+            weights.append(weight)
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "hatchback",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }],
+        }
+
+    def save(self, name: str, output_dir: str = PROFILE_DIR) -> str:
+        """Write the profile to `output_dir` and return its path."""
+        os.makedirs(output_dir, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", name).strip("_") or "request"
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        path = os.path.join(output_dir, f"{timestamp}-{slug}.speedscope.json")
+        with open(path, "w") as f:
+            json.dump(self.to_speedscope(name), f)
+        return path
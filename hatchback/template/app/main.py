@@ -3,11 +3,14 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 
 from app.routes import routers
+from app.config.database import SessionLocal, engine
 from app.config.limiter import limiter
+from app.middleware.metrics import MetricsMiddleware, instrument_pool, rate_limit_exceeded_handler
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.timing import ServerTimingMiddleware, instrument_engine, instrument_routes
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -30,7 +33,7 @@ app = FastAPI(
     lifespan=lifespan
 )
 app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
 
 origins = ["*"]
 app.add_middleware(
@@ -40,6 +43,11 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(MetricsMiddleware)
+instrument_engine(engine, SessionLocal)
+instrument_pool(engine, SessionLocal)
 
 @app.get("/health")
 async def health_check():
@@ -47,3 +55,5 @@ async def health_check():
 
 for router in routers:
     app.include_router(router)
+
+instrument_routes(app)
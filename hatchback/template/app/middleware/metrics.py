@@ -0,0 +1,175 @@
+import ipaddress
+import os
+import secrets
+from time import perf_counter
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from slowapi import _rate_limit_exceeded_handler
+from sqlalchemy import event
+
+# Bearer token that grants access to /metrics (optional)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+# Comma-separated IPs/CIDRs allowed to scrape /metrics without a token, "*" for
+# everyone. Loopback only by default: behind a reverse proxy or Docker's bridge
+# network every client has a private address
+METRICS_ALLOWLIST = os.getenv("METRICS_ALLOWLIST", "127.0.0.1/32,::1/128")
+
+REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by method, route template and status code",
+    ["method", "route", "status"],
+)
+LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by method and route template",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being served",
+    multiprocess_mode="livesum",
+)
+POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Configured size of the SQLAlchemy connection pool",
+    multiprocess_mode="livesum",
+)
+POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of the pool",
+    multiprocess_mode="livesum",
+)
+POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Connections open beyond the pool size (negative while the pool is not full)",
+    multiprocess_mode="livesum",
+)
+POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Time sessions waited to get a database connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+RATE_LIMITED = Counter(
+    "rate_limit_rejections_total",
+    "Requests rejected by the rate limiter",
+    ["route"],
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by cache name and result (hit/miss)",
+    ["cache", "result"],
+)
+
+
+def _route_label(scope) -> str:
+    # Use the route template ("/users/{user_id}") rather than the raw path to
+    # keep label cardinality bounded.
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def record_cache(cache: str, hit: bool):
+    """Count a cache lookup. Hit ratio = hits / (hits + misses) per cache."""
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def instrument_pool(engine, session_factory):
+    """Keep the pool gauges current and record how long sessions wait for a connection."""
+    pool = engine.pool
+
+    def _update_pool_gauges(*args):
+        POOL_SIZE.set(pool.size())
+        POOL_CHECKED_OUT.set(pool.checkedout())
+        POOL_OVERFLOW.set(pool.overflow())
+
+    event.listen(engine, "checkout", _update_pool_gauges)
+    event.listen(engine, "checkin", _update_pool_gauges)
+
+    @event.listens_for(session_factory, "after_transaction_create")
+    def _after_transaction_create(session, transaction):
+        if transaction.parent is None:
+            session.info["pool_wait_start"] = perf_counter()
+
+    @event.listens_for(session_factory, "after_begin")
+    def _after_begin(session, transaction, connection):
+        start = session.info.pop("pool_wait_start", None)
+        if start is not None:
+            POOL_WAIT.observe(perf_counter() - start)
+
+
+def rate_limit_exceeded_handler(request, exc):
+    RATE_LIMITED.labels(route=_route_label(request.scope)).inc()
+    return _rate_limit_exceeded_handler(request, exc)
+
+
+def is_metrics_access_allowed(client_host, authorization) -> bool:
+    if METRICS_TOKEN:
+        scheme, _, token = (authorization or "").partition(" ")
+        if scheme.lower() == "bearer" and secrets.compare_digest(token, METRICS_TOKEN):
+            return True
+
+    allowlist = [entry.strip() for entry in METRICS_ALLOWLIST.split(",") if entry.strip()]
+    if "*" in allowlist:
+        return True
+
+    try:
+        address = ipaddress.ip_address(client_host)
+    except (TypeError, ValueError):
+        return False
+    return any(address in ipaddress.ip_network(entry, strict=False) for entry in allowlist)
+
+
+def render_metrics():
+    """
+    Render all metrics in the Prometheus text format.
+
+    When PROMETHEUS_MULTIPROC_DIR is set (gunicorn.conf.py does it), every
+    worker writes its samples to that directory and the scrape aggregates all
+    of them, so the numbers are correct whichever worker answers.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """Record request counts, latency and in-flight requests per route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        IN_PROGRESS.inc()
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            IN_PROGRESS.dec()
+            route = _route_label(scope)
+            LATENCY.labels(scope["method"], route).observe(perf_counter() - start)
+            REQUESTS.labels(scope["method"], route, str(status_code)).inc()
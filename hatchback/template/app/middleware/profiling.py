@@ -0,0 +1,140 @@
+import inspect
+import json
+import logging
+import os
+import random
+from urllib.parse import parse_qs
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.config.database import get_db
+from app.diagnostics import DIAGNOSTICS_ENABLED
+from app.diagnostics.profiler import PROFILE_DIR, SamplingProfiler
+
+logger = logging.getLogger(__name__)
+
+# Fraction of all requests (0.0 - 1.0) profiled and stored in PROFILE_DIR
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", 0.001))
+
+
+def _profile_mode(scope):
+    """
+    Return the profiling mode asked for by the request: 'store' (write the
+    profile to PROFILE_DIR and return its name in X-Profile-File) or 'return'
+    (respond with the speedscope file instead of the normal body).
+    """
+    value = Headers(scope=scope).get("x-profile")
+    if value is None:
+        values = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("profile")
+        value = values[0] if values else None
+    if value is None or value.lower() in ("", "0", "false"):
+        return None
+    return "return" if value.lower() == "return" else "store"
+
+
+def _authorize_super_admin(app, token: str) -> bool:
+    # Imported here to avoid a circular import (dependencies -> services -> middleware)
+    from fastapi import HTTPException
+    from fastapi.security import HTTPAuthorizationCredentials
+
+    from app.dependencies import RoleChecker, get_current_active_user, get_current_user
+
+    # The session routes would get, so app.dependency_overrides[get_db] (as in tests) applies here too
+    provider = getattr(app, "dependency_overrides", {}).get(get_db, get_db)
+    session = provider()
+    db = next(session) if inspect.isgenerator(session) else session
+    try:
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+        user = get_current_active_user(get_current_user(credentials, db))
+        RoleChecker(["super_admin"])(user)
+        return True
+    except HTTPException:
+        return False
+    finally:
+        if inspect.isgenerator(session):
+            session.close()
+        else:
+            db.close()
+
+
+async def _is_super_admin(scope) -> bool:
+    scheme, _, token = Headers(scope=scope).get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    return await run_in_threadpool(_authorize_super_admin, scope.get("app"), token)
+
+
+class ProfilingMiddleware:
+    """
+    Profile single requests with the sampling profiler.
+
+    With DIAGNOSTICS_ENABLED, a super admin adds `X-Profile: 1` (or
+    `?profile=1`) to store a speedscope profile of that request, or
+    `X-Profile: return` to get the profile back as the response body.
+    PROFILE_SAMPLE_RATE additionally profiles a random fraction of all
+    requests and stores the files in PROFILE_DIR.
+    """
+
+    def __init__(
+        self,
+        app,
+        enabled: bool = DIAGNOSTICS_ENABLED,
+        sample_rate: float = PROFILE_SAMPLE_RATE,
+        output_dir: str = PROFILE_DIR,
+    ):
+        self.app = app
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.output_dir = output_dir
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        mode = _profile_mode(scope) if self.enabled else None
+        if mode and not await _is_super_admin(scope):
+            mode = None
+        if mode is None and self.sample_rate and random.random() < self.sample_rate:
+            mode = "sampled"
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+
+        name = f"{scope['method']} {scope['path']}"
+        profiler = SamplingProfiler(interval=PROFILE_INTERVAL).start()
+
+        async def send_with_profile(message):
+            if message["type"] == "http.response.start":
+                # The handler is done once the response starts; stop here so the
+                # file name can still be sent in a header.
+                profiler.stop()
+                if mode == "return":
+                    body = json.dumps(profiler.to_speedscope(name)).encode()
+                    await send({
+                        "type": "http.response.start",
+                        "status": 200,
+                        "headers": [
+                            (b"content-type", b"application/json"),
+                            (b"content-length", str(len(body)).encode()),
+                            (b"content-disposition", b'attachment; filename="profile.speedscope.json"'),
+                        ],
+                    })
+                    await send({"type": "http.response.body", "body": body})
+                    return
+
+                path = profiler.save(name, self.output_dir)
+                logger.info(f"Profile for {name} written to {path}")
+                if mode == "store":
+                    MutableHeaders(scope=message).append("X-Profile-File", os.path.basename(path))
+            elif mode == "return":
+                # The original body is replaced by the profile
+                return
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            profiler.stop()
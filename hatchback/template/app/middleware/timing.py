@@ -0,0 +1,236 @@
+import asyncio
+import json
+import logging
+import os
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter
+
+from fastapi.routing import APIRoute
+from jose import JWTError, jwt
+from sqlalchemy import event
+from starlette.datastructures import Headers, MutableHeaders
+
+logger = logging.getLogger(__name__)
+
+# Always send the Server-Timing header (e.g. in staging)
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "false").lower() == "true"
+# Fraction of requests (0.0 - 1.0) measured and logged without exposing the header
+SERVER_TIMING_SAMPLE_RATE = float(os.getenv("SERVER_TIMING_SAMPLE_RATE", 0))
+# Request header admins send to get the breakdown back for a single request
+OPT_IN_HEADER = "x-server-timing"
+ADMIN_ROLES = ("admin", "super_admin")
+
+PHASE_DESCRIPTIONS = {
+    "pool": "DB pool checkout",
+    "db": "SQL",
+    "hash": "Password hashing",
+    "app": "Handler and dependencies",
+    "serialize": "Response encoding",
+    "total": "Total",
+}
+
+_current_timings = ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    """Accumulates per-phase durations (in seconds) for a single request."""
+
+    __slots__ = ("started", "phases", "endpoint_finished", "response_started")
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.phases = {}
+        self.endpoint_finished = None
+        self.response_started = None
+
+    def add(self, phase: str, duration: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + duration
+
+    def breakdown(self) -> dict:
+        """
+        Split the request into phases. Whatever is not accounted for by the
+        measured phases (SQL, pool, hashing, encoding) is attributed to 'app'.
+        """
+        end = self.response_started or perf_counter()
+        total = end - self.started
+        result = dict(self.phases)
+        result["serialize"] = end - self.endpoint_finished if self.endpoint_finished else 0.0
+        result["app"] = max(total - sum(result.values()), 0.0)
+        result["total"] = total
+        return result
+
+
+def current_timings():
+    """Return the timings of the request being measured, or None."""
+    return _current_timings.get()
+
+
+@contextmanager
+def span(phase: str):
+    """
+    Attribute the time spent inside the block to a named phase.
+    It is a no-op for requests that are not being measured.
+    """
+    timings = _current_timings.get()
+    if timings is None:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, perf_counter() - start)
+
+
+def format_server_timing(breakdown: dict) -> str:
+    return ", ".join(
+        f'{phase};dur={duration * 1000:.2f};desc="{PHASE_DESCRIPTIONS.get(phase, phase)}"'
+        for phase, duration in breakdown.items()
+    )
+
+
+def instrument_engine(engine, session_factory):
+    """
+    Register SQLAlchemy listeners that feed the 'db' and 'pool' phases.
+
+    SQL time is measured around cursor execution. Pool time is the gap between
+    a session starting its transaction and receiving a connection, which covers
+    waiting for a pooled connection (or opening a new one).
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if _current_timings.get() is not None:
+            conn.info.setdefault("query_start", []).append(perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        timings = _current_timings.get()
+        starts = conn.info.get("query_start")
+        if timings is not None and starts:
+            timings.add("db", perf_counter() - starts.pop())
+
+    @event.listens_for(session_factory, "after_transaction_create")
+    def _after_transaction_create(session, transaction):
+        if transaction.parent is None and _current_timings.get() is not None:
+            session.info["checkout_start"] = perf_counter()
+
+    @event.listens_for(session_factory, "after_begin")
+    def _after_begin(session, transaction, connection):
+        timings = _current_timings.get()
+        start = session.info.pop("checkout_start", None)
+        if timings is not None and start is not None:
+            timings.add("pool", perf_counter() - start)
+
+
+def _mark_endpoint_finished():
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.endpoint_finished = perf_counter()
+
+
+def _timed_endpoint(call):
+    # Keep the endpoint's sync/async nature so FastAPI still runs sync
+    # endpoints in the threadpool.
+    if asyncio.iscoroutinefunction(call):
+        @wraps(call)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                _mark_endpoint_finished()
+    else:
+        @wraps(call)
+        def wrapper(*args, **kwargs):
+            try:
+                return call(*args, **kwargs)
+            finally:
+                _mark_endpoint_finished()
+
+    wrapper.__server_timing__ = True
+    return wrapper
+
+
+def instrument_routes(app):
+    """
+    Wrap every endpoint so the middleware can tell handler time apart from
+    response validation and encoding. Call it after all routers are included.
+    """
+    for route in app.routes:
+        if isinstance(route, APIRoute) and not getattr(route.dependant.call, "__server_timing__", False):
+            route.dependant.call = _timed_endpoint(route.dependant.call)
+
+
+def _requested_by_admin(scope) -> bool:
+    headers = Headers(scope=scope)
+    if OPT_IN_HEADER not in headers:
+        return False
+
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+
+    # Imported here because the auth service itself uses span()
+    from app.services.auth import ALGORITHM, SECRET_KEY
+
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return False
+    return payload.get("role") in ADMIN_ROLES
+
+
+class ServerTimingMiddleware:
+    """
+    Measure where each request spends its time and report it.
+
+    Requests are measured when SERVER_TIMING_ENABLED is set, when an admin
+    token sends the X-Server-Timing header, or when they fall into the
+    SERVER_TIMING_SAMPLE_RATE sample. Measured requests produce one structured
+    log line; the Server-Timing response header is only added for the first
+    two cases. Unmeasured requests pass straight through.
+    """
+
+    def __init__(self, app, enabled: bool = SERVER_TIMING_ENABLED, sample_rate: float = SERVER_TIMING_SAMPLE_RATE):
+        self.app = app
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        expose = self.enabled or _requested_by_admin(scope)
+        if not expose and not (self.sample_rate and random.random() < self.sample_rate):
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                timings.response_started = perf_counter()
+                status_code = message["status"]
+                if expose:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", format_server_timing(timings.breakdown()))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_timings.reset(token)
+            logger.info(json.dumps({
+                "event": "request_timing",
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status_code,
+                **{f"{phase}_ms": round(duration * 1000, 2) for phase, duration in timings.breakdown().items()},
+            }))
@@ -0,0 +1 @@
+"""Migration tooling driven by `hatchback migrate` (see __main__.py)."""
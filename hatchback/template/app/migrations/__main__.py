@@ -0,0 +1,86 @@
+"""
+Migration tooling, driven by `hatchback migrate`.
+
+    python -m app.migrations squash --up-to 40
+    python -m app.migrations plan --max-lock 5
+    python -m app.migrations advise --top 50
+    python -m app.migrations split-tenant acme --table invoices
+
+Runs in the project environment, where alembic and the app are importable.
+The last line printed is a JSON summary the CLI reads.
+"""
+import argparse
+import json
+import sys
+
+from app.migrations.advise import AdviseError, advise
+from app.migrations.plan import PlanError, plan
+from app.migrations.split import SplitError, split_tenant
+from app.migrations.squash import SquashError, squash
+
+
+def _squash(args):
+    try:
+        summary = squash(args.up_to, force=args.force)
+    except SquashError as e:
+        sys.exit(f"Cannot squash: {e}")
+    print(json.dumps(summary))
+
+
+def _plan(args):
+    try:
+        summary = plan(max_lock=args.max_lock, max_duration=args.max_duration)
+    except PlanError as e:
+        sys.exit(f"Cannot plan: {e}")
+    print(json.dumps(summary))
+
+
+def _advise(args):
+    try:
+        summary = advise(top=args.top, log=args.log, drop_unused=args.drop_unused, write=not args.dry_run)
+    except AdviseError as e:
+        sys.exit(f"Cannot advise: {e}")
+    print(json.dumps(summary))
+
+
+def _split_tenant(args):
+    try:
+        summary = split_tenant(args.tenant, tables=args.table, write=not args.dry_run)
+    except SplitError as e:
+        sys.exit(f"Cannot split tenant: {e}")
+    print(json.dumps(summary))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.migrations")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    squash_parser = subparsers.add_parser("squash", help="Collapse migrations up to a revision into one baseline")
+    squash_parser.add_argument("--up-to", type=int, required=True, help="Last revision to squash (inclusive)")
+    squash_parser.add_argument("--force", action="store_true", help="Squash even if the database is inside the squashed range")
+    squash_parser.set_defaults(func=_squash)
+
+    plan_parser = subparsers.add_parser("plan", help="Estimate the locks and duration of pending migrations")
+    plan_parser.add_argument("--max-lock", type=float, default=5.0, help="Seconds a blocking lock may be held")
+    plan_parser.add_argument("--max-duration", type=float, help="Seconds all pending migrations may take")
+    plan_parser.set_defaults(func=_plan)
+
+    advise_parser = subparsers.add_parser("advise", help="Propose index changes from live query plans and index statistics")
+    advise_parser.add_argument("--top", type=int, default=50, help="Query shapes to plan, most expensive first")
+    advise_parser.add_argument("--log", help="Read query shapes from a PostgreSQL or SQLAlchemy log instead of pg_stat_statements")
+    advise_parser.add_argument("--drop-unused", action="store_true", help="Drop unused indexes in the migration instead of commenting them out")
+    advise_parser.add_argument("--dry-run", action="store_true", help="Report only; write no migration")
+    advise_parser.set_defaults(func=_advise)
+
+    split_parser = subparsers.add_parser("split-tenant", help="Move a tenant's rows into partitions of its own")
+    split_parser.add_argument("tenant", help="The tenant's id or subdomain")
+    split_parser.add_argument("--table", action="append", help="Only this partitioned table (repeatable)")
+    split_parser.add_argument("--dry-run", action="store_true", help="Report only; write no migration")
+    split_parser.set_defaults(func=_split_tenant)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,739 @@
+"""
+Advise on indexes from the queries the database actually runs.
+
+Query shapes come from pg_stat_statements, or from a query log: a PostgreSQL
+server log (log_min_duration_statement / log_statement) or the app's own
+SQLAlchemy echo output. Each shape is planned with EXPLAIN as a generic plan,
+so nothing is executed and parameters need no values. The columns a scan
+filters on are compared with the indexes in the catalog:
+
+- missing: equality filters no index leads with (OR branches count separately)
+- redundant: indexes whose columns are a prefix of another index's on the table
+- unused: indexes pg_stat_user_indexes has never seen scanned since the last stats reset
+
+The advice is written as a migration that builds and drops indexes
+CONCURRENTLY, listing the evidence for each change and the model edits that
+keep the next autogenerate from undoing it. Scans of partitions count for
+their partitioned table, which is where indexes are added and dropped.
+"""
+import inspect
+import os
+import re
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from itertools import product
+from typing import Dict, List, Optional, Tuple
+
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+
+from app.migrations.squash import ALEMBIC_INI
+
+# Queries whose plans are worth reading; the rest never reach an index
+PLANNABLE = re.compile(r"^\s*(SELECT|WITH|UPDATE|DELETE)\b", re.I)
+# Catalog and tooling traffic, including this module's own
+IGNORED = re.compile(r"\b(pg_catalog|pg_stat\w*|pg_class|pg_index|information_schema|alembic_version)\b|^\s*EXPLAIN\b", re.I)
+
+# Log lines a statement starts on: PostgreSQL's "statement:" / "execute <name>:"
+# and SQLAlchemy's engine logger; lines without a timestamp continue the previous one
+LOG_STATEMENT = re.compile(r"(?:duration: ([\d.]+) ms\s+)?(?:statement|execute [^:]*): (.*)|sqlalchemy\.engine(?:\.Engine)? (.*)")
+LOG_RECORD = re.compile(r"^\d{4}-\d{2}-\d{2}[ T]")
+PYFORMAT = re.compile(r"%\((\w+)\)s|%s")
+LITERALS = re.compile(r"'(?:[^']|'')*'|\$\d+|\b\d+(?:\.\d+)?\b")
+
+# A column compared to something, as EXPLAIN prints it: ((email)::text = $1)
+CONDITION = re.compile(
+    r"^\(*(?:(\w+)\.)?\"?(\w+)\"?\)?(?:::[\w ]+(?:\[\])?\)?)*\s*"
+    r"(<>|!=|= ANY|=|<=|>=|<|>)"
+)
+RANGE_OPERATORS = {"<", ">", "<=", ">="}
+# Cartesian products of OR branches grow fast; past this many, plans are not split further
+MAX_ALTERNATIVES = 8
+MAX_NAME = 63
+
+PGSS_QUERY = """
+    SELECT query, calls, {total} AS total_ms, {mean} AS mean_ms
+    FROM pg_stat_statements
+    WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+    ORDER BY {total} DESC
+    LIMIT %s
+"""
+
+INDEX_QUERY = """
+    SELECT i.relname, t.relname, am.amname, x.indisunique, x.indisprimary,
+           x.indpred IS NOT NULL, x.indexprs IS NOT NULL,
+           ARRAY(
+               SELECT a.attname FROM unnest(x.indkey::int2[]) WITH ORDINALITY AS k(attnum, position)
+               JOIN pg_attribute a ON a.attrelid = x.indrelid AND a.attnum = k.attnum
+               ORDER BY k.position
+           ),
+           c.conname,
+           EXISTS (SELECT 1 FROM pg_constraint f WHERE f.contype = 'f' AND f.conindid = x.indexrelid),
+           pg_get_indexdef(x.indexrelid), t.relkind = 'p',
+           -- A partitioned table's index is the sum of its partitions' indexes
+           CASE WHEN i.relkind = 'I' THEN
+               (SELECT coalesce(sum(pg_relation_size(p.relid)), 0) FROM pg_partition_tree(x.indexrelid) p)
+           ELSE pg_relation_size(x.indexrelid) END,
+           CASE WHEN i.relkind = 'I' THEN
+               (SELECT coalesce(sum(ps.idx_scan), 0) FROM pg_partition_tree(x.indexrelid) p
+                JOIN pg_stat_user_indexes ps ON ps.indexrelid = p.relid)
+           ELSE coalesce(s.idx_scan, 0) END
+    FROM pg_index x
+    JOIN pg_class i ON i.oid = x.indexrelid
+    JOIN pg_class t ON t.oid = x.indrelid
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    JOIN pg_am am ON am.oid = i.relam
+    LEFT JOIN pg_constraint c ON c.conindid = x.indexrelid AND c.contype IN ('p', 'u', 'x')
+    LEFT JOIN pg_stat_user_indexes s ON s.indexrelid = x.indexrelid
+    WHERE n.nspname = ANY(current_schemas(false)) AND t.relname = ANY(%s)
+    ORDER BY t.relname, i.relname
+"""
+
+# Each partition (at any depth) -> the partitioned table at the top of its tree
+PARTITION_ROOTS_QUERY = """
+    SELECT c.relname, r.relname
+    FROM pg_class c JOIN pg_class r ON r.oid = pg_partition_root(c.oid)
+    WHERE c.relispartition AND c.relkind IN ('r', 'p')
+"""
+
+STATS_SINCE_QUERY = """
+    SELECT coalesce(
+        (SELECT stats_reset FROM pg_stat_database WHERE datname = current_database()),
+        pg_postmaster_start_time()
+    )
+"""
+
+MIGRATION_TEMPLATE = '''"""Index advice: {title}
+
+Revision ID: {revision}
+Revises: {down_revision}
+Create Date: {created}
+
+Generated by `hatchback db advise` from {source}.
+Review each change against the evidence noted beside it before applying.
+
+Keep the models in sync, or the next autogenerate will undo this:
+{model_changes}
+"""
+from typing import Sequence, Union
+
+from alembic import op
+{imports}
+# revision identifiers, used by Alembic.
+revision: str = {revision!r}
+down_revision: Union[str, None] = {down_revision!r}
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Concurrent builds and drops cannot run in a transaction, and let writes continue
+    with op.get_context().autocommit_block():
+{upgrades}
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+{downgrades}
+'''
+
+
+class AdviseError(Exception):
+    pass
+
+
+@dataclass
+class Query:
+    sql: str
+    calls: int = 0
+    mean_ms: Optional[float] = None
+    total_ms: Optional[float] = None
+
+
+@dataclass
+class Index:
+    name: str
+    table: str
+    method: str
+    unique: bool
+    primary: bool
+    partial: bool
+    expression: bool
+    columns: List[str]
+    constraint: Optional[str]
+    # Another table's foreign key relies on it: it cannot be dropped on its own
+    referenced: bool
+    definition: str
+    # On a partitioned table: built per partition, and never concurrently on the table itself
+    partitioned: bool
+    size: int
+    scans: int
+
+    @property
+    def plain(self):
+        """A btree over plain columns, which prefix reasoning applies to."""
+        return self.method == "btree" and not self.partial and not self.expression
+
+    @property
+    def rank(self):
+        """Which of two identical indexes to keep: the higher rank."""
+        return (self.primary, self.constraint is not None, self.unique, self.scans, -len(self.name))
+
+
+@dataclass
+class Advice:
+    # "missing", "redundant" or "unused"
+    kind: str
+    table: str
+    index: str
+    columns: List[str]
+    reason: str
+    evidence: List[str] = field(default_factory=list)
+    size: int = 0
+    model_change: Optional[str] = None
+    # Written to the migration commented out; unused indexes need a human decision
+    applied: bool = True
+
+
+def _closing(expression, start):
+    depth, quoted = 0, False
+    for position in range(start, len(expression)):
+        char = expression[position]
+        if char == "'":
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+            if depth == 0:
+                return position
+    return -1
+
+
+def _strip(expression):
+    """expression without parentheses wrapping the whole of it."""
+    expression = expression.strip()
+    while expression.startswith("(") and _closing(expression, 0) == len(expression) - 1:
+        expression = expression[1:-1].strip()
+    return expression
+
+
+def _split(expression, keyword):
+    """expression split on a top-level AND or OR."""
+    parts, depth, quoted, start = [], 0, False, 0
+    token = f" {keyword} "
+    position = 0
+    while position < len(expression):
+        char = expression[position]
+        if char == "'":
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and expression.startswith(token, position):
+            parts.append(expression[start:position])
+            position += len(token)
+            start = position
+            continue
+        position += 1
+    parts.append(expression[start:])
+    return parts
+
+
+def alternatives(expression, alias):
+    """
+    The condition as alternatives an index could serve, each {column: "eq" or
+    "range"} for the columns of alias it constrains. A plain AND is one
+    alternative; an OR needs every branch served (a BitmapOr), so it yields one
+    per branch, each carrying the conditions ANDed around the OR.
+    """
+    expression = _strip(expression)
+    branches = _split(expression, "OR")
+    if len(branches) > 1:
+        found = []
+        for branch in branches:
+            found += alternatives(branch, alias)
+        return found[:MAX_ALTERNATIVES]
+    parts = _split(expression, "AND")
+    if len(parts) > 1:
+        found = [{}]
+        for part in parts:
+            options = alternatives(part, alias)
+            found = [{**left, **right} for left, right in product(found, options)][:MAX_ALTERNATIVES]
+        return found
+    match = CONDITION.match(expression)
+    if not match or (match.group(1) and match.group(1) != alias) or match.group(3) in ("<>", "!="):
+        return [{}]
+    return [{match.group(2): "range" if match.group(3) in RANGE_OPERATORS else "eq"}]
+
+
+def scans(plan):
+    """Every node of a plan that reads a table."""
+    if "Relation Name" in plan:
+        yield plan
+    for child in plan.get("Plans", ()):
+        yield from scans(child)
+
+
+def _normalize(sql):
+    return " ".join(LITERALS.sub("?", sql).split())
+
+
+def _parameterize(sql):
+    """SQLAlchemy's psycopg2 placeholders as PostgreSQL's $n, so the shape plans generically."""
+    numbers = {}
+
+    def number(match):
+        key = match.group(1) or f"%s{len(numbers)}"
+        return "$" + str(numbers.setdefault(key, len(numbers) + 1))
+
+    return PYFORMAT.sub(number, sql).replace("%%", "%")
+
+
+def read_log(path):
+    """The statements of a PostgreSQL or SQLAlchemy log, grouped by shape."""
+    statements = []
+    with open(path, "r", errors="replace") as f:
+        current = None
+        for line in f:
+            line = line.rstrip("\n")
+            if not LOG_RECORD.match(line):
+                # PostgreSQL indents continuation lines with a tab; SQLAlchemy does not indent
+                if current is not None and line.strip():
+                    current[1].append(line.strip())
+                continue
+            current = None
+            match = LOG_STATEMENT.search(line)
+            if match:
+                text_ = match.group(2) if match.group(2) is not None else match.group(3)
+                duration = float(match.group(1)) if match.group(1) else None
+                current = (duration, [text_.strip()])
+                statements.append(current)
+
+    shapes: Dict[str, Query] = {}
+    for duration, lines in statements:
+        sql = _parameterize(" ".join(lines).strip().rstrip(";"))
+        if not PLANNABLE.match(sql) or IGNORED.search(sql):
+            continue
+        query = shapes.setdefault(_normalize(sql), Query(sql=sql))
+        query.calls += 1
+        if duration is not None:
+            query.total_ms = (query.total_ms or 0.0) + duration
+            query.mean_ms = query.total_ms / query.calls
+    return sorted(shapes.values(), key=lambda query: (-(query.total_ms or 0.0), -query.calls))
+
+
+def read_pg_stat_statements(cursor, top):
+    """The most expensive statements pg_stat_statements recorded, or None without the extension."""
+    cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_stat_statements'")
+    if cursor.fetchone() is None:
+        return None
+    cursor.execute("SHOW server_version_num")
+    # PostgreSQL 13 split execution time from planning time
+    total, mean = ("total_exec_time", "mean_exec_time") if int(cursor.fetchone()[0]) >= 130000 else ("total_time", "mean_time")
+    cursor.execute("SAVEPOINT hbk_pgss")
+    try:
+        cursor.execute(PGSS_QUERY.format(total=total, mean=mean), (top * 4,))
+    except Exception:
+        # Installed but not in shared_preload_libraries
+        cursor.execute("ROLLBACK TO SAVEPOINT hbk_pgss")
+        return None
+    queries = [
+        Query(sql=sql, calls=calls, total_ms=total_ms, mean_ms=mean_ms)
+        for sql, calls, total_ms, mean_ms in cursor.fetchall()
+        if sql and PLANNABLE.match(sql) and not IGNORED.search(sql)
+    ]
+    return queries[:top]
+
+
+def explain(cursor, sql):
+    """The generic plan of sql as EXPLAIN's JSON, without executing it."""
+    parameters = max((int(number) for number in re.findall(r"\$(\d+)", sql)), default=0)
+    cursor.execute("SAVEPOINT hbk_explain")
+    try:
+        cursor.execute(f"PREPARE hbk_advise AS {sql}")
+        arguments = f"({', '.join(['NULL'] * parameters)})" if parameters else ""
+        cursor.execute(f"EXPLAIN (FORMAT JSON) EXECUTE hbk_advise{arguments}")
+        plan = cursor.fetchone()[0]
+        cursor.execute("DEALLOCATE hbk_advise")
+        cursor.execute("RELEASE SAVEPOINT hbk_explain")
+    except Exception as e:
+        cursor.execute("ROLLBACK TO SAVEPOINT hbk_explain")
+        raise AdviseError(str(e).strip().splitlines()[0]) from e
+    return plan[0]["Plan"] if isinstance(plan, list) else plan["Plan"]
+
+
+def read_indexes(cursor, tables):
+    cursor.execute(INDEX_QUERY, (sorted(tables),))
+    return [
+        Index(
+            name=name, table=table, method=method, unique=unique, primary=primary, partial=partial,
+            expression=expression, columns=list(columns), constraint=constraint, referenced=referenced,
+            definition=definition, partitioned=partitioned, size=int(size), scans=int(scans),
+        )
+        for (name, table, method, unique, primary, partial, expression, columns, constraint,
+             referenced, definition, partitioned, size, scans) in cursor.fetchall()
+    ]
+
+
+def read_partition_roots(cursor):
+    cursor.execute(PARTITION_ROOTS_QUERY)
+    return dict(cursor.fetchall())
+
+
+def serves(index, equal, ranged):
+    """Whether index narrows a scan filtering on the equal and ranged columns."""
+    if not index.plain:
+        return False
+    if equal:
+        # A unique index within the equality columns finds at most one row
+        if index.unique and set(index.columns) <= equal:
+            return True
+        return set(index.columns[: len(equal)]) == equal
+    return bool(ranged) and index.columns[0] in ranged
+
+
+def _index_name(table, columns):
+    name = f"ix_{table}_{'_'.join(columns)}"
+    return name if len(name) <= MAX_NAME else name[:MAX_NAME]
+
+
+def _order(equal, order, existing):
+    """
+    Equality columns for a new index: first those an existing index already
+    leads with (so the new one can replace it), then in query order.
+    """
+    best = []
+    for index in existing:
+        if not index.plain:
+            continue
+        prefix = []
+        for column in index.columns:
+            if column not in equal:
+                break
+            prefix.append(column)
+        if len(prefix) > len(best):
+            best = prefix
+    return best + [column for column in order if column in equal and column not in best]
+
+
+def _shorten(sql, width=160):
+    # The select list says nothing about which index a query needs
+    sql = re.sub(r"^SELECT .{40,}? FROM ", "SELECT ... FROM ", " ".join(sql.split()), flags=re.I)
+    return sql if len(sql) <= width else sql[: width - 3] + "..."
+
+
+def missing_indexes(cursor, queries, tables, indexes, roots=None):
+    """
+    Proposed indexes keyed by (table, columns), each with the query shapes
+    behind it; and plan errors. roots maps partitions to their partitioned table.
+    """
+    roots = roots or {}
+    proposals: Dict[Tuple[str, Tuple[str, ...]], Advice] = {}
+    errors = []
+    by_table: Dict[str, List[Index]] = {}
+    for index in indexes:
+        by_table.setdefault(index.table, []).append(index)
+
+    for query in queries:
+        try:
+            plan = explain(cursor, query.sql)
+        except AdviseError as e:
+            errors.append(f"{_shorten(query.sql, 80)}: {e}")
+            continue
+        for node in scans(plan):
+            table = roots.get(node["Relation Name"], node["Relation Name"])
+            if table not in tables:
+                continue
+            conditions = [node[key] for key in ("Index Cond", "Recheck Cond", "Filter") if key in node]
+            if not conditions:
+                continue
+            alias = node.get("Alias", table)
+            for alternative in alternatives(" AND ".join(f"({condition})" for condition in conditions), alias):
+                equal = {column for column, kind in alternative.items() if kind == "eq"}
+                ranged = {column for column, kind in alternative.items() if kind == "range"}
+                if not equal and not ranged:
+                    continue
+                if any(serves(index, equal, ranged) for index in by_table.get(table, ())):
+                    continue
+                order = list(alternative)
+                columns = tuple(_order(equal, order, by_table.get(table, ())) if equal else [sorted(ranged, key=order.index)[0]])
+                advice = proposals.setdefault((table, columns), Advice(
+                    kind="missing", table=table, index=_index_name(table, columns), columns=list(columns),
+                    reason=f"{node['Node Type']} on {table} (~{int(node.get('Plan Rows', 0)):,} rows per scan) filters on "
+                           f"{', '.join(columns)} with no index leading on them",
+                ))
+                timing = f", {query.mean_ms:.2f} ms mean" if query.mean_ms is not None else ""
+                line = f"{query.calls:,} call(s){timing}: {_shorten(query.sql)}"
+                if line not in advice.evidence:
+                    advice.evidence.append(line)
+
+    # An index that is a prefix of another proposal adds nothing
+    keys = list(proposals)
+    for table, columns in keys:
+        if any(other != columns and other_table == table and other[: len(columns)] == columns for other_table, other in keys):
+            del proposals[(table, columns)]
+    return list(proposals.values()), errors
+
+
+def redundant_indexes(indexes, proposals):
+    """
+    Indexes another index (existing or proposed) makes unnecessary: identical
+    columns, or a non-unique prefix of a longer index on the table.
+    """
+    partitioned = {index.table for index in indexes if index.partitioned}
+    proposed = [
+        Index(
+            name=advice.index, table=advice.table, method="btree", unique=False, primary=False, partial=False,
+            expression=False, columns=advice.columns, constraint=None, referenced=False,
+            definition="", partitioned=advice.table in partitioned, size=0, scans=0,
+        )
+        for advice in proposals
+    ]
+    found = []
+    for index in indexes:
+        if not index.plain or index.primary or index.referenced:
+            continue
+        for other in indexes + proposed:
+            if other is index or other.table != index.table or not other.plain:
+                continue
+            if other.columns == index.columns:
+                if (index.unique and not other.unique) or (other.rank, other.name) < (index.rank, index.name):
+                    continue
+                reason = f"duplicates {other.name} ({', '.join(other.columns)})"
+            elif other.columns[: len(index.columns)] == index.columns and not index.unique:
+                reason = f"is a prefix of {other.name} ({', '.join(other.columns)})"
+            else:
+                continue
+            if any(other is item for item in proposed):
+                reason += ", proposed above"
+            found.append(Advice(
+                kind="redundant", table=index.table, index=index.name, columns=index.columns, reason=reason,
+                evidence=[f"{index.scans:,} scan(s) since the last stats reset"], size=index.size,
+            ))
+            break
+    return found
+
+
+def unused_indexes(indexes, excluded, since):
+    found = []
+    for index in indexes:
+        if index.scans or index.unique or index.primary or index.name in excluded:
+            continue
+        found.append(Advice(
+            kind="unused", table=index.table, index=index.name, columns=index.columns,
+            reason=f"never scanned since {since:%Y-%m-%d %H:%M}; it still costs every write",
+            evidence=[index.definition], size=index.size, applied=False,
+        ))
+    return found
+
+
+def _models():
+    """{table name: mapped class} for the app's models."""
+    from app.config.database import Base
+    import app.models  # noqa: F401  registers the models
+
+    return {mapper.local_table.name: mapper.class_ for mapper in Base.registry.mappers}
+
+
+def _declared_at(model):
+    try:
+        return os.path.relpath(inspect.getsourcefile(model))
+    except (TypeError, OSError):
+        return model.__module__
+
+
+def model_change(advice, models, indexes):
+    """The edit to the models that matches advice, so autogenerate agrees with the migration."""
+    model = models.get(advice.table)
+    if model is None:
+        return None
+    where = f"{model.__name__} ({_declared_at(model)})"
+    table = model.__table__
+    if advice.kind == "missing":
+        columns = ", ".join(repr(column) for column in advice.columns)
+        return f"{where}: add Index({advice.index!r}, {columns}) to __table_args__"
+
+    index = next(index for index in indexes if index.name == advice.index)
+    for declared in table.indexes:
+        if declared.name != index.name:
+            continue
+        columns = list(declared.columns)
+        if len(columns) == 1 and columns[0].index:
+            flags = ["index=True"] + (["unique=True"] if declared.unique and columns[0].unique else [])
+            return f"{where}: remove {' and '.join(flags)} from {model.__name__}.{columns[0].key}"
+        return f"{where}: remove Index({declared.name!r}) from __table_args__"
+    for declared in table.constraints:
+        names = [column.name for column in getattr(declared, "columns", ())]
+        if names != index.columns or declared.__class__.__name__ != "UniqueConstraint":
+            continue
+        if declared.name is None and len(names) == 1:
+            return f"{where}: remove unique=True from {model.__name__}.{names[0]}"
+        return f"{where}: remove UniqueConstraint({declared.name or ', '.join(map(repr, names))}) from __table_args__"
+    # Not declared in the models: autogenerate never recreates it
+    return None
+
+
+def _drop(index, applied=True):
+    prefix = "" if applied else "# "
+    if index.constraint:
+        return f"{prefix}op.drop_constraint({index.constraint!r}, {index.table!r}, type_='unique')"
+    if index.partitioned:
+        # DROP INDEX CONCURRENTLY cannot drop a partitioned index; this one locks the table briefly
+        return f"{prefix}op.drop_index({index.name!r}, table_name={index.table!r}, if_exists=True)"
+    return f"{prefix}op.drop_index({index.name!r}, table_name={index.table!r}, postgresql_concurrently=True, if_exists=True)"
+
+
+def _restore(index, applied=True):
+    prefix = "" if applied else "# "
+    if index.constraint:
+        return f"{prefix}op.create_unique_constraint({index.constraint!r}, {index.table!r}, {index.columns!r})"
+    if index.partitioned and index.plain:
+        return f"{prefix}partitions.create_index({index.name!r}, {index.table!r}, {index.columns!r}, unique={index.unique})"
+    if index.partitioned:
+        definition = re.sub(r"^CREATE (UNIQUE )?INDEX ", r"CREATE \1INDEX IF NOT EXISTS ", index.definition)
+    else:
+        definition = re.sub(r"^CREATE (UNIQUE )?INDEX ", r"CREATE \1INDEX CONCURRENTLY IF NOT EXISTS ", index.definition)
+    return f"{prefix}op.execute({definition!r})"
+
+
+def render_migration(advice, indexes, revision, down_revision, source):
+    by_name = {index.name: index for index in indexes}
+    partitioned = {index.table for index in indexes if index.partitioned}
+    upgrades, downgrades = [], []
+    for item in advice:
+        note = f"# {item.table}.{item.index}: {item.reason}"
+        evidence = [f"#   {line}" for line in item.evidence[:3]]
+        if len(item.evidence) > 3:
+            evidence.append(f"#   ...and {len(item.evidence) - 3} more query shape(s)")
+        if item.kind == "missing" and item.table in partitioned:
+            upgrades += [note] + evidence + [f"partitions.create_index({item.index!r}, {item.table!r}, {item.columns!r})"]
+            downgrades.append(f"op.drop_index({item.index!r}, table_name={item.table!r}, if_exists=True)")
+        elif item.kind == "missing":
+            upgrades += [note] + evidence + [
+                # IF NOT EXISTS would keep the invalid index an interrupted build leaves
+                f"online.drop_invalid_index({item.index!r})",
+                f"op.create_index({item.index!r}, {item.table!r}, {item.columns!r}, "
+                "postgresql_concurrently=True, if_not_exists=True)",
+            ]
+            downgrades.append(
+                f"op.drop_index({item.index!r}, table_name={item.table!r}, postgresql_concurrently=True, if_exists=True)"
+            )
+        else:
+            index = by_name[item.index]
+            if not item.applied:
+                note += " (uncomment to drop; rerun with --drop-unused to drop unused indexes)"
+            upgrades += [note] + evidence + [_drop(index, item.applied)]
+            downgrades.append(_restore(index, item.applied))
+        upgrades.append("")
+
+    counts = {kind: sum(1 for item in advice if item.kind == kind) for kind in ("missing", "redundant", "unused")}
+    title = ", ".join(
+        f"{count} {label}" for label, count in
+        (("new index(es)", counts["missing"]), ("redundant", counts["redundant"]), ("unused", counts["unused"]))
+        if count
+    )
+    changes = [f"    - {item.model_change}" for item in advice if item.model_change and item.applied]
+    indent = " " * 8
+    helpers = [
+        module for module in ("online", "partitions")
+        if any(line.lstrip("# ").startswith(f"{module}.") for line in upgrades + downgrades)
+    ]
+    return MIGRATION_TEMPLATE.format(
+        title=title,
+        imports=f"\nfrom app.migrations import {', '.join(helpers)}\n" if helpers else "",
+        revision=revision,
+        down_revision=down_revision,
+        created=datetime.now(),
+        source=source,
+        model_changes="\n".join(changes) or "    (no model changes needed)",
+        upgrades="\n".join(indent + line if line else "" for line in upgrades).rstrip() or indent + "pass",
+        downgrades="\n".join(indent + line for line in reversed(downgrades)) or indent + "pass",
+    )
+
+
+def next_revision(script):
+    if len(script.get_heads()) > 1:
+        raise AdviseError(f"migrations have several heads ({', '.join(script.get_heads())}); merge them first")
+    head = script.get_current_head()
+    if head is None:
+        raise AdviseError("there are no migrations yet; create the initial one with `hatchback migrate create`")
+    numbers = [int(revision.revision) for revision in script.walk_revisions() if revision.revision.isdigit()]
+    return str(max(numbers, default=0) + 1), head
+
+
+def advise(top=50, log=None, drop_unused=False, write=True):
+    from app.config.database import SQLALCHEMY_DATABASE_URL
+
+    if not SQLALCHEMY_DATABASE_URL.startswith("postgresql"):
+        raise AdviseError("index advice needs PostgreSQL: it reads plans and index statistics from the live database")
+
+    models = _models()
+    tables = set(models)
+    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    try:
+        connection = engine.raw_connection()
+    except OperationalError as e:
+        raise AdviseError(f"cannot connect: {e.orig}") from e
+    try:
+        cursor = connection.cursor()
+        # Read-only and bounded: planning a shape must never wait on a lock for long
+        cursor.execute("SET LOCAL statement_timeout = '10s'")
+        cursor.execute("SET LOCAL lock_timeout = '2s'")
+        cursor.execute("SET LOCAL plan_cache_mode = force_generic_plan")
+
+        if log:
+            if not os.path.exists(log):
+                raise AdviseError(f"query log {log} not found")
+            queries, source = read_log(log)[:top], f"the query log {log}"
+        else:
+            queries, source = read_pg_stat_statements(cursor, top), "pg_stat_statements"
+        notes = []
+        if queries is None:
+            queries, source = [], "index statistics only"
+            notes.append(
+                "pg_stat_statements is not available, so no query shapes were planned: add it to "
+                "shared_preload_libraries and CREATE EXTENSION pg_stat_statements, or pass --log with a query log"
+            )
+
+        indexes = read_indexes(cursor, tables)
+        cursor.execute(STATS_SINCE_QUERY)
+        since = cursor.fetchone()[0]
+
+        missing, errors = missing_indexes(cursor, queries, tables, indexes, read_partition_roots(cursor))
+        redundant = redundant_indexes(indexes, missing)
+        unused = unused_indexes(indexes, {advice.index for advice in redundant}, since)
+        connection.rollback()
+    finally:
+        connection.close()
+        engine.dispose()
+
+    for advice in unused:
+        advice.applied = drop_unused
+    advice_list = missing + redundant + unused
+    for item in advice_list:
+        item.model_change = model_change(item, models, indexes)
+
+    path = None
+    if write and any(item.applied for item in advice_list):
+        config = Config(ALEMBIC_INI)
+        script = ScriptDirectory.from_config(config)
+        revision, down_revision = next_revision(script)
+        path = os.path.join(script.dir, "versions", f"{revision}_index_advice.py")
+        with open(path, "w") as f:
+            f.write(render_migration(advice_list, indexes, revision, down_revision, source))
+
+    return {
+        "source": source,
+        "queries": len(queries),
+        "since": since.isoformat() if since else None,
+        "advice": [asdict(item) for item in advice_list],
+        "errors": errors,
+        "notes": notes,
+        "migration": path,
+    }
@@ -0,0 +1,104 @@
+"""
+Online schema change helpers for PostgreSQL, used by migrations written with
+`hatchback migrate create --safe`.
+
+Each helper keeps ACCESS EXCLUSIVE locks to catalog-only changes and does the
+long part (validation, backfill) under weaker locks or in small committed
+batches. All of them are idempotent, and the rewrite makes the revision's
+other operations idempotent too (IF [NOT] EXISTS), so a migration that failed
+on a lock timeout after committing some steps can be retried.
+"""
+import time
+
+from alembic import context, op
+from sqlalchemy import text
+
+
+def _quote(identifier):
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _constraint_exists(table, name):
+    if context.is_offline_mode():
+        return False
+    return op.get_bind().execute(
+        text("SELECT 1 FROM pg_constraint WHERE conname = :name AND conrelid = to_regclass(quote_ident(:table))"),
+        {"name": name, "table": table},
+    ).scalar() is not None
+
+
+def drop_invalid_index(name):
+    """
+    Drop the INVALID index an interrupted CREATE INDEX CONCURRENTLY leaves
+    behind, so IF NOT EXISTS rebuilds it instead of keeping it. Call it in an
+    autocommit block.
+    """
+    if context.is_offline_mode():
+        return
+    invalid = op.get_bind().execute(
+        text("SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(quote_ident(:name))"),
+        {"name": name},
+    ).scalar()
+    if invalid:
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {_quote(name)}")
+
+
+def add_constraint(table, name, definition):
+    """
+    Add a CHECK or FOREIGN KEY constraint without scanning the table under an
+    exclusive lock: add it NOT VALID (new rows are checked immediately), then
+    VALIDATE existing rows, which only takes a SHARE UPDATE EXCLUSIVE lock.
+    """
+    if not _constraint_exists(table, name):
+        op.execute(f"ALTER TABLE {_quote(table)} ADD CONSTRAINT {_quote(name)} {definition} NOT VALID")
+    with op.get_context().autocommit_block():
+        op.execute(f"ALTER TABLE {_quote(table)} VALIDATE CONSTRAINT {_quote(name)}")
+
+
+def add_unique_constraint(table, name, columns):
+    """Build the unique index concurrently, then attach it as the constraint (a catalog-only change)."""
+    with op.get_context().autocommit_block():
+        if not _constraint_exists(table, name):
+            drop_invalid_index(name)
+        op.execute(
+            f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {_quote(name)} "
+            f"ON {_quote(table)} ({', '.join(_quote(column) for column in columns)})"
+        )
+    if not _constraint_exists(table, name):
+        op.execute(f"ALTER TABLE {_quote(table)} ADD CONSTRAINT {_quote(name)} UNIQUE USING INDEX {_quote(name)}")
+
+
+def set_not_null(table, column):
+    """
+    SET NOT NULL without a full-table scan under ACCESS EXCLUSIVE: a validated
+    CHECK (column IS NOT NULL) lets PostgreSQL 12+ skip the scan.
+    """
+    check = f"{table}_{column}_not_null"[:63]
+    add_constraint(table, check, f"CHECK ({_quote(column)} IS NOT NULL)")
+    op.execute(f"ALTER TABLE {_quote(table)} ALTER COLUMN {_quote(column)} SET NOT NULL")
+    op.execute(f"ALTER TABLE {_quote(table)} DROP CONSTRAINT IF EXISTS {_quote(check)}")
+
+
+def backfill(table, column, expression, batch_size=5000, pause=0.05):
+    """
+    Set `column = expression` on rows where the column is NULL, batch_size rows
+    per committed statement, sleeping `pause` seconds between batches so
+    replication and autovacuum keep up. Stops when a batch updates nothing.
+    In offline (--sql) mode a single batch statement is emitted.
+    """
+    sql = (
+        f"WITH batch AS (SELECT ctid FROM {_quote(table)} WHERE {_quote(column)} IS NULL LIMIT {int(batch_size)}) "
+        f"UPDATE {_quote(table)} SET {_quote(column)} = {expression} FROM batch "
+        f"WHERE {_quote(table)}.ctid = batch.ctid AND ({expression}) IS NOT NULL"
+    )
+    total = 0
+    with op.get_context().autocommit_block():
+        if context.is_offline_mode():
+            op.execute(sql)
+            return total
+        while True:
+            updated = op.get_bind().execute(text(sql)).rowcount
+            total += updated
+            if not updated:
+                return total
+            time.sleep(pause)
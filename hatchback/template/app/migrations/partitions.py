@@ -0,0 +1,101 @@
+"""
+Migration helpers for hash-partitioned tables (see app/models/partitioning.py).
+
+alembic/env.py passes create_partitions and skip_partition_clones to
+autogenerate, so a migration that creates a partitioned table creates its
+partitions too, and what PostgreSQL derives from them is never dropped.
+create_index builds an index on a partitioned table without blocking writes,
+which CREATE INDEX CONCURRENTLY cannot do on one.
+"""
+from contextlib import nullcontext
+
+from alembic import context, op
+from alembic.operations import ops
+from sqlalchemy import text
+
+from app.migrations.online import drop_invalid_index
+from app.models.partitioning import partition_ddl
+
+PARTITIONS_QUERY = """
+    SELECT c.relname, c.relkind = 'p'
+    FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = to_regclass(quote_ident(:table))
+    ORDER BY c.relname
+"""
+
+
+def _quote(identifier):
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def create_partitions(migration_context, revision, directives):
+    """
+    Alembic process_revision_directives hook. Autogenerate renders the parent
+    of a partitioned model (its create_table carries the partition count in
+    `info`) but not the partitions, so add them right after it. Dropping the
+    parent drops them, so downgrades need nothing.
+    """
+    for upgrade_ops in directives[0].upgrade_ops_list:
+        operations = []
+        for operation in upgrade_ops.ops:
+            operations.append(operation)
+            if isinstance(operation, ops.CreateTableOp) and operation.info.get("partitions"):
+                operations += [
+                    ops.ExecuteSQLOp(statement)
+                    for statement in partition_ddl(operation.table_name, operation.info["partitions"])
+                ]
+        upgrade_ops.ops = operations
+
+
+def skip_partition_clones(connection):
+    """
+    An Alembic include_object hook for the database on connection. PostgreSQL
+    clones each foreign key referencing a partitioned table once per
+    partition; the clones are in no model, so autogenerate would drop them.
+    """
+    partitions = set(connection.execute(text("SELECT relname FROM pg_class WHERE relispartition")).scalars())
+
+    def include_object(object, name, type_, reflected, compare_to):
+        return not (type_ == "foreign_key_constraint" and reflected and object.referred_table.name in partitions)
+
+    return include_object
+
+
+def _autocommit_block():
+    """An autocommit block, unless the migration is in one already (as `hatchback db advise` writes them)."""
+    if op.get_bind().get_execution_options().get("isolation_level") == "AUTOCOMMIT":
+        return nullcontext()
+    return op.get_context().autocommit_block()
+
+
+def create_index(name, table, columns, unique=False):
+    """
+    Build an index on a partitioned table while writes continue: create it on
+    the parent only (instant, and invalid until every partition has one), build
+    each partition's index concurrently, and attach it. Partitions that are
+    partitioned themselves (see `hatchback db split-tenant`) get the same
+    treatment. Idempotent, so a failed run can be retried. Offline (`alembic
+    upgrade --sql`), only the parent's statement is rendered.
+    """
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    column_list = ", ".join(_quote(column) for column in columns)
+    op.execute(f"CREATE {kind} IF NOT EXISTS {_quote(name)} ON ONLY {_quote(table)} ({column_list})")
+    if context.is_offline_mode():
+        # The partitions are only known to the database; `hatchback migrate plan`
+        # reads the ON ONLY statement as this whole build
+        op.get_context().impl.static_output(
+            f"-- partitions.create_index: build {name} CONCURRENTLY on each partition of {table} and attach it"
+        )
+        return
+    for partition, partitioned in op.get_bind().execute(text(PARTITIONS_QUERY), {"table": table}).all():
+        partition_index = (name.replace(table, partition, 1) if table in name else f"{partition}_{name}")[:63]
+        if partitioned:
+            create_index(partition_index, partition, columns, unique)
+        else:
+            with _autocommit_block():
+                drop_invalid_index(partition_index)
+                op.execute(
+                    f"CREATE {kind} CONCURRENTLY IF NOT EXISTS {_quote(partition_index)} "
+                    f"ON {_quote(partition)} ({column_list})"
+                )
+        op.execute(f"ALTER INDEX {_quote(name)} ATTACH PARTITION {_quote(partition_index)}")
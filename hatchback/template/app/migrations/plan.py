@@ -0,0 +1,295 @@
+"""
+Estimate what pending migrations will lock, and for how long.
+
+The pending revisions are rendered to SQL in offline mode (as `alembic upgrade
+--sql` would), and each statement is classified by the PostgreSQL lock it takes
+and the work it does: catalog-only, a full scan, an index build or a table
+rewrite. Sizes and row estimates come from the live catalog, so the estimates
+describe this database. Locks are held until the transaction commits, so a
+fast ALTER followed by a slow UPDATE in the same transaction blocks for both.
+"""
+import io
+import re
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional
+
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.migrations.squash import ALEMBIC_INI, current_revision
+
+MB = 1024 * 1024
+
+# Rough single-backend throughput on commodity hardware; tune for yours
+SCAN_BYTES_PER_SECOND = 200 * MB
+INDEX_BYTES_PER_SECOND = 40 * MB
+REWRITE_BYTES_PER_SECOND = 50 * MB
+UPDATE_ROWS_PER_SECOND = 50_000
+
+# What each lock blocks in other sessions
+BLOCKS = {
+    "ACCESS EXCLUSIVE": "reads, writes",
+    "EXCLUSIVE": "writes",
+    "SHARE ROW EXCLUSIVE": "writes",
+    "SHARE": "writes",
+    "SHARE UPDATE EXCLUSIVE": "",
+    "ROW EXCLUSIVE": "",
+}
+
+NAME = r'("(?:[^"]|"")+"|[\w.$]+)'
+RUNNING = re.compile(r"^-- Running upgrade \S* -> (\S+)")
+VOLATILE_DEFAULT = re.compile(r"\b(random|gen_random_uuid|uuid_generate_v[14]|clock_timestamp|timeofday|nextval)\s*\(", re.I)
+NOT_NULL_CHECK = re.compile(r"ADD CONSTRAINT " + NAME + r' CHECK \(\(?"?(\w+)"? IS NOT NULL\)?\) NOT VALID', re.I)
+
+# A partitioned table's size is that of its partitions
+CATALOG_QUERY = text("""
+    SELECT c.relname, sum(greatest(p.reltuples, 0))::bigint,
+           sum(pg_relation_size(p.oid))::bigint, sum(pg_total_relation_size(p.oid))::bigint
+    FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+    CROSS JOIN LATERAL pg_partition_tree(c.oid) t JOIN pg_class p ON p.oid = t.relid
+    WHERE c.relkind IN ('r', 'p') AND n.nspname = ANY(current_schemas(false))
+    GROUP BY c.relname
+""")
+
+
+class PlanError(Exception):
+    pass
+
+
+@dataclass
+class Statement:
+    revision: str
+    sql: str
+    table: Optional[str] = None
+    lock: Optional[str] = None
+    # "catalog", "scan", "index", "rewrite" or "update"
+    work: str = "catalog"
+    rows: int = 0
+    size: int = 0
+    duration: float = 0.0
+    # How long the lock is held: until the end of the transaction
+    held: float = 0.0
+    blocks: str = ""
+    risk: str = "low"
+    notes: List[str] = field(default_factory=list)
+
+
+def _unquote(name):
+    name = name.split(".")[-1] if not name.startswith('"') else name
+    return name[1:-1].replace('""', '"') if name.startswith('"') else name
+
+
+def render_pending(config, current):
+    """The offline SQL for current..head, split into (revision, statement, in_transaction) tuples."""
+    buffer = io.StringIO()
+    config.output_buffer = buffer
+    command.upgrade(config, f"{current}:head" if current else "head", sql=True)
+
+    statements = []
+    revision = None
+    in_transaction = False
+    pending = []
+    for line in buffer.getvalue().splitlines():
+        match = RUNNING.match(line)
+        if match:
+            revision = match.group(1)
+            continue
+        if not pending and (not line.strip() or line.startswith("--")):
+            continue
+        pending.append(line)
+        if line.rstrip().endswith(";"):
+            sql = "\n".join(pending).strip().rstrip(";").strip()
+            pending = []
+            if sql == "BEGIN":
+                in_transaction = True
+            elif sql == "COMMIT":
+                in_transaction = False
+                statements.append((revision, None, False))
+            elif "alembic_version" not in sql:
+                statements.append((revision, sql, in_transaction))
+    return statements
+
+
+def classify(sql, validated_checks=()):
+    """(table, lock, work, notes) for one statement."""
+    flat = " ".join(sql.split())
+    upper = flat.upper()
+    notes = []
+
+    match = re.match(r"CREATE TABLE (?:IF NOT EXISTS )?" + NAME, flat, re.I)
+    if match:
+        return _unquote(match.group(1)), "ACCESS EXCLUSIVE", "catalog", ["new table"]
+    match = re.match(r"DROP TABLE (?:IF EXISTS )?" + NAME, flat, re.I)
+    if match:
+        return _unquote(match.group(1)), "ACCESS EXCLUSIVE", "catalog", notes
+    match = re.match(r"CREATE (?:UNIQUE )?INDEX (CONCURRENTLY )?(?:IF NOT EXISTS )?(?:" + NAME + r" )?ON (ONLY )?" + NAME, flat, re.I)
+    if match and match.group(3):
+        # Rendered by partitions.create_index, which builds each partition's index concurrently
+        return _unquote(match.group(4)), "SHARE UPDATE EXCLUSIVE", "index", ["partitioned: built concurrently per partition, writes allowed"]
+    if match:
+        if match.group(1):
+            return _unquote(match.group(4)), "SHARE UPDATE EXCLUSIVE", "index", ["concurrent: two scans, writes allowed"]
+        return _unquote(match.group(4)), "SHARE", "index", notes
+    match = re.match(r"DROP INDEX (CONCURRENTLY )?", flat, re.I)
+    if match:
+        return None, "SHARE UPDATE EXCLUSIVE" if match.group(1) else "ACCESS EXCLUSIVE", "catalog", notes
+    match = re.match(r"(?:WITH .*?\)\s*)?(UPDATE|DELETE FROM|INSERT INTO) (?:ONLY )?" + NAME, flat, re.I)
+    if match:
+        if upper.startswith("WITH") and " LIMIT " in upper:
+            notes.append("batched, committed per batch")
+        return _unquote(match.group(2)), "ROW EXCLUSIVE", "update", notes
+
+    match = re.match(r"ALTER TABLE (?:IF EXISTS )?(?:ONLY )?" + NAME + r" (.*)", flat, re.I)
+    if not match:
+        return None, "ACCESS EXCLUSIVE", "catalog", ["unrecognized statement; assuming the strongest lock"]
+    table, action = _unquote(match.group(1)), match.group(2)
+    action_upper = action.upper()
+    lock, work = "ACCESS EXCLUSIVE", "catalog"
+
+    if re.search(r"\bTYPE\b", action_upper) and "ALTER COLUMN" in action_upper:
+        work = "rewrite"
+    if "ADD COLUMN" in action_upper:
+        default = re.search(r"\bDEFAULT (.*)", action, re.I)
+        if default and VOLATILE_DEFAULT.search(default.group(1)):
+            work = "rewrite"
+            notes.append("volatile default")
+        elif "NOT NULL" in action_upper and not default:
+            notes.append("NOT NULL without a default fails if the table has rows")
+    if "SET NOT NULL" in action_upper:
+        column = re.search(r"ALTER COLUMN " + NAME, action, re.I)
+        if column and (table, _unquote(column.group(1))) in validated_checks:
+            notes.append("uses the validated NOT NULL check")
+        else:
+            work = "scan"
+    if "VALIDATE CONSTRAINT" in action_upper:
+        lock, work = "SHARE UPDATE EXCLUSIVE", "scan"
+    if "ADD CONSTRAINT" in action_upper or re.match(r"ADD (FOREIGN KEY|CHECK|UNIQUE|PRIMARY KEY)", action_upper):
+        foreign_key = "FOREIGN KEY" in action_upper
+        if foreign_key:
+            lock = "SHARE ROW EXCLUSIVE"
+            notes.append("also locks the referenced table")
+        if "USING INDEX" in action_upper or "NOT VALID" in action_upper:
+            pass
+        elif "UNIQUE" in action_upper or "PRIMARY KEY" in action_upper:
+            work = "index"
+        else:
+            work = "scan"
+    return table, lock, work, notes
+
+
+def table_stats(url):
+    """{table: (row estimate, heap bytes, total bytes)} from the catalog."""
+    engine = create_engine(url)
+    try:
+        with engine.connect() as connection:
+            return {name: (rows, heap, total) for name, rows, heap, total in connection.execute(CATALOG_QUERY)}
+    except OperationalError as e:
+        raise PlanError(f"cannot read table sizes: {e.orig}") from e
+    finally:
+        engine.dispose()
+
+
+def estimate(statement, stats):
+    rows, heap, total = stats
+    statement.rows, statement.size = rows, total
+    if statement.work == "scan":
+        statement.duration = heap / SCAN_BYTES_PER_SECOND
+    elif statement.work == "index":
+        passes = 2 if statement.lock == "SHARE UPDATE EXCLUSIVE" else 1
+        statement.duration = passes * heap / INDEX_BYTES_PER_SECOND
+    elif statement.work == "rewrite":
+        statement.duration = total / REWRITE_BYTES_PER_SECOND
+    elif statement.work == "update":
+        statement.duration = rows / UPDATE_ROWS_PER_SECOND
+
+
+def plan(max_lock=5.0, max_duration=None):
+    from app.config.database import SQLALCHEMY_DATABASE_URL
+
+    if not SQLALCHEMY_DATABASE_URL.startswith("postgresql"):
+        raise PlanError("planning needs PostgreSQL: lock levels and catalog statistics are PostgreSQL-specific")
+
+    config = Config(ALEMBIC_INI)
+    script = ScriptDirectory.from_config(config)
+    stats = table_stats(SQLALCHEMY_DATABASE_URL)
+    current = current_revision(SQLALCHEMY_DATABASE_URL)
+    if current in script.get_heads():
+        return {"current": current, "head": current, "statements": [], "violations": [], "total_duration": 0.0}
+
+    statements = []
+    transaction = []
+    created = set()
+    not_null_checks = {}
+    validated_checks = set()
+
+    def close_transaction():
+        # Every lock taken in a transaction is held until it commits
+        elapsed = 0.0
+        for item in reversed(transaction):
+            elapsed += item.duration
+            item.held = elapsed if item.blocks else item.duration
+        transaction.clear()
+
+    for revision, sql, in_transaction in render_pending(config, current):
+        if sql is None:
+            close_transaction()
+            continue
+        table, lock, work, notes = classify(sql, validated_checks)
+        statement = Statement(revision=revision, sql=sql, table=table, lock=lock, work=work, notes=notes)
+        if table in created or "new table" in notes:
+            created.add(table)
+        elif table in stats:
+            estimate(statement, stats[table])
+
+        check = NOT_NULL_CHECK.search(" ".join(sql.split()))
+        if check and table:
+            not_null_checks[_unquote(check.group(1))] = (table, check.group(2))
+        validate = re.search(r"VALIDATE CONSTRAINT " + NAME, sql, re.I)
+        if validate and _unquote(validate.group(1)) in not_null_checks:
+            validated_checks.add(not_null_checks[_unquote(validate.group(1))])
+
+        statement.blocks = BLOCKS.get(lock, "")
+        if work == "update" and not notes:
+            # One statement locks every row it touches until commit
+            statement.blocks = "writes to updated rows"
+        if table in created:
+            # Other sessions cannot see the table until the transaction commits
+            statement.blocks = ""
+        statement.held = statement.duration
+        statements.append(statement)
+        if in_transaction:
+            transaction.append(statement)
+        else:
+            close_transaction()
+    close_transaction()
+
+    violations = []
+    for statement in statements:
+        if statement.blocks and statement.held >= max_lock:
+            statement.risk = "high"
+            violations.append(
+                f"revision {statement.revision}: {statement.lock} on {statement.table} held for "
+                f"~{statement.held:.1f}s (limit {max_lock:g}s) blocks {statement.blocks}"
+            )
+        elif any(note.startswith("NOT NULL without a default") for note in statement.notes) and statement.rows:
+            statement.risk = "high"
+            violations.append(f"revision {statement.revision}: NOT NULL column without a default on {statement.table}, which has rows")
+        elif statement.blocks and statement.table not in created and (statement.rows or statement.work != "catalog"):
+            # Quick, but it queues behind long transactions and everything else queues behind it
+            statement.risk = "medium"
+
+    total = sum(statement.duration for statement in statements)
+    if max_duration is not None and total > max_duration:
+        violations.append(f"estimated total ~{total:.1f}s exceeds {max_duration:g}s")
+
+    return {
+        "current": current,
+        "head": script.get_current_head(),
+        "statements": [asdict(statement) for statement in statements],
+        # Statements in one transaction share its lock window; report each window once
+        "violations": list(dict.fromkeys(violations)),
+        "total_duration": total,
+    }
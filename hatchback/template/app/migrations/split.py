@@ -0,0 +1,311 @@
+"""
+Give one tenant partitions of its own.
+
+A table hash-partitioned by tenant_id (see app/models/partitioning.py) shares
+each partition between all the tenants whose ids hash to it. When one tenant
+outgrows the rest, this writes a migration turning the partition that holds
+it into one partitioned by LIST (tenant_id):
+
+    invoices_p07           FOR VALUES WITH (modulus 16, remainder 7), PARTITION BY LIST (tenant_id)
+      invoices_acme        FOR VALUES IN ('<acme's id>')
+      invoices_p07_shared  DEFAULT: the old partition, with the other tenants' rows
+
+Queries filtering on tenant_id still read a single partition, and the
+tenant's rows can be vacuumed, reindexed, moved to another tablespace or
+detached on their own. Splitting another tenant out of the same partition
+only adds its LIST partition.
+
+The migration copies the tenant's rows while holding an exclusive lock on the
+table. Foreign keys referencing the table are dropped for the move and added
+back NOT VALID, then validated without blocking writes.
+"""
+import os
+import re
+from datetime import datetime
+
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+
+from app.migrations.advise import AdviseError, next_revision
+from app.migrations.squash import ALEMBIC_INI
+
+TENANT_COLUMN = "tenant_id"
+HASH_BOUND = re.compile(r"modulus (\d+), remainder (\d+)")
+MAX_NAME = 63
+
+PARTITION_KEY_QUERY = """
+    SELECT p.partstrat, a.attname
+    FROM pg_partitioned_table p
+    JOIN pg_attribute a ON a.attrelid = p.partrelid AND a.attnum = p.partattrs[0]
+    WHERE p.partrelid = to_regclass(%s) AND p.partnatts = 1
+"""
+
+PARTITIONS_QUERY = """
+    SELECT c.relname, c.relkind = 'p', pg_get_expr(c.relpartbound, c.oid),
+           pg_size_pretty((SELECT sum(pg_total_relation_size(t.relid)) FROM pg_partition_tree(c.oid) t))
+    FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = to_regclass(%s)
+    ORDER BY c.relname
+"""
+
+# Foreign keys into the table; those PostgreSQL cloned for each partition have a parent
+REFERENCES_QUERY = """
+    SELECT c.conname, r.relname, pg_get_constraintdef(c.oid)
+    FROM pg_constraint c JOIN pg_class r ON r.oid = c.conrelid
+    WHERE c.contype = 'f' AND c.confrelid = to_regclass(%s) AND c.conparentid = 0
+    ORDER BY r.relname, c.conname
+"""
+
+MIGRATION_TEMPLATE = '''"""Split tenant {tenant} into partitions of its own
+
+Revision ID: {revision}
+Revises: {down_revision}
+Create Date: {created}
+
+Generated by `hatchback db split-tenant`. Each table is locked (ACCESS
+EXCLUSIVE) while the tenant's rows are copied, so apply it when traffic is low:
+{tables}
+"""
+from typing import Sequence, Union
+
+from alembic import op
+{imports}
+# revision identifiers, used by Alembic.
+revision: str = {revision!r}
+down_revision: Union[str, None] = {down_revision!r}
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+{upgrades}
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+{downgrades}
+'''
+
+
+class SplitError(Exception):
+    pass
+
+
+def partitioned_tables():
+    """The tables of the models hash-partitioned by tenant_id."""
+    from app.config.database import Base
+    import app.models  # noqa: F401  (registers the models)
+
+    return sorted(table.name for table in Base.metadata.tables.values() if table.info.get("partition_by") == TENANT_COLUMN)
+
+
+def find_tenant(cursor, tenant):
+    """(id, subdomain) of the tenant with that id or subdomain."""
+    cursor.execute("SELECT id::text, subdomain FROM tenants WHERE id::text = %s OR subdomain = %s", (tenant, tenant))
+    rows = cursor.fetchall()
+    if not rows:
+        raise SplitError(f"no tenant has the id or subdomain '{tenant}'")
+    return rows[0]
+
+
+def _partition_key(cursor, table):
+    cursor.execute(PARTITION_KEY_QUERY, (table,))
+    row = cursor.fetchone()
+    return tuple(row) if row else None
+
+
+def _partitions(cursor, table):
+    cursor.execute(PARTITIONS_QUERY, (table,))
+    return cursor.fetchall()
+
+
+def plan_split(cursor, table, tenant_id, slug):
+    """
+    How to split the tenant out of table: a dict naming the hash partition
+    holding it, the tenant's new partition and the shared DEFAULT one, or None
+    when the tenant already has its own partition.
+    """
+    if _partition_key(cursor, table) != ("h", TENANT_COLUMN):
+        raise SplitError(f"{table} is not hash-partitioned by {TENANT_COLUMN} in the database; apply the migrations first")
+
+    for partition, partitioned, bound, size in _partitions(cursor, table):
+        match = HASH_BOUND.search(bound or "")
+        if not match:
+            continue
+        cursor.execute("SELECT satisfies_hash_partition(to_regclass(%s), %s, %s, %s::uuid)",
+                       (table, int(match.group(1)), int(match.group(2)), tenant_id))
+        if cursor.fetchone()[0]:
+            break
+    else:
+        raise SplitError(f"no partition of {table} holds tenant {tenant_id}")
+
+    shared = f"{partition}_shared"[:MAX_NAME]
+    if partitioned:
+        # Split before: a LIST partition per split tenant, and the rest in the DEFAULT one
+        if _partition_key(cursor, partition) != ("l", TENANT_COLUMN):
+            raise SplitError(f"{partition} is partitioned by something other than LIST ({TENANT_COLUMN}); split it by hand")
+        shared = None
+        for child, _, child_bound, _ in _partitions(cursor, partition):
+            if child_bound == "DEFAULT":
+                shared = child
+            elif tenant_id in child_bound:
+                return None
+        if shared is None:
+            raise SplitError(f"{partition} has no DEFAULT partition for the other tenants; split it by hand")
+
+    target = f"{table}_{slug}"[:MAX_NAME]
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (target,))
+    if cursor.fetchone()[0]:
+        raise SplitError(f"a relation named {target} already exists")
+
+    cursor.execute(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM {table} WHERE {TENANT_COLUMN} = %s", (tenant_id,))
+    rows = int(cursor.fetchone()[0][0]["Plan"]["Plan Rows"])
+    cursor.execute(REFERENCES_QUERY, (table,))
+    references = [
+        {"name": name, "table": referencing, "definition": re.sub(r"\s+NOT VALID$", "", definition)}
+        for name, referencing, definition in cursor.fetchall()
+    ]
+    return {
+        "table": table,
+        "partition": partition,
+        "bound": bound,
+        "size": size,
+        "rows": rows,
+        "target": target,
+        "shared": shared,
+        "split_before": partitioned,
+        "references": references,
+    }
+
+
+def split_statements(split, tenant_id):
+    """(upgrade, downgrade) SQL moving the tenant's rows into their own partition, and back."""
+    table, partition, shared, target = split["table"], split["partition"], split["shared"], split["target"]
+    if split["split_before"]:
+        upgrade = [f"ALTER TABLE {partition} DETACH PARTITION {shared}"]
+    else:
+        upgrade = [
+            f"ALTER TABLE {table} DETACH PARTITION {partition}",
+            f"ALTER TABLE {partition} RENAME TO {shared}",
+            f"CREATE TABLE {partition} PARTITION OF {table} {split['bound']} PARTITION BY LIST ({TENANT_COLUMN})",
+        ]
+    upgrade += [
+        f"CREATE TABLE {target} PARTITION OF {partition} FOR VALUES IN ('{tenant_id}')",
+        f"INSERT INTO {target} SELECT * FROM {shared} WHERE {TENANT_COLUMN} = '{tenant_id}'",
+        f"DELETE FROM {shared} WHERE {TENANT_COLUMN} = '{tenant_id}'",
+        f"ALTER TABLE {partition} ATTACH PARTITION {shared} DEFAULT",
+    ]
+
+    downgrade = [
+        f"ALTER TABLE {partition} DETACH PARTITION {shared}",
+        f"INSERT INTO {shared} SELECT * FROM {target}",
+        f"DROP TABLE {target}",
+    ]
+    if split["split_before"]:
+        downgrade.append(f"ALTER TABLE {partition} ATTACH PARTITION {shared} DEFAULT")
+    else:
+        downgrade += [
+            f"ALTER TABLE {table} DETACH PARTITION {partition}",
+            f"DROP TABLE {partition}",
+            f"ALTER TABLE {shared} RENAME TO {partition}",
+            f"ALTER TABLE {table} ATTACH PARTITION {partition} {split['bound']}",
+        ]
+    return upgrade, downgrade
+
+
+def _with_references(statements, references):
+    """
+    Wrap statements in dropping and re-adding the foreign keys into the table:
+    detaching a partition that rows elsewhere reference fails, and deleting
+    the moved rows would cascade.
+    """
+    lines = [f"op.drop_constraint({reference['name']!r}, {reference['table']!r}, type_='foreignkey')" for reference in references]
+    lines += [f"op.execute({statement!r})" for statement in statements]
+    lines += [
+        f"online.add_constraint({reference['table']!r}, {reference['name']!r}, {reference['definition']!r})"
+        for reference in references
+    ]
+    return lines
+
+
+def render_migration(splits, tenant, revision, down_revision):
+    tenant_id, subdomain = tenant
+    upgrades, downgrades, tables = [], [], []
+    for split in splits:
+        upgrade, downgrade = split_statements(split, tenant_id)
+        upgrades += [f"# {split['table']}: ~{split['rows']:,} row(s) from {split['partition']} to {split['target']}"]
+        upgrades += _with_references(upgrade, split["references"]) + [""]
+        downgrades = [f"# {split['table']}: back into {split['partition']}"] + _with_references(downgrade, split["references"]) + [""] + downgrades
+        tables.append(f"    - {split['table']}: ~{split['rows']:,} row(s) out of {split['partition']} ({split['size']})")
+
+    indent = " " * 4
+    uses_online = any(split["references"] for split in splits)
+    return MIGRATION_TEMPLATE.format(
+        tenant=f"{subdomain} ({tenant_id})",
+        revision=revision,
+        down_revision=down_revision,
+        created=datetime.now(),
+        tables="\n".join(tables),
+        imports="\nfrom app.migrations import online\n" if uses_online else "",
+        upgrades="\n".join(indent + line if line else "" for line in upgrades).rstrip(),
+        downgrades="\n".join(indent + line if line else "" for line in downgrades).rstrip(),
+    )
+
+
+def split_tenant(tenant, tables=None, write=True):
+    from app.config.database import SQLALCHEMY_DATABASE_URL
+
+    if not SQLALCHEMY_DATABASE_URL.startswith("postgresql"):
+        raise SplitError("partitions need PostgreSQL")
+
+    partitioned = partitioned_tables()
+    if not partitioned:
+        raise SplitError(f"no model is partitioned by {TENANT_COLUMN}; see `hatchback make --partition-by`")
+    unknown = sorted(set(tables or ()) - set(partitioned))
+    if unknown:
+        raise SplitError(f"{', '.join(unknown)} not partitioned by {TENANT_COLUMN}; partitioned tables are {', '.join(partitioned)}")
+
+    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    try:
+        connection = engine.raw_connection()
+    except OperationalError as e:
+        raise SplitError(f"cannot connect: {e.orig}") from e
+    try:
+        cursor = connection.cursor()
+        # Only reads the catalog: never wait on a lock for long
+        cursor.execute("SET LOCAL statement_timeout = '10s'")
+        cursor.execute("SET LOCAL lock_timeout = '2s'")
+        tenant_id, subdomain = find_tenant(cursor, tenant)
+        slug = re.sub(r"[^a-z0-9_]", "_", (subdomain or tenant_id.replace("-", "")[:12]).lower())
+        splits, notes = [], []
+        for table in tables or partitioned:
+            split = plan_split(cursor, table, tenant_id, slug)
+            if split is None:
+                notes.append(f"{table}: {subdomain} already has its own partition")
+            else:
+                splits.append(split)
+        connection.rollback()
+    finally:
+        connection.close()
+        engine.dispose()
+
+    path = None
+    if write and splits:
+        script = ScriptDirectory.from_config(Config(ALEMBIC_INI))
+        try:
+            revision, down_revision = next_revision(script)
+        except AdviseError as e:
+            raise SplitError(str(e)) from e
+        path = os.path.join(script.dir, "versions", f"{revision}_split_tenant_{slug}.py")
+        with open(path, "w") as f:
+            f.write(render_migration(splits, (tenant_id, subdomain), revision, down_revision))
+
+    return {
+        "tenant": {"id": tenant_id, "subdomain": subdomain},
+        "splits": [dict(split, references=len(split["references"])) for split in splits],
+        "notes": notes,
+        "migration": path,
+    }
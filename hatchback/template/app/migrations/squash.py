@@ -0,0 +1,297 @@
+"""
+Collapse a range of sequential migrations into one baseline migration.
+
+The baseline is built from the schema the range produces: the migrations are
+replayed into a scratch database, which is reflected and rendered as
+create_table/create_index operations. It keeps the revision id of the last
+squashed migration, so databases already at that revision (or later) need no
+change and the next migration still revises it.
+"""
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+
+from alembic import command
+from alembic.autogenerate import compare_metadata, render_python_code
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from alembic.operations import ops
+from alembic.script import ScriptDirectory
+from sqlalchemy import MetaData, create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy_utils import create_database, database_exists, drop_database
+
+from app.migrations.partitions import skip_partition_clones
+
+ALEMBIC_INI = "alembic.ini"
+
+# Statements that change data rather than schema; a baseline cannot carry them
+DATA_OPERATIONS = re.compile(r"\bop\.(execute|bulk_insert|get_bind)\(|\bconnection\.execute\(|\bonline\.backfill\(")
+# ... except the partitions autogenerate adds after a partitioned table
+PARTITION_DDL = re.compile(r"""\bop\.execute\((['"])CREATE TABLE \w+ PARTITION OF .*?\1\)""")
+
+BASELINE_TEMPLATE = '''"""Squashed baseline for revisions {first} to {last}
+
+Revision ID: {revision}
+Revises:
+Create Date: {created}
+
+Generated by `hatchback migrate squash` from the schema those revisions
+produce. Data changes they made are not part of it.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = {revision!r}
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    {upgrades}
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    {downgrades}
+'''
+
+
+# Partitioned tables and partitions, parents first: SQLAlchemy reflects the
+# former as plain tables and the latter as tables of their own
+PARTITIONS_QUERY = text("""
+    SELECT c.relname, c.relispartition, parent.relname,
+           pg_get_expr(c.relpartbound, c.oid), CASE WHEN c.relkind = 'p' THEN pg_get_partkeydef(c.oid) END
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    CROSS JOIN LATERAL (SELECT max(level) AS level FROM pg_partition_tree(pg_partition_root(c.oid))
+                        WHERE relid = c.oid) depth
+    LEFT JOIN pg_inherits i ON i.inhrelid = c.oid AND c.relispartition
+    LEFT JOIN pg_class parent ON parent.oid = i.inhparent
+    WHERE c.relkind IN ('r', 'p') AND (c.relkind = 'p' OR c.relispartition) AND n.nspname = ANY(current_schemas(false))
+    ORDER BY depth.level, c.relname
+""")
+
+PARTITION_NAMES_QUERY = text("SELECT relname FROM pg_class WHERE relispartition AND relkind IN ('r', 'p')")
+
+
+class SquashError(Exception):
+    pass
+
+
+def sequential_revisions(script):
+    """
+    The migrations from base to head, checked to form the single numbered
+    chain `hatchback migrate create` writes (a squashed baseline may start it).
+    """
+    if len(script.get_heads()) > 1:
+        raise SquashError(f"migrations have several heads ({', '.join(script.get_heads())}); merge them first")
+    revisions = list(reversed(list(script.walk_revisions())))
+    previous = None
+    for revision in revisions:
+        if not revision.revision.isdigit():
+            raise SquashError(f"revision '{revision.revision}' is not numbered; only sequential migrations can be squashed")
+        if previous is not None and int(revision.revision) != int(previous) + 1:
+            raise SquashError(f"revision {revision.revision} does not follow {previous}")
+        previous = revision.revision
+    return revisions
+
+
+@contextmanager
+def _database_name(name):
+    """Point alembic/env.py (which reads DATABASE_NAME) at another database."""
+    previous = os.environ.get("DATABASE_NAME")
+    os.environ["DATABASE_NAME"] = name
+    try:
+        yield
+    finally:
+        if previous is None:
+            os.environ.pop("DATABASE_NAME", None)
+        else:
+            os.environ["DATABASE_NAME"] = previous
+
+
+@contextmanager
+def scratch_database(base_url, label):
+    url = make_url(base_url)
+    url = url.set(database=f"{url.database}_{label}_{os.getpid()}")
+    if database_exists(url):
+        drop_database(url)
+    create_database(url)
+    try:
+        with _database_name(url.database):
+            yield url
+    finally:
+        drop_database(url)
+
+
+def reflect_schema(url):
+    """
+    The schema at url. Partitioned tables keep their partition key, and the
+    statements creating their partitions go in metadata.info["partitions"];
+    the partitions, and the foreign keys PostgreSQL clones onto them, are left
+    out (creating the parent and its partitions recreates both).
+    """
+    metadata = MetaData()
+    engine = create_engine(url)
+    try:
+        metadata.reflect(bind=engine)
+        with engine.connect() as connection:
+            partitioning = connection.execute(PARTITIONS_QUERY).all() if engine.dialect.name == "postgresql" else []
+    finally:
+        engine.dispose()
+    if "alembic_version" in metadata.tables:
+        metadata.remove(metadata.tables["alembic_version"])
+
+    partitions = {name for name, is_partition, _, _, _ in partitioning if is_partition}
+    for table in metadata.tables.values():
+        for constraint in [c for c in table.foreign_key_constraints if c.referred_table.name in partitions]:
+            table.constraints.discard(constraint)
+            for element in constraint.elements:
+                element.parent.foreign_keys.discard(element)
+                table.foreign_keys.discard(element)
+    for name in partitions:
+        metadata.remove(metadata.tables[name])
+
+    metadata.info["partitions"] = []
+    for name, is_partition, parent, bound, key in partitioning:
+        if not is_partition:
+            metadata.tables[name].dialect_kwargs["postgresql_partition_by"] = key
+            continue
+        statement = f"CREATE TABLE {name} PARTITION OF {parent} {bound}"
+        metadata.info["partitions"].append(statement + (f" PARTITION BY {key}" if key else ""))
+    return metadata
+
+
+def render_baseline(metadata, url, first, last):
+    tables = metadata.sorted_tables
+    indexes = [index for table in tables for index in sorted(table.indexes, key=lambda i: i.name or "")]
+    upgrade = ops.UpgradeOps(
+        ops=[ops.CreateTableOp.from_table(table) for table in tables]
+        + [ops.ExecuteSQLOp(statement) for statement in metadata.info.get("partitions", [])]
+        + [ops.CreateIndexOp.from_index(index) for index in indexes]
+    )
+    downgrade = ops.DowngradeOps(
+        ops=[ops.DropIndexOp.from_index(index) for index in reversed(indexes)]
+        + [ops.DropTableOp.from_table(table) for table in reversed(tables)]
+    )
+
+    engine = create_engine(url)
+    try:
+        with engine.connect() as connection:
+            context = MigrationContext.configure(connection)
+            upgrades = render_python_code(upgrade, migration_context=context)
+            downgrades = render_python_code(downgrade, migration_context=context)
+    finally:
+        engine.dispose()
+
+    return BASELINE_TEMPLATE.format(
+        first=first,
+        last=last,
+        revision=last,
+        created=datetime.now().isoformat(sep=" "),
+        upgrades=upgrades,
+        downgrades=downgrades,
+    )
+
+
+def current_revision(url):
+    """The revision the database is at, or None if it is unreachable or unversioned."""
+    engine = create_engine(url)
+    try:
+        with engine.connect() as connection:
+            return MigrationContext.configure(connection).get_current_revision()
+    except OperationalError:
+        return None
+    finally:
+        engine.dispose()
+
+
+def squash(up_to, force=False):
+    from app.config.database import SQLALCHEMY_DATABASE_URL
+
+    config = Config(ALEMBIC_INI)
+    script = ScriptDirectory.from_config(config)
+    revisions = sequential_revisions(script)
+    if not revisions:
+        raise SquashError("there are no migrations")
+
+    numbers = [int(revision.revision) for revision in revisions]
+    if up_to not in numbers:
+        raise SquashError(f"revision {up_to} does not exist (migrations run from {numbers[0]} to {numbers[-1]})")
+    squashed = [revision for revision in revisions if int(revision.revision) <= up_to]
+    if len(squashed) < 2:
+        raise SquashError(f"nothing to squash: revision {up_to} is already the first migration")
+    last = str(up_to)
+
+    current = current_revision(SQLALCHEMY_DATABASE_URL)
+    if current in {revision.revision for revision in squashed[:-1]} and not force:
+        raise SquashError(
+            f"the database is at revision {current}, inside the squashed range; after squashing it could "
+            f"not be upgraded. Run 'hatchback migrate apply' first (or pass --force)"
+        )
+
+    data_migrations = []
+    for revision in squashed:
+        with open(revision.path, "r") as f:
+            if DATA_OPERATIONS.search(PARTITION_DDL.sub("", f.read())):
+                data_migrations.append(os.path.basename(revision.path))
+
+    with scratch_database(SQLALCHEMY_DATABASE_URL, "squash") as url:
+        command.upgrade(config, last)
+        metadata = reflect_schema(url)
+        baseline = render_baseline(metadata, url, squashed[0].revision, last)
+
+    # Replay the baseline alone and make sure it yields the same schema
+    with tempfile.TemporaryDirectory() as versions_dir:
+        baseline_name = f"{last}_squashed_baseline.py"
+        with open(os.path.join(versions_dir, baseline_name), "w") as f:
+            f.write(baseline)
+        check_config = Config(ALEMBIC_INI)
+        check_config.set_main_option("version_locations", versions_dir)
+        with scratch_database(SQLALCHEMY_DATABASE_URL, "squash_check") as url:
+            command.upgrade(check_config, last)
+            engine = create_engine(url)
+            try:
+                with engine.connect() as connection:
+                    # Partitions are compared through their DDL, not as tables
+                    partitions = set(connection.execute(PARTITION_NAMES_QUERY).scalars()) if engine.dialect.name == "postgresql" else set()
+                    context = MigrationContext.configure(connection, opts={
+                        "include_name": lambda name, type_, parent_names: not (type_ == "table" and name in partitions),
+                        "include_object": skip_partition_clones(connection),
+                    })
+                    differences = compare_metadata(context, metadata)
+            finally:
+                engine.dispose()
+            replayed = reflect_schema(url)
+    if replayed.info["partitions"] != metadata.info["partitions"]:
+        differences.append("the partitions differ")
+    for name, table in metadata.tables.items():
+        if table.dialect_kwargs.get("postgresql_partition_by") != replayed.tables[name].dialect_kwargs.get("postgresql_partition_by"):
+            differences.append(f"{name} is partitioned differently")
+    if differences:
+        raise SquashError(f"the baseline does not reproduce the schema: {differences[:5]}")
+
+    versions_dir = os.path.dirname(squashed[-1].path)
+    for revision in squashed:
+        os.remove(revision.path)
+    baseline_path = os.path.join(versions_dir, baseline_name)
+    with open(baseline_path, "w") as f:
+        f.write(baseline)
+
+    return {
+        "baseline": baseline_path,
+        "squashed": [revision.revision for revision in squashed],
+        "tables": len(metadata.tables),
+        "data_migrations": data_migrations,
+        "current": current,
+    }
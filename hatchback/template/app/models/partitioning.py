@@ -0,0 +1,55 @@
+"""
+Hash partitioning for PostgreSQL, declared on the model.
+
+A partitioned model passes hash_partitions() as the last item of its
+__table_args__, and has the partition key in its primary key (PostgreSQL
+requires it there and in every unique constraint):
+
+    __table_args__ = (
+        PrimaryKeyConstraint("tenant_id", "id"),
+        hash_partitions("tenant_id", 16),
+    )
+
+The parent table holds no rows. The migration creating it also creates its
+partitions (alembic/env.py adds them to autogenerated migrations, see
+app/migrations/partitions.py); `Base.metadata.create_all()`, as the tests use,
+creates them right after the parent. Other databases ignore the option.
+
+Queries that filter on the key read one partition; any other query reads all
+of them, so every query on a partitioned model should include it.
+"""
+from sqlalchemy import Table, event
+
+from app.config.database import Base
+
+
+def hash_partitions(column, partitions):
+    """Table options partitioning a model by HASH (column) into that many partitions."""
+    return {
+        "postgresql_partition_by": f"HASH ({column})",
+        "info": {"partition_by": column, "partitions": partitions},
+    }
+
+
+def partition_names(table, partitions):
+    width = len(str(partitions - 1))
+    return [f"{table}_p{remainder:0{width}d}" for remainder in range(partitions)]
+
+
+def partition_ddl(table, partitions):
+    """The statements creating the partitions of a hash-partitioned table."""
+    return [
+        f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})"
+        for remainder, name in enumerate(partition_names(table, partitions))
+    ]
+
+
+@event.listens_for(Table, "after_create")
+def _create_partitions(table, connection, **kw):
+    # Only for the models' own tables: migrations create the partitions themselves
+    if table.metadata is not Base.metadata:
+        return
+    partitions = table.info.get("partitions")
+    if partitions and connection.dialect.name == "postgresql":
+        for statement in partition_ddl(table.name, partitions):
+            connection.exec_driver_sql(statement)
@@ -5,8 +5,12 @@ class BaseRepository:
         self.db = db
         self.model = model
 
-    def get_all(self, order_by=None, descending=True):
+    def get_all(self, order_by=None, descending=True, skip=0, limit=None):
         query = self.db.query(self.model)
+        if skip:
+            query = query.offset(skip)
+        if limit is not None:
+            query = query.limit(limit)
         return query.all()
 
     def get_by_id(self, id):
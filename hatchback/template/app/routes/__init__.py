@@ -1,5 +1,7 @@
 from .auth import router as auth_router
+from .diagnostics import router as diagnostics_router
+from .metrics import router as metrics_router
 from .tenant import router as tenant_router
 from .user import router as user_router
 
-routers = [auth_router, tenant_router, user_router]
+routers = [auth_router, tenant_router, user_router, metrics_router, diagnostics_router]
@@ -0,0 +1,60 @@
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.dependencies import RoleChecker, require_diagnostics_enabled
+from app.diagnostics import memory_tracker
+
+router = APIRouter(
+    prefix="/debug/memory",
+    tags=["Diagnostics"],
+    include_in_schema=False,
+    dependencies=[Depends(require_diagnostics_enabled), Depends(RoleChecker(["super_admin"]))],
+)
+
+GroupBy = Literal["lineno", "filename", "traceback"]
+
+
+def _snapshot_not_found(exc: KeyError):
+    return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=exc.args[0])
+
+
+@router.get("")
+def memory_status():
+    """Tracing state, traced and resident memory, and the stored snapshots of this worker."""
+    return memory_tracker.status()
+
+
+@router.post("/start")
+def start_tracing():
+    memory_tracker.start()
+    return memory_tracker.status()
+
+
+@router.post("/stop")
+def stop_tracing():
+    """Stop tracing (it slows allocations down) and drop all snapshots."""
+    memory_tracker.stop()
+    return memory_tracker.status()
+
+
+@router.post("/snapshots", status_code=status.HTTP_201_CREATED)
+def take_snapshot(label: Optional[str] = None):
+    """Take a snapshot. Tracing starts with the first one."""
+    return memory_tracker.take_snapshot(label)
+
+
+@router.get("/snapshots/{snapshot_id}")
+def top_allocators(snapshot_id: int, limit: int = 20, group_by: GroupBy = "lineno"):
+    try:
+        return {"id": snapshot_id, "top": memory_tracker.top(snapshot_id, limit, group_by)}
+    except KeyError as exc:
+        raise _snapshot_not_found(exc)
+
+
+@router.get("/diff")
+def diff_snapshots(from_id: int, to_id: int, limit: int = 20, group_by: GroupBy = "lineno"):
+    try:
+        return memory_tracker.diff(from_id, to_id, limit, group_by)
+    except KeyError as exc:
+        raise _snapshot_not_found(exc)
@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Depends, Response
+
+from app.dependencies import require_metrics_access
+from app.middleware.metrics import render_metrics
+
+router = APIRouter(tags=["Monitoring"])
+
+@router.get("/metrics", include_in_schema=False, dependencies=[Depends(require_metrics_access)])
+def metrics():
+    """
+    Prometheus scrape endpoint.
+    Restricted to METRICS_ALLOWLIST addresses or a METRICS_TOKEN bearer token.
+    """
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
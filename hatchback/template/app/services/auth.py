@@ -6,6 +6,7 @@ from uuid import UUID
 import bcrypt
 from jose import JWTError, jwt
 
+from app.middleware.timing import span
 from app.services.user import UserService
 from app.services.notification import NotificationService
 from fastapi import HTTPException
@@ -31,9 +32,10 @@ class AuthService:
         self.notification_service = NotificationService()
 
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        return bcrypt.checkpw(
-            plain_password.encode("utf-8"), hashed_password.encode("utf-8")
-        )
+        with span("hash"):
+            return bcrypt.checkpw(
+                plain_password.encode("utf-8"), hashed_password.encode("utf-8")
+            )
 
     def authenticate_user(
         self, username: str, password: str, tenant_id: UUID
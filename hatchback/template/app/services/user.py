@@ -4,6 +4,7 @@ import bcrypt
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 
+from app.middleware.timing import span
 from app.models.user import User
 from app.repositories.user import UserRepository
 
@@ -46,9 +47,10 @@ class UserService:
                 status_code=400, detail="error.username_or_email_already_in_use"
             )
 
-        hashed = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode(
-            "utf-8"
-        )
+        with span("hash"):
+            hashed = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode(
+                "utf-8"
+            )
         new_user = User(
             username=username,
             email=email,
@@ -62,9 +64,10 @@ class UserService:
 
     def update_user(self, user: User, update_data: dict):
         if "password" in update_data and update_data["password"]:
-            hashed = bcrypt.hashpw(
-                update_data["password"].encode("utf-8"), bcrypt.gensalt()
-            ).decode("utf-8")
+            with span("hash"):
+                hashed = bcrypt.hashpw(
+                    update_data["password"].encode("utf-8"), bcrypt.gensalt()
+                ).decode("utf-8")
             update_data["hashed_password"] = hashed
             del update_data["password"]
         
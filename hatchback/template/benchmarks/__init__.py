@@ -0,0 +1,3 @@
+from .runner import BenchContext, scenario
+
+__all__ = ["BenchContext", "scenario"]
@@ -0,0 +1,53 @@
+"""
+Run the benchmark scenarios and write the results as JSON.
+
+    python -m benchmarks --dataset medium --concurrency 20 --output results.json
+
+Without --db-url the app runs against a throwaway SQLite database. A
+--db-url database is dropped and recreated: point it at a dedicated one.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+
+from benchmarks.runner import DATASETS, run
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("--dataset", choices=list(DATASETS), default="small")
+    parser.add_argument("--db-url", help="Dedicated benchmark database (its tables are dropped and recreated)")
+    parser.add_argument("--requests", type=int, default=500, help="Measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent clients")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests per scenario")
+    parser.add_argument("--scenario", "-s", action="append", help="Only run scenarios whose name contains this (repeatable)")
+    parser.add_argument("--output", default=os.path.join("benchmarks", "results", "latest.json"))
+    args = parser.parse_args(argv)
+
+    from app.config.database import SQLALCHEMY_DATABASE_URL
+
+    if args.db_url == SQLALCHEMY_DATABASE_URL:
+        sys.exit("Refusing to benchmark against the application database: its tables would be dropped.")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_url = args.db_url or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        results = asyncio.run(run(
+            db_url,
+            dataset=args.dataset,
+            requests=args.requests,
+            concurrency=args.concurrency,
+            warmup=args.warmup,
+            only=args.scenario,
+        ))
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""Scenarios for the endpoints every Hatchback project ships with."""
+from benchmarks import scenario
+
+
+@scenario("auth.login")
+async def login(ctx):
+    # Dominated by bcrypt on purpose: that is what a login costs
+    return await ctx.client.post("/auth/login", json={
+        "username": ctx.username,
+        "password": ctx.password,
+        "tenant_id": ctx.tenant_id,
+    })
+
+
+@scenario("users.me")
+async def users_me(ctx):
+    return await ctx.client.get("/users/me", headers=ctx.auth_headers)
+
+
+@scenario("users.list")
+async def list_users(ctx):
+    return await ctx.client.get("/users", params={"limit": 100}, headers=ctx.auth_headers)
+
+
+@scenario("tenants.lookup")
+async def tenant_lookup(ctx):
+    return await ctx.client.get("/tenants/lookup", params={"subdomain": ctx.tenant_subdomain})
@@ -0,0 +1,297 @@
+"""
+In-process HTTP benchmark runner used by `hatchback bench`.
+
+Scenarios are async functions registered with @scenario in benchmarks/bench_*.py.
+Each one sends a single request through `ctx.client` and returns the response;
+the runner calls it `requests` times from `concurrency` concurrent workers and
+records the latency of every call.
+"""
+import asyncio
+import importlib
+import logging
+import math
+import os
+import pkgutil
+import platform
+import statistics
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from time import perf_counter
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import bcrypt
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Tenants and users seeded per dataset
+DATASETS = {
+    "small": {"tenants": 1, "users": 100},
+    "medium": {"tenants": 5, "users": 1_000},
+    "large": {"tenants": 20, "users": 10_000},
+}
+
+BENCH_PASSWORD = "bench-password"
+BENCH_ADMIN = "bench_admin"
+
+# Loggers that write a line per request. app/main.py logs at INFO, which would
+# flood the output and add synchronous I/O to every measured request
+REQUEST_LOGGERS = ("httpx", "app")
+
+
+@contextmanager
+def quiet_request_logs():
+    """Raise the per-request loggers to WARNING while measuring."""
+    loggers = [logging.getLogger(name) for name in REQUEST_LOGGERS]
+    levels = [logger.level for logger in loggers]
+    for logger in loggers:
+        logger.setLevel(logging.WARNING)
+    try:
+        yield
+    finally:
+        for logger, level in zip(loggers, levels):
+            logger.setLevel(level)
+
+
+@dataclass
+class Scenario:
+    name: str
+    func: Callable[["BenchContext"], Awaitable[httpx.Response]]
+    setup: Optional[Callable[["BenchContext"], Awaitable[None]]] = None
+
+
+SCENARIOS: Dict[str, Scenario] = {}
+
+
+def scenario(name: str = None, setup=None):
+    """
+    Register a benchmark scenario.
+
+    `setup` is an optional async function called once before the scenario
+    runs, e.g. to create the rows a read or delete scenario needs. It can
+    store what it creates on `ctx.state`.
+    """
+
+    def decorator(func):
+        scenario_name = name or func.__name__
+        SCENARIOS[scenario_name] = Scenario(scenario_name, func, setup)
+        return func
+
+    return decorator
+
+
+@dataclass
+class BenchContext:
+    client: httpx.AsyncClient
+    tenant_id: str
+    tenant_subdomain: str
+    username: str
+    password: str
+    token: str
+    # Session factory bound to the benchmark database, for setup code
+    session_factory: Optional[Callable] = None
+    # Calls the current scenario will receive (warmup included)
+    total_requests: int = 0
+    state: dict = field(default_factory=dict)
+
+    @property
+    def auth_headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.token}"}
+
+
+def load_scenarios(package: str = "benchmarks"):
+    """Import every benchmarks/bench_*.py module so their scenarios register."""
+    module = importlib.import_module(package)
+    for info in pkgutil.iter_modules(module.__path__):
+        if info.name.startswith("bench_"):
+            importlib.import_module(f"{package}.{info.name}")
+    return SCENARIOS
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # Nearest-rank method: the smallest value with at least pct% of values <= it
+    index = max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> dict:
+    values = sorted(latencies)
+    completed = len(values)
+    to_ms = 1000
+    return {
+        "requests": completed,
+        "errors": errors,
+        "throughput": completed / elapsed if elapsed else 0.0,
+        "mean_ms": statistics.fmean(values) * to_ms if values else 0.0,
+        "p50_ms": percentile(values, 50) * to_ms,
+        "p95_ms": percentile(values, 95) * to_ms,
+        "p99_ms": percentile(values, 99) * to_ms,
+        "max_ms": values[-1] * to_ms if values else 0.0,
+    }
+
+
+def seed_dataset(session_factory, dataset: str) -> dict:
+    """
+    Insert the dataset's tenants and users. Every user shares one password hash
+    so seeding does not spend minutes in bcrypt.
+    """
+    from app.models.tenant import Tenant
+    from app.models.user import User
+
+    sizes = DATASETS[dataset]
+    hashed = bcrypt.hashpw(BENCH_PASSWORD.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+
+    db = session_factory()
+    try:
+        tenants = [
+            Tenant(name=f"Bench Tenant {i}", subdomain=f"bench{i}", is_active=True)
+            for i in range(sizes["tenants"])
+        ]
+        db.add_all(tenants)
+        db.flush()
+
+        users = [
+            User(
+                tenant_id=tenants[0].id,
+                username=BENCH_ADMIN,
+                email="bench_admin@example.com",
+                hashed_password=hashed,
+                role="admin",
+            )
+        ]
+        for i in range(1, sizes["users"]):
+            users.append(User(
+                tenant_id=tenants[i % len(tenants)].id,
+                username=f"user{i}",
+                email=f"user{i}@example.com",
+                hashed_password=hashed,
+                name="Bench",
+                surname=f"User {i}",
+            ))
+        db.add_all(users)
+        db.commit()
+        return {"tenant_id": str(tenants[0].id), "subdomain": tenants[0].subdomain}
+    finally:
+        db.close()
+
+
+def create_bench_engine(db_url: str, concurrency: int):
+    if db_url.startswith("sqlite"):
+        return create_engine(db_url, connect_args={"check_same_thread": False})
+    return create_engine(db_url, pool_size=concurrency, max_overflow=concurrency)
+
+
+async def run_scenario(ctx: BenchContext, item: Scenario, requests: int, concurrency: int, warmup: int) -> dict:
+    ctx.total_requests = requests + warmup
+    if item.setup is not None:
+        await item.setup(ctx)
+
+    for _ in range(warmup):
+        await item.func(ctx)
+
+    latencies = []
+    errors = 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = perf_counter()
+            try:
+                response = await item.func(ctx)
+                failed = response.status_code >= 400
+            except Exception:
+                failed = True
+            latencies.append(perf_counter() - start)
+            errors += failed
+
+    started = perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, perf_counter() - started)
+
+
+async def run(
+    db_url: str,
+    dataset: str = "small",
+    requests: int = 500,
+    concurrency: int = 10,
+    warmup: int = 20,
+    only: Optional[List[str]] = None,
+    log=print,
+) -> dict:
+    from app.config.database import Base, get_db
+    from app.config.limiter import limiter
+    from app.main import app
+
+    scenarios = load_scenarios()
+    selected = [
+        item for name, item in scenarios.items()
+        if not only or any(pattern in name for pattern in only)
+    ]
+    if not selected:
+        raise SystemExit("No benchmark scenarios matched")
+
+    engine = create_bench_engine(db_url, concurrency)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    log(f"Seeding '{dataset}' dataset...")
+    seeded = seed_dataset(session_factory, dataset)
+
+    def get_bench_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = get_bench_db
+    # Measure the endpoints, not the rate limiter rejecting them
+    limiter.enabled = False
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    try:
+        with quiet_request_logs():
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                login = await client.post("/auth/login", json={
+                    "username": BENCH_ADMIN,
+                    "password": BENCH_PASSWORD,
+                    "tenant_id": seeded["tenant_id"],
+                })
+                login.raise_for_status()
+
+                ctx = BenchContext(
+                    client=client,
+                    tenant_id=seeded["tenant_id"],
+                    tenant_subdomain=seeded["subdomain"],
+                    username=BENCH_ADMIN,
+                    password=BENCH_PASSWORD,
+                    token=login.json()["token"]["access_token"],
+                    session_factory=session_factory,
+                )
+                for item in selected:
+                    log(f"Running {item.name}...")
+                    ctx.state = {}
+                    results[item.name] = await run_scenario(ctx, item, requests, concurrency, warmup)
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        engine.dispose()
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "dataset": dataset,
+            "database": engine.url.get_backend_name(),
+            "requests": requests,
+            "concurrency": concurrency,
+            "warmup": warmup,
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "scenarios": results,
+    }
@@ -0,0 +1,73 @@
+"""
+Gunicorn configuration for production serving.
+
+Used by the Dockerfile CMD and by `hatchback run --prod`. Every setting can be
+overridden through environment variables, so the container and the CLI share
+the same defaults.
+"""
+import gc
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+
+# Uvicorn workers pick uvloop and httptools automatically when they are
+# installed (they ship with `uvicorn[standard]`).
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import the app once in the master and fork it into the workers.
+preload_app = True
+
+keepalive = int(os.getenv("KEEP_ALIVE", 5))
+backlog = int(os.getenv("BACKLOG", 2048))
+timeout = int(os.getenv("TIMEOUT", 60))
+
+# `kill -HUP <master pid>` reloads workers gracefully; in-flight requests get
+# this many seconds to finish before a worker is killed.
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", 30))
+
+# Recycle each worker after N requests (plus jitter so they don't all restart
+# at once) to cap slow memory growth.
+max_requests = int(os.getenv("MAX_REQUESTS", 10000))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", 1000))
+
+accesslog = os.getenv("ACCESS_LOG", "-")
+errorlog = "-"
+
+# Workers write their metrics here so /metrics can aggregate all of them.
+# Must be set before the app (and prometheus_client) is imported. A directory
+# set by the operator is theirs to empty between runs; this one is created
+# fresh on the first load only, since `kill -HUP` re-reads this file while
+# the workers are writing to it.
+if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = os.path.join(
+        tempfile.gettempdir(), f"prometheus_multiproc_{os.getpid()}"
+    )
+    # Left over by an earlier master with the same pid
+    shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+
+def when_ready(server):
+    # The app is already imported in the master at this point. Moving every
+    # object allocated so far into the permanent generation keeps the GC from
+    # touching those pages, so forked workers share them copy-on-write.
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Connections must never be shared across processes. The engine is created
+    # in the master by the preload, so drop any pooled connections it holds.
+    from app.config.database import engine
+
+    engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    # Drop live gauges (in-flight requests, pool usage) of workers that exited
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -1,53 +1,261 @@
+import itertools
+import os
+import subprocess
+import sys
+from functools import lru_cache
+
+import bcrypt
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
 from app.main import app
 from app.config.database import Base, get_db
+from app.models.tenant import Tenant
+from app.models.user import User
+from app.services.auth import AuthService
 
 # Use in-memory SQLite for tests
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
+# Set by `hatchback test --postgres`. Its database is only a base name: the run migrates
+# <name>_hbk_template once, runs each worker on a <name>_hbk_<worker> clone of it and drops
+# them all, but never creates, changes or drops <name> itself
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+# Set by pytest-xdist in its workers (gw0, gw1, ...)
+WORKER = os.getenv("PYTEST_XDIST_WORKER")
+
+DEFAULT_PASSWORD = "password123"
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _database(suffix):
+    """The name of a database this run owns, derived from TEST_DATABASE_URL's."""
+    return f"{make_url(TEST_DATABASE_URL).database}_hbk_{suffix}"
+
+
+def _admin(*statements):
+    """Run statements on the server's maintenance database, outside a transaction."""
+    url = make_url(TEST_DATABASE_URL)
+    engine = create_engine(url.set(database="postgres"), isolation_level="AUTOCOMMIT")
+    try:
+        with engine.connect() as connection:
+            for statement in statements:
+                connection.exec_driver_sql(statement)
+    except OperationalError as e:
+        raise pytest.UsageError(f"cannot use TEST_DATABASE_URL {url.render_as_string()}: {e.orig}")
+    finally:
+        engine.dispose()
+
+
+def _create_template():
+    """Recreate the template database from the migrations (and models not migrated yet)."""
+    name = _database("template")
+    url = make_url(TEST_DATABASE_URL).set(database=name)
+    _admin(f"DROP DATABASE IF EXISTS {_quote(name)} WITH (FORCE)", f"CREATE DATABASE {_quote(name)}")
+    env = dict(
+        os.environ,
+        DATABASE_USERNAME=url.username or "",
+        DATABASE_PASSWORD=url.password or "",
+        DATABASE_HOSTNAME=url.host or "localhost",
+        DATABASE_PORT=str(url.port or 5432),
+        DATABASE_NAME=name,
+    )
+    result = subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], env=env, capture_output=True, text=True)
+    if result.returncode:
+        raise pytest.UsageError(f"migrating the template database failed:\n{result.stderr}")
+    engine = create_engine(url)
+    try:
+        Base.metadata.create_all(bind=engine)
+    finally:
+        # CREATE DATABASE ... TEMPLATE fails while anyone is connected to the template
+        engine.dispose()
+
+
+def pytest_configure(config):
+    if TEST_DATABASE_URL and WORKER is None:
+        _create_template()
+
+
+def pytest_unconfigure(config):
+    if TEST_DATABASE_URL and WORKER is None:
+        _admin(f"DROP DATABASE IF EXISTS {_quote(_database('template'))} WITH (FORCE)")
+
+
+def _sqlite_engine():
+    engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+
+    # pysqlite's own transaction handling breaks SAVEPOINTs; let SQLAlchemy emit BEGIN itself
+    @event.listens_for(engine, "connect")
+    def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+    return engine
+
+
+TestingSessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    # commit() inside the app releases a SAVEPOINT instead of committing the test's transaction
+    join_transaction_mode="create_savepoint",
 )
 
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="session")
+def db_engine():
+    """
+    Creates the schema once for the whole test session: in SQLite, or in this
+    worker's PostgreSQL database, copied from the migrated template in milliseconds.
+    """
+    if not TEST_DATABASE_URL:
+        engine = _sqlite_engine()
+        Base.metadata.create_all(bind=engine)
+        yield engine
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+        return
+
+    name = _database(WORKER or "main")
+    _admin(
+        f"DROP DATABASE IF EXISTS {_quote(name)} WITH (FORCE)",
+        f"CREATE DATABASE {_quote(name)} TEMPLATE {_quote(_database('template'))}",
+    )
+    engine = create_engine(make_url(TEST_DATABASE_URL).set(database=name))
+    yield engine
+    engine.dispose()
+    _admin(f"DROP DATABASE IF EXISTS {_quote(name)} WITH (FORCE)")
+
 
 @pytest.fixture(scope="function")
-def db_session():
+def db_connection(db_engine):
     """
-    Creates a fresh database session for a test.
+    A connection inside an outer transaction that is rolled back after the test,
+    so every test starts from an empty database without recreating tables.
     """
-    # Create tables
-    Base.metadata.create_all(bind=engine)
-    
-    db = TestingSessionLocal()
+    connection = db_engine.connect()
+    transaction = connection.begin()
     try:
-        yield db
+        yield connection
     finally:
-        db.close()
-        # Drop tables after test
-        Base.metadata.drop_all(bind=engine)
+        transaction.rollback()
+        connection.close()
+
+
+@pytest.fixture(scope="function")
+def db_session(db_connection):
+    """
+    Session for the test body. Commits (including BaseRepository's) become
+    SAVEPOINT releases and are undone with the outer transaction.
+    """
+    session = TestingSessionLocal(bind=db_connection)
+    try:
+        yield session
+    finally:
+        session.close()
+
 
 @pytest.fixture(scope="function")
-def client(db_session):
+def client(db_connection):
     """
-    FastAPI TestClient with overridden dependency.
+    FastAPI TestClient whose requests get their own sessions on the test's
+    connection: they see what the test created, and their writes are rolled back too.
     """
     def override_get_db():
+        db = TestingSessionLocal(bind=db_connection)
         try:
-            yield db_session
+            yield db
         finally:
-            db_session.close()
+            db.close()
 
     app.dependency_overrides[get_db] = override_get_db
-    
+
     with TestClient(app) as c:
         yield c
-    
+
     app.dependency_overrides.clear()
+
+
+@lru_cache(maxsize=None)
+def hash_password(password):
+    # Minimum bcrypt cost, hashed once per password: tests check behavior, not hashing strength
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=4)).decode("utf-8")
+
+
+@pytest.fixture
+def tenant_factory(db_session):
+    """
+    Create and commit a Tenant; keyword arguments override the defaults.
+        tenant = tenant_factory(subdomain="acme")
+    """
+    sequence = itertools.count(1)
+
+    def create(**overrides):
+        n = next(sequence)
+        fields = {"name": f"Tenant {n}", "subdomain": f"tenant{n}", "is_active": True}
+        fields.update(overrides)
+        tenant = Tenant(**fields)
+        db_session.add(tenant)
+        db_session.commit()
+        return tenant
+
+    return create
+
+
+@pytest.fixture
+def user_factory(db_session, tenant_factory):
+    """
+    Create and commit a User (in a new tenant unless one is given) whose
+    password is DEFAULT_PASSWORD unless `password` is passed.
+        admin = user_factory(role="admin", tenant=tenant)
+    """
+    sequence = itertools.count(1)
+
+    def create(tenant=None, password=DEFAULT_PASSWORD, **overrides):
+        n = next(sequence)
+        tenant = tenant or tenant_factory()
+        fields = {
+            "tenant_id": tenant.id,
+            "username": f"user{n}",
+            "email": f"user{n}@example.com",
+            "hashed_password": hash_password(password),
+            "role": "client",
+            "status": "active",
+        }
+        fields.update(overrides)
+        user = User(**fields)
+        db_session.add(user)
+        db_session.commit()
+        return user
+
+    return create
+
+
+@pytest.fixture
+def auth_headers(db_session):
+    """
+    Bearer headers for a user, as the login endpoint would issue them.
+        client.get("/users", headers=auth_headers(admin))
+    """
+    def headers(user):
+        token = AuthService(db_session).create_access_token(
+            data={"id": str(user.id), "tenant_id": str(user.tenant_id), "role": user.role}
+        )
+        return {"Authorization": f"Bearer {token}"}
+
+    return headers
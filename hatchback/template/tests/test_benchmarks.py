@@ -0,0 +1,23 @@
+from benchmarks.runner import SCENARIOS, load_scenarios, percentile, summarize
+
+
+def test_core_scenarios_are_registered():
+    load_scenarios()
+    for name in ("auth.login", "users.me", "users.list", "tenants.lookup"):
+        assert name in SCENARIOS
+
+
+def test_percentile_uses_nearest_rank():
+    values = [i / 1000 for i in range(1, 101)]
+    assert percentile(values, 50) == 0.05
+    assert percentile(values, 99) == 0.099
+    assert percentile([], 95) == 0.0
+
+
+def test_summarize_reports_throughput_and_latency():
+    result = summarize([0.010, 0.020, 0.030, 0.040], errors=1, elapsed=2.0)
+    assert result["requests"] == 4
+    assert result["errors"] == 1
+    assert result["throughput"] == 2.0
+    assert round(result["p50_ms"], 3) == 20.0
+    assert round(result["max_ms"], 3) == 40.0
@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app import diagnostics
+from app.dependencies import get_current_active_user
+from app.diagnostics import MemoryTracker, memory_tracker
+from app.main import app
+
+retained = []
+
+
+def leak(size):
+    retained.append(bytearray(size))
+
+
+@pytest.fixture
+def tracker():
+    tracker = MemoryTracker(max_snapshots=3)
+    yield tracker
+    tracker.stop()
+
+
+@pytest.fixture
+def super_admin():
+    app.dependency_overrides[get_current_active_user] = lambda: SimpleNamespace(role="super_admin", status="active")
+    yield
+    app.dependency_overrides.pop(get_current_active_user, None)
+    memory_tracker.stop()
+
+
+def test_diff_reports_retained_allocations(tracker):
+    before = tracker.take_snapshot("before")
+    for _ in range(100):
+        leak(1024)
+    after = tracker.take_snapshot("after")
+
+    diff = tracker.diff(before["id"], after["id"])
+    assert diff["size_diff"] >= 100 * 1024
+    assert any("test_memory_diagnostics.py" in item["location"] for item in diff["top"])
+    retained.clear()
+
+
+def test_snapshots_are_bounded(tracker):
+    ids = [tracker.take_snapshot()["id"] for _ in range(5)]
+    assert list(tracker.snapshots) == ids[-3:]
+    with pytest.raises(KeyError):
+        tracker.top(ids[0])
+
+
+def test_debug_memory_hidden_when_disabled(client, monkeypatch, super_admin):
+    monkeypatch.setattr(diagnostics, "DIAGNOSTICS_ENABLED", False)
+    assert client.post("/debug/memory/snapshots").status_code == 404
+
+
+def test_debug_memory_requires_super_admin(client, monkeypatch):
+    monkeypatch.setattr(diagnostics, "DIAGNOSTICS_ENABLED", True)
+    app.dependency_overrides[get_current_active_user] = lambda: SimpleNamespace(role="admin", status="active")
+    try:
+        assert client.post("/debug/memory/snapshots").status_code == 403
+    finally:
+        app.dependency_overrides.pop(get_current_active_user, None)
+
+
+def test_debug_memory_snapshot_and_diff(client, monkeypatch, super_admin):
+    monkeypatch.setattr(diagnostics, "DIAGNOSTICS_ENABLED", True)
+
+    first = client.post("/debug/memory/snapshots", params={"label": "before"})
+    assert first.status_code == 201
+    second = client.post("/debug/memory/snapshots", params={"label": "after"})
+
+    top = client.get(f"/debug/memory/snapshots/{second.json()['id']}", params={"limit": 5})
+    assert top.status_code == 200
+    assert len(top.json()["top"]) <= 5
+
+    diff = client.get("/debug/memory/diff", params={"from_id": first.json()["id"], "to_id": second.json()["id"]})
+    assert diff.status_code == 200
+    assert diff.json()["from"]["label"] == "before"
+
+    assert client.get("/debug/memory/diff", params={"from_id": 999, "to_id": 1000}).status_code == 404
@@ -0,0 +1,44 @@
+from app.middleware import metrics
+
+
+def test_metrics_exposes_route_counters(client, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_ALLOWLIST", "*")
+    client.get("/health")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'http_requests_total{method="GET",route="/health",status="200"}' in body
+    assert "http_request_duration_seconds_bucket" in body
+    assert "http_requests_in_progress" in body
+
+
+def test_metrics_denied_outside_allowlist(client, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_ALLOWLIST", "10.0.0.0/8")
+    monkeypatch.setattr(metrics, "METRICS_TOKEN", None)
+    response = client.get("/metrics")
+    assert response.status_code == 403
+
+
+def test_metrics_token_grants_access(client, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_ALLOWLIST", "")
+    monkeypatch.setattr(metrics, "METRICS_TOKEN", "scrape-secret")
+    assert client.get("/metrics").status_code == 403
+
+    response = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert response.status_code == 200
+
+
+def test_allowlist_matches_cidr(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_ALLOWLIST", "127.0.0.1/32,192.168.0.0/16")
+    assert metrics.is_metrics_access_allowed("192.168.1.20", None)
+    assert not metrics.is_metrics_access_allowed("8.8.8.8", None)
+    assert not metrics.is_metrics_access_allowed("testclient", None)
+
+
+def test_default_allowlist_is_loopback_only():
+    # Behind a proxy or Docker's bridge network every client has a private address
+    assert metrics.is_metrics_access_allowed("127.0.0.1", None)
+    assert not metrics.is_metrics_access_allowed("172.17.0.1", None)
+    assert not metrics.is_metrics_access_allowed("10.0.0.5", None)
@@ -0,0 +1,88 @@
+import json
+import os
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.config.database import get_db
+from app.diagnostics import SamplingProfiler
+from app.middleware.profiling import ProfilingMiddleware
+
+
+def busy_wait(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def build_app(**middleware_options):
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, **middleware_options)
+
+    @app.get("/work")
+    def work():
+        busy_wait(0.02)
+        return {"status": "ok"}
+
+    return app
+
+
+def test_profiler_records_busy_function():
+    with SamplingProfiler(interval=0.001) as profiler:
+        busy_wait(0.05)
+
+    assert profiler.samples
+    profile = profiler.to_speedscope("busy")
+    names = {frame["name"] for frame in profile["shared"]["frames"]}
+    assert "busy_wait" in names
+    assert profile["profiles"][0]["type"] == "sampled"
+
+
+def test_profiler_save_writes_speedscope_file(tmp_path):
+    with SamplingProfiler() as profiler:
+        busy_wait(0.01)
+
+    path = profiler.save("GET /users", str(tmp_path))
+    assert os.path.basename(path).endswith("GET_users.speedscope.json")
+    with open(path) as f:
+        assert json.load(f)["name"] == "GET /users"
+
+
+def test_sampled_requests_are_stored(tmp_path):
+    client = TestClient(build_app(enabled=False, sample_rate=1.0, output_dir=str(tmp_path)))
+    response = client.get("/work")
+    assert response.json() == {"status": "ok"}
+    assert "x-profile-file" not in response.headers
+    assert len(os.listdir(tmp_path)) == 1
+
+
+def test_profile_header_requires_super_admin(tmp_path):
+    client = TestClient(build_app(enabled=True, sample_rate=0, output_dir=str(tmp_path)))
+    response = client.get("/work", headers={"X-Profile": "return"})
+    assert response.json() == {"status": "ok"}
+    assert os.listdir(tmp_path) == []
+
+
+def test_profile_header_from_super_admin_returns_profile(tmp_path, db_connection, user_factory, auth_headers):
+    app = build_app(enabled=True, sample_rate=0, output_dir=str(tmp_path))
+
+    # The token is checked against the session the app's get_db override gives
+    def override_get_db():
+        db = Session(bind=db_connection, join_transaction_mode="create_savepoint")
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+
+    admin = user_factory(role="super_admin")
+    response = client.get("/work", headers={"X-Profile": "return", **auth_headers(admin)})
+    assert response.headers["content-disposition"] == 'attachment; filename="profile.speedscope.json"'
+    assert response.json()["profiles"][0]["type"] == "sampled"
+
+    response = client.get("/work", headers={"X-Profile": "return", **auth_headers(user_factory())})
+    assert response.json() == {"status": "ok"}
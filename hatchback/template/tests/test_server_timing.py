@@ -0,0 +1,60 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.middleware.timing import ServerTimingMiddleware, instrument_routes, span
+from app.services.auth import AuthService
+
+
+def build_app(**middleware_options):
+    app = FastAPI()
+    app.add_middleware(ServerTimingMiddleware, **middleware_options)
+
+    @app.get("/work")
+    def work():
+        with span("hash"):
+            pass
+        return {"status": "ok"}
+
+    instrument_routes(app)
+    return app
+
+
+def test_server_timing_header_when_enabled():
+    client = TestClient(build_app(enabled=True, sample_rate=0))
+    response = client.get("/work")
+    assert response.status_code == 200
+    header = response.headers["server-timing"]
+    for phase in ("hash", "app", "serialize", "total"):
+        assert f"{phase};dur=" in header
+
+
+def test_no_header_when_disabled():
+    client = TestClient(build_app(enabled=False, sample_rate=0))
+    response = client.get("/work")
+    assert "server-timing" not in response.headers
+
+
+def test_sampled_requests_do_not_expose_header():
+    client = TestClient(build_app(enabled=False, sample_rate=1.0))
+    response = client.get("/work")
+    assert "server-timing" not in response.headers
+
+
+def test_admin_token_can_opt_in(db_session):
+    client = TestClient(build_app(enabled=False, sample_rate=0))
+    token = AuthService(db_session).create_access_token(data={"role": "admin"})
+    response = client.get(
+        "/work",
+        headers={"Authorization": f"Bearer {token}", "X-Server-Timing": "1"},
+    )
+    assert "total;dur=" in response.headers["server-timing"]
+
+
+def test_non_admin_token_cannot_opt_in(db_session):
+    client = TestClient(build_app(enabled=False, sample_rate=0))
+    token = AuthService(db_session).create_access_token(data={"role": "client"})
+    response = client.get(
+        "/work",
+        headers={"Authorization": f"Bearer {token}", "X-Server-Timing": "1"},
+    )
+    assert "server-timing" not in response.headers
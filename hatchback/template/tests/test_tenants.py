@@ -6,34 +6,30 @@ def test_read_main(client):
     response = client.get("/docs")
     assert response.status_code == 200
 
-def test_create_tenant(client):
+def test_create_tenant(client, user_factory, auth_headers):
     """
     Test creating a new tenant.
     """
+    headers = auth_headers(user_factory(role="admin"))
     response = client.post(
         "/tenants",
-        json={"name": "Test Tenant", "subdomain": "test_subdomain", "domain": "test.com"}
+        json={"name": "Test Tenant", "subdomain": "test-subdomain", "domain": "test.com"},
+        headers=headers,
     )
     assert response.status_code == 200
     data = response.json()
     assert data["name"] == "Test Tenant"
     assert "id" in data
 
-def test_read_tenants(client):
+def test_read_tenants(client, tenant_factory, user_factory, auth_headers):
     """
     Test reading tenants.
     """
-    # Create a tenant first
-    client.post(
-        "/tenants",
-        json={"name": "Tenant 1", "subdomain": "subdomain1", "domain": "t1.com"}
-    )
-    client.post(
-        "/tenants",
-        json={"name": "Tenant 2", "subdomain": "subdomain2", "domain": "t2.com"}
-    )
+    tenant = tenant_factory(name="Tenant 1")
+    tenant_factory(name="Tenant 2")
+    headers = auth_headers(user_factory(tenant=tenant))
 
-    response = client.get("/tenants")
+    response = client.get("/tenants", headers=headers)
     assert response.status_code == 200
     data = response.json()
-    assert len(data) == 2
+    assert {item["name"] for item in data} == {"Tenant 1", "Tenant 2"}
@@ -0,0 +1,280 @@
+"""
+Test impact analysis for `hatchback test --changed`.
+
+Each test file depends on the project modules it imports and on the app code
+its tests executed, read from per-test coverage contexts recorded on earlier
+runs. Executed code rarely shows the modules it only uses at import time
+(models, schemas, settings), so imports of executed files are followed too.
+The import graph is rebuilt from source on every run and costs milliseconds;
+the coverage map is cached in .hatchback/cache and refreshed only for the
+test files that ran, together with each test's resolved dependencies: a
+deleted module is gone from the graph, so only the recorded paths still say
+which tests imported or executed it.
+"""
+import ast
+import hashlib
+import json
+import os
+import sqlite3
+import subprocess
+from datetime import datetime, timezone
+
+CACHE_PATH = os.path.join(".hatchback", "cache", "test-impact.json")
+COVERAGE_PATH = os.path.join(".hatchback", "cache", "test-impact.coverage")
+CACHE_VERSION = 2
+
+SOURCE_DIRS = ("app", "tests", "benchmarks")
+
+# Changes no dependency map can attribute to particular tests
+GLOBAL_FILES = {
+    "tests/conftest.py", "requirements.txt", "pytest.ini", "pyproject.toml", "setup.cfg", "tox.ini", ".env",
+}
+
+
+def _digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _is_test_file(path):
+    name = os.path.basename(path)
+    return path.startswith("tests/") and name.endswith(".py") and (name.startswith("test_") or name.endswith("_test.py"))
+
+
+class ImportGraph:
+    """Project modules and the project files each one imports, resolved name by name."""
+
+    def __init__(self, root="."):
+        self.root = root
+        self.modules = {}
+        for directory in SOURCE_DIRS:
+            for dirpath, dirnames, filenames in os.walk(os.path.join(root, directory)):
+                dirnames[:] = [d for d in dirnames if not d.startswith((".", "__pycache__"))]
+                for filename in filenames:
+                    if filename.endswith(".py"):
+                        path = os.path.relpath(os.path.join(dirpath, filename), root).replace(os.sep, "/")
+                        self.modules[self._module_name(path)] = path
+        self.files = set(self.modules.values())
+        self._trees = {}
+        self._direct = {}
+
+    @staticmethod
+    def _module_name(path):
+        name = path[:-3].replace("/", ".")
+        return name[: -len(".__init__")] if name.endswith(".__init__") else name
+
+    def _tree(self, path):
+        if path not in self._trees:
+            try:
+                with open(os.path.join(self.root, path), "r") as f:
+                    self._trees[path] = ast.parse(f.read())
+            except (OSError, SyntaxError, UnicodeDecodeError):
+                self._trees[path] = None
+        return self._trees[path]
+
+    def _base(self, path, node):
+        """The absolute module a `from ... import` statement in path reads from."""
+        if not node.level:
+            return node.module
+        package = self._module_name(path).split(".")
+        if not path.endswith("__init__.py"):
+            package = package[:-1]
+        package = package[: len(package) - (node.level - 1)]
+        return ".".join(package + ([node.module] if node.module else []))
+
+    def _lookup(self, module, name, seen):
+        """The files that provide `name` to `from module import name`."""
+        submodule = f"{module}.{name}"
+        if submodule in self.modules:
+            return {self.modules[submodule]}
+        path = self.modules.get(module)
+        if path is None:
+            return set()
+        found = {path}
+        # A package re-exporting the name: follow it to where it is defined
+        tree = self._tree(path) if path.endswith("__init__.py") else None
+        if tree is not None and (module, name) not in seen:
+            seen.add((module, name))
+            for node in tree.body:
+                if isinstance(node, ast.ImportFrom):
+                    for alias in node.names:
+                        if (alias.asname or alias.name) == name:
+                            found |= self._lookup(self._base(path, node), alias.name, seen)
+        return found
+
+    def direct(self, path):
+        """Project files path imports, anywhere in the module (function-level imports too)."""
+        if path not in self._direct:
+            deps = set()
+            tree = self._tree(path)
+            for node in ast.walk(tree) if tree is not None else ():
+                if isinstance(node, ast.Import):
+                    for alias in node.names:
+                        if alias.name in self.modules:
+                            deps.add(self.modules[alias.name])
+                elif isinstance(node, ast.ImportFrom):
+                    base = self._base(path, node)
+                    for alias in node.names:
+                        if alias.name != "*":
+                            deps |= self._lookup(base, alias.name, set())
+                        elif base in self.modules:
+                            deps.add(self.modules[base])
+            deps.discard(path)
+            self._direct[path] = deps
+        return self._direct[path]
+
+    def closure(self, seeds):
+        """
+        seeds and everything they import. Package __init__ files are included
+        but not expanded: names imported through them were already resolved to
+        their modules, and expanding `app/routes/__init__.py` would make every
+        route a dependency of whatever touches the router list.
+        """
+        found = set()
+        pending = [seed for seed in seeds if seed in self.files]
+        while pending:
+            path = pending.pop()
+            if path in found:
+                continue
+            found.add(path)
+            if path.endswith("__init__.py") and path not in seeds:
+                continue
+            pending.extend(self.direct(path) - found)
+        return found
+
+    def uses_client(self, path):
+        """Whether any test in the file requests the `client` fixture."""
+        tree = self._tree(path)
+        return tree is not None and any(
+            isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and any(arg.arg == "client" for arg in node.args.args)
+            for node in ast.walk(tree)
+        )
+
+
+def _git(*args):
+    result = subprocess.run(["git", *args], capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip() or f"git {' '.join(args)} failed")
+    return [line for line in result.stdout.splitlines() if line]
+
+
+def changed_files(base="HEAD"):
+    """Files changed since base (committed, staged, unstaged or untracked), relative to the project."""
+    if base != "HEAD":
+        base = _git("merge-base", base, "HEAD")[0]
+    changed = _git("diff", "--name-only", "--relative", base) + _git("ls-files", "--others", "--exclude-standard")
+    return sorted({path for path in changed if not path.startswith(".hatchback/")})
+
+
+def covered_files(data_path, root="."):
+    """{test file: project files its tests executed} from a coverage data file with test contexts."""
+    covered = {}
+    if not os.path.exists(data_path):
+        return covered
+    connection = sqlite3.connect(data_path)
+    try:
+        for table in ("line_bits", "arc"):
+            try:
+                rows = connection.execute(
+                    f"SELECT DISTINCT file.path, context.context FROM {table} "
+                    f"JOIN file ON file.id = {table}.file_id JOIN context ON context.id = {table}.context_id"
+                ).fetchall()
+            except sqlite3.OperationalError:
+                continue
+            for path, context in rows:
+                # pytest-cov names contexts "<nodeid>|setup", "<nodeid>|run"...; "" is import time
+                if "::" not in context:
+                    continue
+                path = os.path.relpath(path, os.path.abspath(root)).replace(os.sep, "/")
+                if not path.startswith(".."):
+                    covered.setdefault(context.split("::")[0], set()).add(path)
+    finally:
+        connection.close()
+    return covered
+
+
+class ImpactMap:
+    """The cached test-to-code map, and the selection it makes for a set of changes."""
+
+    def __init__(self, root="."):
+        self.root = root
+        self.graph = ImportGraph(root)
+        self.tests = sorted(path for path in self.graph.files if _is_test_file(path))
+        self.entries = self._load()
+        # Changed paths that no longer exist, set by select()
+        self.deleted = set()
+
+    def _load(self):
+        try:
+            with open(os.path.join(self.root, CACHE_PATH), "r") as f:
+                cache = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+        return cache.get("tests", {}) if cache.get("version") == CACHE_VERSION else {}
+
+    def _stale(self, test, coverage):
+        entry = self.entries.get(test)
+        return (
+            entry is None
+            or entry["hash"] != _digest(os.path.join(self.root, test))
+            # Mapped by imports alone, and now coverage could refine it
+            or (coverage and not entry["coverage"])
+        )
+
+    def dependencies(self, test):
+        entry = self.entries.get(test, {})
+        deps = self.graph.closure({test} | set(entry.get("covered", [])))
+        if not entry.get("coverage") and self.graph.uses_client(test):
+            # Without coverage there is no telling which routes a request reaches
+            deps |= {path for path in self.graph.files if path.startswith("app/")}
+        return deps
+
+    def select(self, changed, coverage):
+        """
+        (tests to run, reason). tests is None when every test must run:
+        a change to shared configuration, or to files no map can attribute.
+        """
+        changed = set(changed)
+        self.deleted = {path for path in changed if not os.path.exists(os.path.join(self.root, path))}
+        unmapped = sorted(
+            path for path in changed
+            if path in GLOBAL_FILES or (path.startswith(("app/", "tests/")) and not path.endswith(".py"))
+        )
+        if unmapped:
+            return None, f"{unmapped[0]} changed" + (f" (and {len(unmapped) - 1} more)" if len(unmapped) > 1 else "")
+
+        selected, stale = [], 0
+        for test in self.tests:
+            if self._stale(test, coverage):
+                stale += 1
+                selected.append(test)
+            elif self.dependencies(test) & changed or self.deleted.intersection(self.entries[test]["deps"]):
+                selected.append(test)
+        return selected, f"{stale} with a stale map" if stale else ""
+
+    def update(self, tests, coverage):
+        """
+        Refresh the entries of the test files that just ran; drop those of
+        deleted tests. Recorded dependencies on files still deleted are kept,
+        so the tests keep being selected until the deletion is committed.
+        """
+        covered = covered_files(os.path.join(self.root, COVERAGE_PATH), self.root) if coverage else {}
+        for test in tests:
+            kept = self.deleted.intersection(self.entries.get(test, {}).get("deps", ()))
+            self.entries[test] = {
+                "hash": _digest(os.path.join(self.root, test)),
+                "coverage": coverage,
+                "covered": sorted(path for path in covered.get(test, ()) if path != test),
+            }
+            self.entries[test]["deps"] = sorted(self.dependencies(test) | kept)
+        existing = set(self.tests)
+        self.entries = {test: entry for test, entry in self.entries.items() if test in existing}
+
+        path = os.path.join(self.root, CACHE_PATH)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({
+                "version": CACHE_VERSION,
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+                "tests": self.entries,
+            }, f, indent=2, sort_keys=True)
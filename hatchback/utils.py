@@ -1,14 +1,17 @@
 import os
+import json
 import time
 import random
 from rich.console import Console
-from rich.text import Text
-from rich.panel import Panel
-from rich.live import Live
 
 console = Console()
 
 def play_intro():
+    # Imported here: only the intro needs them, and every command imports utils
+    from rich.text import Text
+    from rich.panel import Panel
+    from rich.live import Live
+
     width = 50
     
     # A classic hatchback shape
@@ -100,3 +103,17 @@ def get_venv_executable(name):
 
 def to_pascal_case(snake_str):
     return "".join(x.capitalize() for x in snake_str.lower().split("_"))
+
+def load_manifest(path):
+    """Load a manifest file: YAML for .yml/.yaml, JSON otherwise."""
+    with open(path, "r") as f:
+        if path.endswith((".yml", ".yaml")):
+            import yaml
+            return yaml.safe_load(f)
+        return json.load(f)
+
+def format_size(size):
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024 or unit == "GiB":
+            return f"{size:,.0f} {unit}" if unit == "B" else f"{size:,.1f} {unit}"
+        size /= 1024
@@ -11,9 +11,10 @@ setup(
     include_package_data=True,
     install_requires=[
         "rich",
-        "sqlacodegen",
+        "sqlalchemy>=2.0",
         "python-dotenv",
-        "psycopg2-binary"
+        "psycopg2-binary",
+        "pyyaml"
     ],
     entry_points={
         "console_scripts": [